@@ -0,0 +1,6 @@
+from .server import app, ConversationCache
+
+__all__ = [
+    "app",
+    "ConversationCache"
+]
@@ -0,0 +1,369 @@
+# HTTP / SSE CHAT API
+"""
+A small ASGI server in front of ChatPipeline, for front ends other than
+Streamlit, load tests and horizontal scaling.
+
+    python -m api --port 8000 --workers 4
+    uvicorn api.server:app --port 8000
+
+Endpoints (JSON in and out):
+
+    POST   /conversations                     -> {"conversation_id"}
+    POST   /conversations/{id}/messages       {"message", "mood"?} -> reply
+    GET    /conversations/{id}/messages       ?before=<seq>&limit=<n> -> stored page
+    DELETE /conversations/{id}
+    GET    /health                            Liveness
+    GET    /ready                             Readiness: 503 until warmup has finished
+    GET    /metrics                           Prometheus text (this worker)
+
+Send the message with "Accept: text/event-stream" to get the reply as
+server-sent events instead: a "turn" event right away, keep-alive comments
+while the turn runs, then one "message" event. Closing the connection
+cancels the generation.
+
+Conversation ids are the same opaque ids the Streamlit app puts in its
+URL, and messages go to the same conversation store, which numbers them.
+Each worker keeps the state of recently used conversations in memory
+(LRU); before every turn the LLM history is checked against the store
+and reloaded when another worker has added to the conversation.
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+
+from config.settings import (
+    MOOD_OPTIONS,
+    API_HOST,
+    API_PORT,
+    API_MAX_SESSIONS,
+    API_MAX_BODY_BYTES,
+    CHAT_PAGE_SIZE,
+    CONVERSATION_HISTORY_WINDOW,
+    TRACING_ENABLED,
+    TRACE_LOG_PATH,
+    PROFILING_ENABLED,
+    PROFILE_SAMPLE_RATE,
+    PROFILE_DIR,
+    PROFILE_KEEP
+)
+from pipeline import ChatSession, get_chat_pipeline, start_warmup, is_ready, warmup_status
+from store import (
+    get_conversation_store,
+    get_conversation_writer,
+    new_conversation_id,
+    MIN_CONVERSATION_ID_LENGTH
+)
+from utils import metrics, tracing, profiling
+
+SSE_KEEPALIVE_SECONDS = 10
+MAX_PAGE_SIZE = 100
+STORE_FLUSH_TIMEOUT = 2.0  # Seconds to wait for queued writes before reading the store
+
+MOOD_KEYS = {mood["key"] for mood in MOOD_OPTIONS.values()}
+CONVERSATION_PATH = re.compile(r"^/conversations/([A-Za-z0-9_-]+)(/messages)?$")
+
+REQUESTS = metrics.counter("api_requests_total", "HTTP API requests")
+ERRORS = metrics.counter("api_errors_total", "HTTP API requests answered with an error status")
+OPEN_STREAMS = metrics.gauge("api_open_streams", "Open server-sent event streams")
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# CONVERSATION STATE
+class _Conversation:
+    __slots__ = ("session", "stored")
+
+    def __init__(self, session: ChatSession):
+        self.session = session
+        self.stored: Optional[int] = None  # Stored messages the session's history reflects
+
+
+class ConversationCache:
+    """Pipeline state of recently used conversations, least recently used evicted first."""
+
+    def __init__(self, max_sessions: int):
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._conversations: "OrderedDict[str, _Conversation]" = OrderedDict()
+
+    def get(self, conversation_id: str) -> _Conversation:
+        """
+        The conversation's state, brought up to date with the store. Blocks on the store.
+
+        Another worker may have served the conversation since this one last
+        did, so the stored message count is checked on every turn and the
+        LLM history reloaded when it moved. The emotional trajectory and
+        crisis state stay this worker's own.
+        """
+        with self._lock:
+            conversation = self._conversations.get(conversation_id)
+            if conversation is None:
+                conversation = self._conversations[conversation_id] = _Conversation(ChatSession())
+                while len(self._conversations) > self.max_sessions:
+                    self._conversations.popitem(last=False)
+            else:
+                self._conversations.move_to_end(conversation_id)
+
+        with conversation.session.lock:
+            # This worker's queued writes for the conversation land first; a
+            # count that still differs means someone else wrote to it
+            flushed = get_conversation_writer().flush(STORE_FLUSH_TIMEOUT, conversation_id)
+            store = get_conversation_store()
+            stored = store.count(conversation_id)
+            if conversation.stored is None or (flushed and stored != conversation.stored):
+                recent = [message for _, message in store.load_recent(conversation_id, CONVERSATION_HISTORY_WINDOW)]
+                conversation.session.load_history(recent, CONVERSATION_HISTORY_WINDOW)
+                conversation.stored = stored
+        return conversation
+
+    def append(self, conversation_id: str, conversation: _Conversation, messages: List[Dict]):
+        """Queue messages for the store, which numbers them."""
+        writer = get_conversation_writer()
+        with conversation.session.lock:
+            for message in messages:
+                writer.submit(conversation_id, message)
+            conversation.stored += len(messages)
+
+    def drop(self, conversation_id: str):
+        with self._lock:
+            self._conversations.pop(conversation_id, None)
+
+
+conversations = ConversationCache(API_MAX_SESSIONS)
+
+
+# REQUEST HANDLING
+async def _read_json(receive) -> Dict:
+    body = b""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise ApiError(499, "Client disconnected")
+        body += message.get("body", b"")
+        if len(body) > API_MAX_BODY_BYTES:
+            raise ApiError(413, "Request body too large")
+        if not message.get("more_body"):
+            break
+    if not body:
+        return {}
+    try:
+        data = json.loads(body)
+    except ValueError:
+        raise ApiError(400, "Body must be JSON")
+    if not isinstance(data, dict):
+        raise ApiError(400, "Body must be a JSON object")
+    return data
+
+
+async def _send_json(send, status: int, data: Optional[Dict]):
+    body = json.dumps(data).encode("utf-8") if data is not None else b""
+    headers = [(b"content-type", b"application/json")] if data is not None else []
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_text(send, status: int, content_type: str, text: str):
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", content_type.encode("ascii"))]})
+    await send({"type": "http.response.body", "body": text.encode("utf-8")})
+
+
+def _sse_event(event: str, data: Dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+
+
+async def _watch_disconnect(receive, disconnected: threading.Event):
+    """Set `disconnected` when the client goes away (the body has already been read)."""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            disconnected.set()
+            return
+
+
+def _conversation_id(value: str) -> str:
+    if len(value) < MIN_CONVERSATION_ID_LENGTH:
+        raise ApiError(404, "Unknown conversation")
+    return value
+
+
+async def _post_message(scope, receive, send, conversation_id: str):
+    data = await _read_json(receive)
+    text = data.get("message")
+    if not isinstance(text, str) or not text.strip():
+        raise ApiError(400, "'message' must be a non-empty string")
+    mood = data.get("mood")
+    if mood is not None and mood not in MOOD_KEYS:
+        raise ApiError(400, f"'mood' must be one of: {', '.join(sorted(MOOD_KEYS))}")
+
+    conversation = await asyncio.to_thread(conversations.get, conversation_id)
+    if mood is not None:
+        conversation.session.mood_key = mood
+    pipeline = await asyncio.to_thread(get_chat_pipeline)
+
+    disconnected = threading.Event()
+    watcher = asyncio.create_task(_watch_disconnect(receive, disconnected))
+
+    def check():
+        return "disconnected" if disconnected.is_set() else None
+
+    headers = dict(scope.get("headers") or [])
+    streaming = b"text/event-stream" in headers.get(b"accept", b"")
+    turn = asyncio.create_task(pipeline.respond_async(
+        conversation.session, text, session_id=f"api:{conversation_id}", should_cancel=check
+    ))
+    try:
+        if streaming:
+            OPEN_STREAMS.inc()
+            await send({"type": "http.response.start", "status": 200, "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no")
+            ]})
+            await send({"type": "http.response.body", "more_body": True,
+                        "body": _sse_event("turn", {"conversation_id": conversation_id})})
+            while True:
+                done, _ = await asyncio.wait({turn}, timeout=SSE_KEEPALIVE_SECONDS)
+                if done or disconnected.is_set():
+                    break
+                await send({"type": "http.response.body", "body": b": keepalive\n\n", "more_body": True})
+        try:
+            result = await turn
+        except Exception as e:
+            if not streaming:
+                raise
+            # Headers are already sent; report the failure as an event
+            print(f"[api] turn failed: {type(e).__name__}: {e}")
+            await send({"type": "http.response.body", "body": _sse_event("error", {"error": "Internal error"})})
+            return
+    except BaseException:
+        turn.cancel()
+        raise
+    finally:
+        watcher.cancel()
+        if streaming:
+            OPEN_STREAMS.dec()
+
+    # The user's message is kept even when the reply was cancelled, as in the app
+    messages = [{"role": "user", "content": text}]
+    if result["response"]:
+        messages.append({"role": "assistant", "content": result["response"]})
+    conversations.append(conversation_id, conversation, messages)
+
+    if disconnected.is_set():
+        return
+    reply = {"conversation_id": conversation_id, **result}
+    if streaming:
+        await send({"type": "http.response.body", "body": _sse_event("message", reply)})
+    else:
+        await _send_json(send, 200, reply)
+
+
+async def _get_messages(scope, send, conversation_id: str):
+    query = parse_qs(scope.get("query_string", b"").decode("ascii", "replace"))
+    try:
+        before = int(query.get("before", [1 << 62])[0])
+        limit = min(int(query.get("limit", [CHAT_PAGE_SIZE])[0]), MAX_PAGE_SIZE)
+    except ValueError:
+        raise ApiError(400, "'before' and 'limit' must be integers")
+
+    def load():
+        get_conversation_writer().flush(STORE_FLUSH_TIMEOUT, conversation_id)
+        return get_conversation_store().load_page(conversation_id, before, limit)
+
+    page = await asyncio.to_thread(load)
+    await _send_json(send, 200, {
+        "conversation_id": conversation_id,
+        "messages": [{"seq": seq, "role": message["role"], "content": message["content"]} for seq, message in page],
+        "next_before": page[0][0] if page and page[0][0] > 0 else None
+    })
+
+
+async def _route(scope, receive, send):
+    method, path = scope["method"], scope["path"]
+
+    if path == "/health" and method == "GET":
+        return await _send_json(send, 200, {"status": "ok"})
+    if path == "/ready" and method == "GET":
+        return await _send_json(send, 200 if is_ready() else 503, warmup_status())
+    if path == "/metrics" and method == "GET":
+        return await _send_text(send, 200, "text/plain; version=0.0.4", metrics.render_prometheus())
+    if path == "/conversations" and method == "POST":
+        return await _send_json(send, 201, {"conversation_id": new_conversation_id()})
+
+    match = CONVERSATION_PATH.match(path)
+    if not match:
+        raise ApiError(404, "Not found")
+    conversation_id = _conversation_id(match.group(1))
+
+    if match.group(2):
+        if method == "POST":
+            return await _post_message(scope, receive, send, conversation_id)
+        if method == "GET":
+            return await _get_messages(scope, send, conversation_id)
+    elif method == "DELETE":
+        conversations.drop(conversation_id)
+        get_conversation_writer().delete(conversation_id)
+        return await _send_json(send, 204, None)
+    raise ApiError(405, "Method not allowed")
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            tracing.configure(TRACING_ENABLED, TRACE_LOG_PATH or None)
+            profiling.configure(PROFILING_ENABLED, PROFILE_SAMPLE_RATE, PROFILE_DIR, PROFILE_KEEP)
+            # Models and index load in the background; /ready reports when they're done
+            start_warmup()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await asyncio.to_thread(get_conversation_writer().close)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    """The ASGI application."""
+    if scope["type"] == "lifespan":
+        return await _lifespan(receive, send)
+    if scope["type"] != "http":
+        return
+
+    REQUESTS.inc()
+    try:
+        await _route(scope, receive, send)
+    except ApiError as e:
+        ERRORS.inc()
+        if e.status != 499:
+            await _send_json(send, e.status, {"error": e.message})
+    except Exception as e:
+        ERRORS.inc()
+        print(f"[api] {scope['method']} {scope['path']} failed: {type(e).__name__}: {e}")
+        await _send_json(send, 500, {"error": "Internal error"})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the Sukoon chat pipeline over HTTP.")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes")
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run("api.server:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,36 +5,33 @@ for people dealing with depression, anxiety, and overthinking.
 """
 
 import streamlit as st
-from groq import Groq
-from typing import Optional
-import os
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from collections import OrderedDict
 
 # Import local modules
 from config.settings import (
     MOOD_OPTIONS, 
-    SAFETY_DISCLAIMER, 
-    THEME_COLORS,
     QUICK_ACTIONS,
-    GROQ_API_KEY,
-    GROQ_MODEL,
-    MAX_TOKENS,
-    TEMPERATURE
-)
-from prompts.templates import (
-    SYSTEM_PROMPT,
-    MOOD_PROMPTS,
-    CONVERSATION_STARTERS,
-    CRISIS_RESPONSE
+    TRACING_ENABLED,
+    TRACE_LOG_PATH,
+    METRICS_PORT,
+    METRICS_HOST,
+    PROFILING_ENABLED,
+    PROFILE_SAMPLE_RATE,
+    PROFILE_DIR,
+    PROFILE_KEEP,
+    CONVERSATION_HISTORY_WINDOW,
+    SESSION_LIVE_MESSAGES,
+    SESSION_IDLE_TTL,
+    SESSION_IDLE_LIVE_MESSAGES,
+    SESSION_SWEEP_INTERVAL,
+    CHAT_PAGE_SIZE,
+    CHAT_LIVE_MESSAGES,
+    TRANSCRIPT_CACHE_PAGES
 )
+from prompts.templates import CONVERSATION_STARTERS
 from utils import (
-    analyze_sentiment,
-    get_empathy_level,
-    format_sentiment_for_prompt,
-    detect_crisis,
-    get_crisis_response,
-    format_crisis_for_prompt,
-    detect_language,
-    format_language_context,
     get_breathing_exercise,
     format_breathing_exercise,
     get_grounding_exercise,
@@ -47,15 +44,20 @@ from utils import (
     get_meditation,
     format_meditation
 )
+from utils import metrics, tracing, profiling
+from utils.session_memory import SessionMemory, session_registry
 
-# RAG Imports
-from rag import (
-    EmbeddingService,
-    VectorStore,
-    WellnessRetriever,
-    index_knowledge_base
+# Conversation store
+from store import (
+    get_conversation_store,
+    get_conversation_writer,
+    new_conversation_id,
+    MIN_CONVERSATION_ID_LENGTH
 )
 
+# Chat pipeline (turn logic shared with the HTTP API)
+from pipeline import ChatSession, get_chat_pipeline, start_warmup
+
 # PAGE CONFIGURATION
 st.set_page_config(
     page_title="Sukoon - Mental Wellness Companion",
@@ -64,13 +66,6 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# GROQ API CONFIGURATION
-def get_groq_client() -> Optional[Groq]:
-    """Get Groq client instance."""
-    if GROQ_API_KEY:
-        return Groq(api_key=GROQ_API_KEY)
-    return None
- 
  # Custom Styling
 def apply_custom_css():
     """Apply custom CSS for a calming, readable UI."""
@@ -325,240 +320,289 @@ def init_session_state():
     defaults = {
         "messages": [],          # Chat history
         "current_mood": None,    # User's selected mood
-        "mood_key": None,        # Mood key for prompts
         "show_disclaimer": True, # Show initial disclaimer
-        "crisis_mode": False,    # Whether crisis was detected
         "conversation_started": False,  # Whether conversation has started
-        "conversation_history": [],  # Groq conversation history
+        "chat_session": ChatSession(),  # Mood, LLM history and emotional/crisis memory for the pipeline
         "rag_initialized": False,     # Whether RAG vector store is index
-        "emotional_context": "",     # Hidden emotional memory
-        "conversation_themes": []    # Detected themes for continuity
+        "new_messages": [],      # Posted by sidebar fragments since the last full run
+        "history_page": None,    # Page of earlier messages shown (None = most recent)
+        "transcript_cache": OrderedDict()  # (conversation, page, end) -> rendered markdown
     }
     
     for key, value in defaults.items():
         if key not in st.session_state:
             st.session_state[key] = value
 
-# LLM RESPONSE GENERATION (GROQ)
-def generate_response(user_message: str, mood_context: str = "") -> str:
+# GENERATION CANCELLATION
+def get_generation_cancel_check():
+    """
+    Build a check that tells an in-flight generation when its reply is no longer wanted.
+    
+    Streamlit can't start the next script run until this one returns, so the
+    generation has to notice pending reruns (user sent again) and closed
+    sessions (tab closed) itself.
+    
+    Returns:
+        Tuple of (session_id, check) where check() returns "superseded",
+        "disconnected" or None. Both are None outside a Streamlit script run.
+    """
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return None, None
+    
+    def check():
+        if runtime.exists() and not runtime.get_instance().is_active_session(ctx.session_id):
+            return "disconnected"
+        # ScriptRequests has no public accessor for a pending rerun/stop
+        state = getattr(ctx.script_requests, "_state", None)
+        if state is not None and state.name != "CONTINUE":
+            return "superseded"
+        return None
+    
+    return ctx.session_id, check
+
+# SESSION MEMORY & CONVERSATION STORE
+# Shared by every session; never counted in a session's size
+SHARED_SESSION_KEYS = {"session_memory"}
+
+
+def init_conversation():
     """
-    Generate an empathetic response using Groq API.
+    Attach this session to its conversation, once per session.
+    
+    The opaque conversation id lives in the URL (?c=...), so a reload,
+    reconnect or worker restart resumes the chat: the most recent messages
+    are loaded from the store and older ones are paged in on request.
+    """
+    if "session_memory" in st.session_state:
+        return
+    
+    ctx = get_script_run_ctx()
+    session_id = ctx.session_id if ctx else "local"
+    conversation_id = st.query_params.get("c", "")
+    
+    first_seq = total = 0
+    if len(conversation_id) >= MIN_CONVERSATION_ID_LENGTH:
+        store = get_conversation_store()
+        total = store.count(conversation_id)
+        recent = store.load_recent(conversation_id, SESSION_LIVE_MESSAGES)
+        if recent:
+            first_seq = recent[0][0]
+            st.session_state.messages = [message for _, message in recent]
+            st.session_state.conversation_started = True
+            st.session_state.show_disclaimer = False
+            st.session_state.chat_session = ChatSession.from_messages(
+                st.session_state.messages, CONVERSATION_HISTORY_WINDOW
+            )
+    else:
+        conversation_id = new_conversation_id()
+        st.query_params["c"] = conversation_id
+    
+    memory = SessionMemory(session_id, conversation_id, first_seq=first_seq, saved=total)
+    session_registry.get(session_id, memory)
+    st.session_state.session_memory = memory
+
+
+def track_session_memory():
+    """Queue new messages for the store, page out old ones and re-measure the session."""
+    memory = st.session_state.session_memory
+    
+    # Only a queue put: the writer thread does the disk I/O
+    writer = get_conversation_writer()
+    for _, message in memory.take_unsaved(st.session_state.messages):
+        writer.submit(memory.conversation_id, message)
+    
+    state = {key: value for key, value in st.session_state.items() if key not in SHARED_SESSION_KEYS}
+    memory.touch(st.session_state.messages, state, SESSION_LIVE_MESSAGES)
+
+
+# RESPONSE GENERATION
+def generate_response(user_message: str) -> str:
+    """
+    Answer a message through the shared chat pipeline.
     
     Args:
         user_message: The user's input message
-        mood_context: Additional context based on user's mood
         
     Returns:
-        AI-generated response string
+        AI-generated response string (empty when the generation was superseded)
     """
-    # Analyze sentiment
-    sentiment = analyze_sentiment(user_message)
-    sentiment_context = format_sentiment_for_prompt(sentiment)
-    
-    # Check for crisis indicators
-    crisis = detect_crisis(user_message)
-    
-    if crisis["is_crisis"]:
-        st.session_state.crisis_mode = True
-        # Return pre-defined crisis response
-        return get_crisis_response(crisis["severity"])
-    
-    # Build context for the message
-    context_parts = []
-    
-    # 0. Language Detection - Respond in user's language
-    language_context = format_language_context(user_message)
-    if language_context:
-        context_parts.append(language_context)
-    
-    # 1. RAG Retrieval - Treat as lived wisdom
-    try:
-        if "retriever" in st.session_state:
-            results = st.session_state.retriever.retrieve(user_message)
-            rag_context = st.session_state.retriever.format_context_for_prompt(results)
-            if rag_context:
-                context_parts.append(f"[LIVED WISDOM & INSIGHTS]\n{rag_context}")
-    except Exception as e:
-        # Silent fail for RAG to maintain conversation flow
-        pass
-    
-    if mood_context:
-        context_parts.append(f"[EMOTIONAL TONE GUIDE]\n{mood_context}")
-    
-    context_parts.append(sentiment_context)
-    
-    # 3. Hidden Memory
-    if st.session_state.emotional_context:
-        context_parts.append(f"[HIDDEN MEMORY]\n{st.session_state.emotional_context}")
-    
-    # Combine context with user message
-    enhanced_message = "\n\n".join(context_parts) + f"\n\n[USER MESSAGE]: {user_message}"
-    
-    try:
-        client = get_groq_client()
-        if not client:
-            return "⚠️ **API Key Required**: Please add your Groq API key to the `.env` file. You can get a free key at [Groq Console](https://console.groq.com). 💙"
-        
-        # Build messages with system prompt and conversation history
-        messages = [{"role": "system", "content": SYSTEM_PROMPT}]
-        
-        # Add conversation history for context
-        for msg in st.session_state.conversation_history[-10:]:  # Keep last 10 messages for therapist-like continuity
-            messages.append(msg)
-        
-        # Add current user message
-        messages.append({"role": "user", "content": enhanced_message})
-        
-        # Generate response with Groq (ultra-fast inference)
-        chat_completion = client.chat.completions.create(
-            messages=messages,
-            model=GROQ_MODEL,
-            max_tokens=MAX_TOKENS,
-            temperature=TEMPERATURE,
-        )
-        
-        response_text = chat_completion.choices[0].message.content
-        
-        # Update hidden context and themes
-        if sentiment["emotional_intensity"] in ["moderate", "severe"]:
-            st.session_state.emotional_context = f"The user has been feeling {sentiment['emotional_intensity']} {', '.join(sentiment['detected_emotions'][:2])}."
-        
-        for emotion in sentiment["detected_emotions"]:
-            if emotion not in st.session_state.conversation_themes:
-                st.session_state.conversation_themes.append(emotion)
-        
-        # Update conversation history
-        st.session_state.conversation_history.append({"role": "user", "content": user_message})
-        st.session_state.conversation_history.append({"role": "assistant", "content": response_text})
-        
-        return response_text
-        
-    except Exception as e:
-        error_msg = str(e)
-        if "API_KEY" in error_msg.upper() or "authentication" in error_msg.lower():
-            return "⚠️ **API Key Required**: Please add your Groq API key to the `.env` file. You can get a free key at [Groq Console](https://console.groq.com). 💙"
-        return f"I'm having trouble connecting right now, but I'm still here with you. 💙 Please try again in a moment. (Error: {error_msg[:100]})"
+    session_id, cancel_check = get_generation_cancel_check()
+    # Resolved every turn (it is cached): a session that started before RAG
+    # loaded, or while it was failing, picks it up once it's available
+    result = get_chat_pipeline().respond(
+        st.session_state.chat_session,
+        user_message,
+        session_id=session_id,
+        should_cancel=cancel_check
+    )
+    return result["response"]
 
 # SIDEBAR COMPONENTS
-def render_sidebar():
+# Mood selection and quick actions are fragments: a click reruns only the
+# fragment, not the whole app. Messages they add are drawn straight into
+# the chat tail container; the next full run draws them as part of history.
+def render_sidebar(chat_tail):
     """Render the sidebar with mood selection and options."""
     with st.sidebar:
         st.markdown("## 🕊️ Sukoon")
         st.markdown("*Your Mental Wellness Companion*")
         st.divider()
         
-        # Mood Selection
-        st.markdown("### How are you feeling?")
-        st.markdown("*Select your current mood*")
-        
-        selected_mood = None
-        for mood_label, mood_data in MOOD_OPTIONS.items():
-            if st.button(
-                mood_label, 
-                key=f"mood_{mood_data['key']}",
-                use_container_width=True,
-                type="secondary" if st.session_state.current_mood != mood_label else "primary"
-            ):
-                st.session_state.current_mood = mood_label
-                st.session_state.mood_key = mood_data["key"]
-                # Add starter message if conversation hasn't started
-                if not st.session_state.conversation_started:
-                    starter = CONVERSATION_STARTERS.get(mood_data["key"], 
-                        "Hi there! 💙 I'm here to listen. How can I support you today?")
-                    st.session_state.messages.append({
-                        "role": "assistant",
-                        "content": starter
-                    })
-                    st.session_state.conversation_started = True
-                st.rerun()
-        
-        # Show current mood
-        if st.session_state.current_mood:
-            st.success(f"Current mood: {st.session_state.current_mood}")
+        render_mood_selector(chat_tail)
         
         st.divider()
         
-        # Quick Actions
-        st.markdown("### 🛠️ Quick Support")
-        
-        col1, col2 = st.columns(2)
-        
-        actions = QUICK_ACTIONS
-        for i, action in enumerate(actions):
-            with col1 if i % 2 == 0 else col2:
-                if st.button(
-                    f"{action['icon']}",
-                    key=f"action_{action['action']}",
-                    help=action['label'],
-                    use_container_width=True
-                ):
-                    handle_quick_action(action['action'])
-                st.caption(action['label'])
+        render_quick_actions(chat_tail)
         
-        
-        # Clear chat
-        if st.button("🗑️ Clear Conversation", use_container_width=True, type="secondary"):
-            st.session_state.messages = []
-            st.session_state.conversation_started = False
-            st.session_state.crisis_mode = False
-            st.session_state.conversation_history = []  # Reset Groq conversation
-            st.rerun()
+        # Clear chat (changes the whole page, so this one is a full rerun)
+        st.button(
+            "🗑️ Clear Conversation",
+            use_container_width=True,
+            type="secondary",
+            on_click=clear_conversation
+        )
+
+
+def select_mood(mood_label: str, mood_key: str):
+    """Mood button callback; runs before the fragment redraws."""
+    st.session_state.current_mood = mood_label
+    st.session_state.chat_session.mood_key = mood_key
+    # Add starter message if conversation hasn't started
+    if not st.session_state.conversation_started:
+        starter = CONVERSATION_STARTERS.get(mood_key, 
+            "Hi there! 💙 I'm here to listen. How can I support you today?")
+        post_assistant_message(starter)
+        st.session_state.conversation_started = True
+
+
+@st.fragment
+def render_mood_selector(chat_tail):
+    """Mood buttons and the current mood."""
+    st.markdown("### How are you feeling?")
+    st.markdown("*Select your current mood*")
+    
+    for mood_label, mood_data in MOOD_OPTIONS.items():
+        st.button(
+            mood_label, 
+            key=f"mood_{mood_data['key']}",
+            use_container_width=True,
+            type="secondary" if st.session_state.current_mood != mood_label else "primary",
+            on_click=select_mood,
+            args=(mood_label, mood_data["key"])
+        )
+    
+    # Show current mood
+    if st.session_state.current_mood:
+        st.success(f"Current mood: {st.session_state.current_mood}")
+    
+    draw_new_messages(chat_tail)
+
+
+@st.fragment
+def render_quick_actions(chat_tail):
+    """Quick Support buttons."""
+    st.markdown("### 🛠️ Quick Support")
+    
+    col1, col2 = st.columns(2)
+    
+    actions = QUICK_ACTIONS
+    for i, action in enumerate(actions):
+        with col1 if i % 2 == 0 else col2:
+            st.button(
+                f"{action['icon']}",
+                key=f"action_{action['action']}",
+                help=action['label'],
+                use_container_width=True,
+                on_click=handle_quick_action,
+                args=(action['action'],)
+            )
+            st.caption(action['label'])
+    
+    draw_new_messages(chat_tail)
+
+
+def clear_conversation():
+    """Clear Conversation callback; runs before the full rerun the click triggers."""
+    st.session_state.messages = []
+    st.session_state.new_messages = []
+    st.session_state.conversation_started = False
+    st.session_state.chat_session.reset()  # Reset LLM history and emotional memory
+    st.session_state.history_page = None
+    st.session_state.transcript_cache.clear()
+    # Clearing also removes the stored conversation; a new id starts a new one
+    memory = st.session_state.session_memory
+    get_conversation_writer().delete(memory.conversation_id)
+    memory.reset(new_conversation_id(), st.session_state.messages)
+    st.query_params["c"] = memory.conversation_id
+
+
+def append_message(message: dict):
+    """Add a message to the transcript; the sweeper thread may be trimming it meanwhile."""
+    with st.session_state.session_memory.lock:
+        st.session_state.messages.append(message)
+
+
+def post_assistant_message(content: str):
+    """Add an assistant message outside a turn (starter, coping content)."""
+    message = {"role": "assistant", "content": content}
+    append_message(message)
+    st.session_state.new_messages.append(message)
+
+
+def draw_new_messages(chat_tail):
+    """Draw messages posted since the last full run into the chat, and save them."""
+    if not st.session_state.new_messages:
+        return
+    with chat_tail:
+        for message in st.session_state.new_messages:
+            with st.chat_message(message["role"], avatar="🧘" if message["role"] == "assistant" else "👤"):
+                st.markdown(message["content"])
+    st.session_state.new_messages = []
+    track_session_memory()
 
 # QUICK ACTION HANDLERS
 def handle_quick_action(action: str):
-    """Handle quick action button clicks."""
+    """Quick action button callback: post the chosen exercise to the chat."""
     
     if action == "breathing":
         exercise = get_breathing_exercise()
         content = format_breathing_exercise(exercise)
-        st.session_state.messages.append({
-            "role": "assistant",
-            "content": content
-        })
     
     elif action == "grounding":
         exercise = get_grounding_exercise()
         content = format_grounding_exercise(exercise)
-        st.session_state.messages.append({
-            "role": "assistant",
-            "content": content
-        })
     
     elif action == "cbt":
         technique = get_cbt_technique()
         content = format_cbt_technique(technique)
-        st.session_state.messages.append({
-            "role": "assistant",
-            "content": content
-        })
     
     elif action == "journal":
         prompt = get_journal_prompt()
         content = format_journal_prompt(prompt)
-        st.session_state.messages.append({
-            "role": "assistant",
-            "content": content
-        })
     
     elif action == "affirmation":
         affirmation = get_affirmation()
-        st.session_state.messages.append({
-            "role": "assistant",
-            "content": f"✨ {affirmation}"
-        })
+        content = f"✨ {affirmation}"
     
     elif action == "meditation":
         meditation = get_meditation()
         content = format_meditation(meditation)
-        st.session_state.messages.append({
-            "role": "assistant",
-            "content": content
-        })
     
-    st.rerun()
+    else:
+        return
+    
+    post_assistant_message(content)
 
 def render_chat_interface():
-    """Render the main chat interface."""
+    """
+    Render the main chat interface: header, disclaimer and history.
+    
+    Returns:
+        The container below the history where new messages are drawn
+    """
+    # Messages posted before this full run are part of the history below
+    st.session_state.new_messages = []
     
     # Header
     st.markdown("#  Sukoon - Mental Wellness Companion")
@@ -582,35 +626,113 @@ def render_chat_interface():
     chat_container = st.container()
     
     with chat_container:
-        for message in st.session_state.messages:
-            with st.chat_message(message["role"], avatar="🧘" if message["role"] == "assistant" else "👤"):
-                st.markdown(message["content"])
+        render_chat_history()
     
+    return st.container()
+
+def handle_chat_input(chat_tail):
+    """Answer a message from the chat input, drawing the exchange into chat_tail."""
     if prompt := st.chat_input("Share what's on your mind... 💭"):
         if not st.session_state.conversation_started:
             st.session_state.conversation_started = True
         
-        st.session_state.messages.append({"role": "user", "content": prompt})
+        append_message({"role": "user", "content": prompt})
         
-        with st.chat_message("user", avatar="👤"):
-            st.markdown(prompt)
-        
-        with st.chat_message("assistant", avatar="🧘"):
-            with st.spinner("Thinking with care..."):
-                mood_context = ""
-                if st.session_state.mood_key:
-                    mood_context = MOOD_PROMPTS.get(st.session_state.mood_key, "")
-                
-                response = generate_response(prompt, mood_context)
-                st.markdown(response)
+        with chat_tail:
+            with st.chat_message("user", avatar="👤"):
+                st.markdown(prompt)
+            
+            with st.chat_message("assistant", avatar="🧘"):
+                with st.spinner("Thinking with care..."):
+                    response = generate_response(prompt)
+                    st.markdown(response)
         
-        # Add assistant response to history
-        st.session_state.messages.append({"role": "assistant", "content": response})
+        # Add assistant response to history (empty when the generation was superseded)
+        if response:
+            append_message({"role": "assistant", "content": response})
         
         # Check if we should show crisis resources after a crisis response
-        if st.session_state.crisis_mode:
+        if st.session_state.chat_session.crisis_mode:
             st.warning("If you need immediate help, please check the crisis helplines in the sidebar.")
 
+# CHAT HISTORY RENDERING
+# Only the last CHAT_LIVE_MESSAGES are drawn as chat bubbles. Everything
+# earlier is collapsed into pages of CHAT_PAGE_SIZE, each drawn as a single
+# cached markdown block, so the cost of a rerun doesn't grow with the chat.
+def format_transcript(messages) -> str:
+    """Render messages as one markdown block."""
+    parts = []
+    for message in messages:
+        speaker = "🧘 **Sukoon**" if message["role"] == "assistant" else "👤 **You**"
+        parts.append(f"{speaker}\n\n{message['content']}")
+    return "\n\n---\n\n".join(parts)
+
+
+def get_transcript_page(page: int, end_seq: int) -> str:
+    """
+    Markdown for earlier-messages page `page` (seqs page * CHAT_PAGE_SIZE up to end_seq).
+    
+    Pages still in memory come from st.session_state.messages, older ones
+    from the conversation store. Either way each page is rendered once.
+    """
+    memory = st.session_state.session_memory
+    start = page * CHAT_PAGE_SIZE
+    end = min(start + CHAT_PAGE_SIZE, end_seq)
+    cache = st.session_state.transcript_cache
+    key = (memory.conversation_id, page, end)
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+    
+    with memory.lock:
+        paged_out = memory.paged_out
+        if start >= paged_out:
+            messages = st.session_state.messages[start - paged_out:end - paged_out]
+    if start < paged_out:
+        # Paged-out messages may still be queued for writing; this runs on a click, not a turn
+        get_conversation_writer().flush(timeout=2.0, conversation_id=memory.conversation_id)
+        stored = get_conversation_store().load_page(memory.conversation_id, end, end - start)
+        messages = [message for _, message in stored]
+    
+    cache[key] = format_transcript(messages)
+    if len(cache) > TRANSCRIPT_CACHE_PAGES:
+        cache.popitem(last=False)
+    return cache[key]
+
+
+@st.fragment
+def render_chat_history():
+    """Earlier messages (paginated, collapsed) and the recent ones as chat bubbles."""
+    memory = st.session_state.session_memory
+    with memory.lock:
+        messages = st.session_state.messages
+        live = messages[-CHAT_LIVE_MESSAGES:]
+        first_live_seq = memory.paged_out + len(messages) - len(live)
+    
+    if first_live_seq > 0:
+        pages = (first_live_seq + CHAT_PAGE_SIZE - 1) // CHAT_PAGE_SIZE
+        page = st.session_state.history_page
+        page = pages - 1 if page is None else max(0, min(page, pages - 1))
+        
+        # Paging only reruns this fragment
+        with st.expander(f"Earlier messages ({first_live_seq})"):
+            older_col, label_col, newer_col = st.columns([1, 2, 1])
+            with older_col:
+                if st.button("← Older", disabled=page == 0, use_container_width=True):
+                    page -= 1
+            with newer_col:
+                if st.button("Newer →", disabled=page == pages - 1, use_container_width=True):
+                    page += 1
+            page = max(0, min(page, pages - 1))
+            st.session_state.history_page = page
+            with label_col:
+                st.caption(f"Page {page + 1} of {pages}")
+            st.markdown(get_transcript_page(page, first_live_seq))
+    
+    for message in live:
+        with st.chat_message(message["role"], avatar="🧘" if message["role"] == "assistant" else "👤"):
+            st.markdown(message["content"])
+
 # MAIN APPLICATION
 def main():
     """Main application entry point."""
@@ -619,34 +741,39 @@ def main():
     
     # Initialize session state
     init_session_state()
+    init_conversation()
+    
+    # Per-stage latency tracing and the local metrics endpoint (both opt-in)
+    tracing.configure(TRACING_ENABLED, TRACE_LOG_PATH or None)
+    if METRICS_PORT:
+        metrics.start_metrics_server(METRICS_PORT, METRICS_HOST)
+    profiling.configure(PROFILING_ENABLED, PROFILE_SAMPLE_RATE, PROFILE_DIR, PROFILE_KEEP)
+    
+    # Session memory: idle sessions are compacted in the background
+    session_registry.start_sweeper(SESSION_SWEEP_INTERVAL, SESSION_IDLE_TTL, SESSION_IDLE_LIVE_MESSAGES)
+    
+    # Models and indexes load once per process, in the background (already
+    # started if the app was launched with: python -m pipeline serve-app)
+    start_warmup()
     
     # Initialize RAG Components
     if not st.session_state.rag_initialized:
         with st.spinner("Preparing wellness wisdom..."):
-            try:
-                # Use local embeddings (no API key needed)
-                embeddings = EmbeddingService()
-                
-                vector_store = VectorStore(persist_directory="./chroma_db")
-                vector_store.initialize_collection()
-                
-                # Index knowledge base if folder exists
-                kb_path = "./knowledge_base"
-                if os.path.exists(kb_path):
-                    index_knowledge_base(vector_store, embeddings, kb_path)
-                
-                st.session_state.retriever = WellnessRetriever(embeddings, vector_store)
-                st.session_state.rag_initialized = True
-            except Exception as e:
-                # Silenced for cleaner UI during testing
-                # st.error(f"Wellness engine notice: {str(e)}")
-                st.session_state.rag_initialized = True
-    
-    # Render sidebar
-    render_sidebar()
-    
-    # Render main chat interface
-    render_chat_interface()
+            # One pipeline, embedding model and indexed knowledge base for every
+            # session (local embeddings, no API key needed); waits only for the
+            # part of warmup still loading. If RAG can't load, the pipeline
+            # runs on keyword analysis alone until a later turn's retry succeeds.
+            get_chat_pipeline()
+            st.session_state.rag_initialized = True
+    
+    # Render main chat interface, then the sidebar, then answer any new
+    # message (the slow part) with both already on screen
+    chat_tail = render_chat_interface()
+    render_sidebar(chat_tail)
+    handle_chat_input(chat_tail)
+    
+    # Measure this session and page old messages out to the conversation store
+    track_session_memory()
     
     # Footer
     st.markdown("---")
@@ -0,0 +1,186 @@
+# CRISIS DETECTION REGRESSION & MICROBENCHMARK
+"""
+Checks the compiled crisis engine against the original per-pattern
+implementation on a labelled corpus, then times both for each message
+length bucket.
+
+Usage:
+    python -m benchmarks.bench_crisis [--iterations 2000]
+
+It also replays short conversations through RollingCrisisState and
+checks the severity of every turn.
+
+Exits non-zero if the compiled engine disagrees with the original on any
+message, has lower recall, is slower than the original in any length
+bucket, or any conversation scenario gives an unexpected severity.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from typing import Dict, List
+
+from utils.text_analysis import analyze_text
+from utils.crisis_detector import (
+    HIGH_RISK_PATTERNS,
+    SELF_HARM_PATTERNS,
+    CONCERNING_PATTERNS,
+    RollingCrisisState,
+    detect_crisis
+)
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "data", "crisis_corpus.jsonl")
+SEVERITY_RANK = {"none": 0, "low": 1, "medium": 2, "high": 3}
+# Message length buckets, in characters: (name, min, max exclusive)
+LENGTH_BUCKETS = [("short", 0, 50), ("medium", 50, 200), ("long", 200, 601)]
+
+
+def legacy_detect_crisis(text: str) -> Dict:
+    """The original implementation: one re.search per pattern, tier by tier."""
+    text_lower = text.lower().strip()
+    matched = []
+    severity = "none"
+    for pattern in HIGH_RISK_PATTERNS:
+        if re.search(pattern, text_lower):
+            matched.append(pattern)
+            severity = "high"
+    if severity != "high":
+        for pattern in SELF_HARM_PATTERNS:
+            if re.search(pattern, text_lower):
+                matched.append(pattern)
+                severity = "medium" if severity == "none" else severity
+    if severity == "none":
+        for pattern in CONCERNING_PATTERNS:
+            if re.search(pattern, text_lower):
+                matched.append(pattern)
+                severity = "low"
+    return {"severity": severity, "matched_patterns": matched}
+
+
+# ROLLING CONVERSATION SCENARIOS
+# (name, turns). Each turn is (seconds since start, message, expected
+# severity after RollingCrisisState.update()). A turn whose result is a
+# crisis is acknowledged, as the chat pipeline does.
+ROLLING_SCENARIOS = [
+    ("everyday concerning phrases stay low", [
+        (0, "I'm about to give up on this puzzle", "low"),
+        (300, "there's no point in this meeting", "low"),
+        (600, "I'm hopeless about the exam", "low"),
+        (900, "honestly hopeless, no point, I give up on this week", "low"),
+    ]),
+    ("ordinary messages after a crisis response", [
+        (0, "I want to kill myself", "high"),
+        (60, "thanks", "none"),
+        (120, "hi", "none"),
+        (600, "ok I'm going to make some tea", "none"),
+    ]),
+    ("concerning words after a crisis response don't repeat it", [
+        (0, "I want to kill myself", "high"),
+        (60, "I still feel hopeless", "low"),
+        (120, "no point in anything", "low"),
+        (180, "I want to hurt myself", "medium"),
+    ]),
+]
+
+
+def check_rolling_scenarios() -> List[str]:
+    """Replay ROLLING_SCENARIOS; returns a description of every unexpected severity."""
+    failures = []
+    for name, turns in ROLLING_SCENARIOS:
+        state = RollingCrisisState()
+        for seconds, text, expected in turns:
+            result = state.update(detect_crisis(text), now=float(seconds))
+            if result["is_crisis"]:
+                state.acknowledge()
+            if result["severity"] != expected:
+                failures.append(f"{name}: {text!r} at {seconds}s gave {result['severity']}, "
+                                f"expected {expected} (risk {result['cumulative_risk']})")
+    return failures
+
+
+def load_corpus(path: str = CORPUS_PATH) -> List[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def recall(detector, corpus: List[Dict]) -> float:
+    """Share of at-risk messages flagged at (at least) their labelled severity."""
+    at_risk = [row for row in corpus if row["severity"] != "none"]
+    hits = sum(
+        1 for row in at_risk
+        if SEVERITY_RANK[detector(row["text"])["severity"]] >= SEVERITY_RANK[row["severity"]]
+    )
+    return hits / len(at_risk)
+
+
+def false_positive_rate(detector, corpus: List[Dict]) -> float:
+    safe = [row for row in corpus if row["severity"] == "none"]
+    return sum(1 for row in safe if detector(row["text"])["severity"] != "none") / len(safe)
+
+
+def time_per_call(detector, texts: List[str], iterations: int) -> float:
+    """Mean nanoseconds per call."""
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        for text in texts:
+            detector(text)
+    return (time.perf_counter_ns() - start) / (iterations * len(texts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    texts = [row["text"] for row in corpus]
+
+    mismatches = []
+    for text in texts:
+        old, new = legacy_detect_crisis(text), detect_crisis(text)
+        if old["severity"] != new["severity"] or old["matched_patterns"] != new["matched_patterns"]:
+            mismatches.append((text, old, new))
+
+    old_recall, new_recall = recall(legacy_detect_crisis, corpus), recall(detect_crisis, corpus)
+    print(f"Corpus: {len(corpus)} messages ({sum(r['severity'] != 'none' for r in corpus)} at risk)")
+    print(f"Recall          legacy {old_recall:.3f}   compiled {new_recall:.3f}")
+    print(f"False positives legacy {false_positive_rate(legacy_detect_crisis, corpus):.3f}   "
+          f"compiled {false_positive_rate(detect_crisis, corpus):.3f}")
+    print(f"Disagreements: {len(mismatches)}")
+    for text, old, new in mismatches:
+        print(f"  {text!r}: legacy={old['severity']} {old['matched_patterns']} compiled={new['severity']} {new['matched_patterns']}")
+
+    # In the app the TextAnalysis is shared by every analyzer in the turn,
+    # so the engine's own cost is measured on pre-analyzed messages too.
+    slower = []
+    for bucket, low, high in LENGTH_BUCKETS:
+        bucket_texts = [text for text in texts if low <= len(text) < high]
+        if not bucket_texts:
+            continue
+        analyses = [analyze_text(text) for text in bucket_texts]
+        old_ns = time_per_call(legacy_detect_crisis, bucket_texts, args.iterations)
+        raw_ns = time_per_call(detect_crisis, bucket_texts, args.iterations)
+        shared_ns = time_per_call(detect_crisis, analyses, args.iterations)
+        print(f"Latency, {bucket} ({len(bucket_texts)} messages, {low}-{high - 1} chars)")
+        print(f"                legacy                    {old_ns / 1000:.2f} µs/op")
+        print(f"                compiled, raw string      {raw_ns / 1000:.2f} µs/op ({old_ns / raw_ns:.1f}x)")
+        print(f"                compiled, shared analysis {shared_ns / 1000:.2f} µs/op ({old_ns / shared_ns:.1f}x)")
+        if max(raw_ns, shared_ns) > old_ns:
+            slower.append(bucket)
+
+    if slower:
+        print(f"Compiled engine is slower than legacy on: {', '.join(slower)}")
+
+    scenario_failures = check_rolling_scenarios()
+    print(f"Conversation scenarios: {len(ROLLING_SCENARIOS)}, failures: {len(scenario_failures)}")
+    for failure in scenario_failures:
+        print(f"  {failure}")
+
+    if mismatches or new_recall < old_recall or slower or scenario_failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# SEMANTIC CRISIS SCREENING BENCHMARK
+"""
+Measures what the embedding screener adds to the regex crisis patterns:
+recall (overall and on paraphrases), false-positive rate, and the extra
+latency per turn once the message embedding exists. Semantic matches are
+scored uncapped here (the app caps them at "low", see
+SEMANTIC_MAX_SEVERITY), so this is the run to calibrate the thresholds with.
+
+Needs the embedding model used by the app (sentence-transformers, or
+HF_TOKEN for the Inference API).
+
+Usage:
+    python -m benchmarks.bench_crisis_semantic [--iterations 2000]
+"""
+
+import argparse
+import sys
+import time
+
+from rag.embeddings import EmbeddingService
+from rag.crisis_screener import CrisisScreener
+from utils.crisis_detector import detect_crisis, CRISIS_SIMILARITY_THRESHOLDS
+from utils.text_analysis import analyze_text
+from benchmarks.bench_crisis import load_corpus, recall, false_positive_rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    embedding_service = EmbeddingService()
+    try:
+        start = time.perf_counter()
+        screener = CrisisScreener(embedding_service)
+        build_seconds = time.perf_counter() - start
+    except ValueError as e:
+        sys.exit(f"Embedding model unavailable: {e}")
+
+    corpus = load_corpus()
+    texts = [row["text"] for row in corpus]
+    embeddings = embedding_service.embed_batch(texts)
+    scores_by_text = {text: screener.screen(vector) for text, vector in zip(texts, embeddings)}
+
+    def regex_only(text):
+        return detect_crisis(text)
+
+    def combined(text):
+        # Uncapped: what the screen would do if its matches were trusted
+        return detect_crisis(text, scores_by_text[text], semantic_max_severity="high")
+
+    paraphrases = [row for row in corpus if row["paraphrase"]]
+    print(f"Corpus: {len(corpus)} messages ({len(paraphrases)} paraphrases), "
+          f"{screener.exemplars.shape[0]} exemplars, thresholds {CRISIS_SIMILARITY_THRESHOLDS}")
+    print(f"{'':<24}{'regex':>8}{'+semantic':>11}")
+    print(f"{'Recall':<24}{recall(regex_only, corpus):>8.3f}{recall(combined, corpus):>11.3f}")
+    print(f"{'Recall (paraphrases)':<24}{recall(regex_only, paraphrases):>8.3f}{recall(combined, paraphrases):>11.3f}")
+    print(f"{'False positive rate':<24}{false_positive_rate(regex_only, corpus):>8.3f}"
+          f"{false_positive_rate(combined, corpus):>11.3f}")
+
+    for row in corpus:
+        result = combined(row["text"])
+        if result["semantic_tiers"]:
+            print(f"  semantic {result['semantic_tiers']} -> {result['severity']:<6} "
+                  f"(labelled {row['severity']}): {row['text']!r}")
+
+    # Extra cost per turn: the screen itself, and detect_crisis with vs without scores
+    analyses = [analyze_text(text) for text in texts]
+    start = time.perf_counter_ns()
+    for _ in range(args.iterations):
+        for vector in embeddings:
+            screener.screen(vector)
+    screen_ns = (time.perf_counter_ns() - start) / (args.iterations * len(embeddings))
+
+    start = time.perf_counter_ns()
+    for _ in range(args.iterations):
+        for analysis in analyses:
+            detect_crisis(analysis, scores_by_text[analysis.text])
+    combine_ns = (time.perf_counter_ns() - start) / (args.iterations * len(analyses))
+
+    print(f"Exemplar matrix built in {build_seconds * 1000:.0f} ms (once per process)")
+    print(f"Latency  screen (matmul + per-tier max)  {screen_ns / 1000:.1f} µs/op")
+    print(f"         detect_crisis with scores       {combine_ns / 1000:.1f} µs/op")
+
+
+if __name__ == "__main__":
+    main()
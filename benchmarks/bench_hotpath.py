@@ -0,0 +1,236 @@
+# PER-TURN HOT PATH MICROBENCHMARKS
+"""
+Times every analysis and prompt-formatting function that runs on each chat
+turn, on a generated corpus of English, Roman Urdu and mixed messages of
+varying length plus a slice of crisis-positive messages.
+
+For each function it reports ns/op and the peak bytes allocated during one
+call (tracemalloc), and can save the numbers as a JSON baseline or compare
+against one.
+
+Usage:
+    python -m benchmarks.bench_hotpath                              # print results
+    python -m benchmarks.bench_hotpath --save baseline.json         # save a baseline
+    python -m benchmarks.bench_hotpath --compare baseline.json      # exit 1 on regressions
+    python -m benchmarks.bench_hotpath --compare baseline.json --threshold 0.10
+
+Timings are only comparable on the same machine and Python version; both
+are recorded in the baseline and a mismatch is warned about.
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+from utils.text_analysis import analyze_text
+from utils.sentiment import analyze_sentiment, format_sentiment_for_prompt
+from utils.crisis_detector import detect_crisis, format_crisis_for_prompt
+from utils.language_detector import detect_language, format_language_context
+from utils.emotional_memory import EmotionalTrajectory
+from benchmarks.bench_crisis import load_corpus as load_crisis_corpus
+
+DEFAULT_THRESHOLD = 0.15  # Fractional ns/op increase that counts as a regression
+
+# Building blocks for generated messages
+ENGLISH_OPENERS = ["I feel", "Honestly I am", "Today I was", "Lately I've been", "I think I'm", "My mind is"]
+ENGLISH_WORDS = [
+    "really", "so", "tired", "anxious", "okay", "overwhelmed", "happy", "stressed", "about", "work",
+    "exams", "family", "friends", "sleep", "and", "but", "because", "everything", "nothing", "better",
+    "worried", "lonely", "calm", "the", "future", "again", "today", "night", "pressure", "grateful"
+]
+ROMAN_URDU_OPENERS = ["main", "mujhe", "aaj", "yaar", "sach mein", "pata nahi"]
+ROMAN_URDU_WORDS = [
+    "bohot", "bht", "pareshan", "preshan", "udaas", "thak", "gaya", "hoon", "hai", "nahi", "nhi",
+    "lag", "raha", "kaam", "ghar", "walon", "ki", "wajah", "se", "neend", "aati", "dil", "acha",
+    "theek", "sab", "kuch", "mushkil", "tension", "zindagi", "kya", "karun"
+]
+LENGTHS = {"short": (3, 6), "medium": (10, 20), "long": (40, 80)}
+
+
+def generate_message(rng: random.Random, language: str, length: str) -> str:
+    low, high = LENGTHS[length]
+    count = rng.randint(low, high)
+    if language == "english":
+        words = [rng.choice(ENGLISH_OPENERS)] + [rng.choice(ENGLISH_WORDS) for _ in range(count)]
+    elif language == "roman_urdu":
+        words = [rng.choice(ROMAN_URDU_OPENERS)] + [rng.choice(ROMAN_URDU_WORDS) for _ in range(count)]
+    else:
+        words = [rng.choice(ROMAN_URDU_WORDS if i % 2 else ENGLISH_WORDS) for i in range(count)]
+    return " ".join(words) + rng.choice([".", "", "...", "?"])
+
+
+def generate_corpus(seed: int = 7, per_bucket: int = 30) -> Dict[str, List[str]]:
+    """
+    Deterministic corpus: per_bucket messages for every (language, length)
+    pair, plus the crisis-positive messages from the crisis corpus.
+
+    Returns:
+        Slice name ("english", "roman_urdu", "mixed", "crisis", "all") -> messages
+    """
+    rng = random.Random(seed)
+    corpus = {language: [] for language in ("english", "roman_urdu", "mixed")}
+    for language in corpus:
+        for length in LENGTHS:
+            corpus[language].extend(generate_message(rng, language, length) for _ in range(per_bucket))
+    corpus["crisis"] = [row["text"] for row in load_crisis_corpus() if row["severity"] != "none"]
+    corpus["all"] = [text for messages in corpus.values() for text in messages]
+    return corpus
+
+
+def format_turn_context(text: str) -> str:
+    """The per-turn analysis and prompt assembly from ChatPipeline.respond(), minus RAG and the LLM."""
+    analysis = analyze_text(text)
+    sentiment = analyze_sentiment(analysis)
+    crisis = detect_crisis(analysis)
+    language = detect_language(analysis)
+    parts = [format_language_context(text, language), format_sentiment_for_prompt(sentiment)]
+    crisis_context = format_crisis_for_prompt(crisis)
+    if crisis_context:
+        parts.append(crisis_context)
+    return "\n\n".join(parts) + f"\n\n[USER MESSAGE]: {text}"
+
+
+def build_cases(corpus: Dict[str, List[str]]) -> List[Tuple[str, Callable, List]]:
+    """(name, function, inputs) for each benchmark. Analyzer inputs are pre-analyzed, as in the app."""
+    texts = corpus["all"]
+    analyses = [analyze_text(text) for text in texts]
+    sentiments = [analyze_sentiment(analysis) for analysis in analyses]
+    crises = [detect_crisis(analysis) for analysis in analyses]
+    languages = [detect_language(analysis) for analysis in analyses]
+    crisis_analyses = [analyze_text(text) for text in corpus["crisis"]]
+
+    trajectory = EmotionalTrajectory()
+    for sentiment in sentiments[:20]:
+        trajectory.update(sentiment)
+
+    cases = [("analyze_text", analyze_text, texts)]
+    for language in ("english", "roman_urdu", "mixed"):
+        cases.append((f"analyze_text[{language}]", analyze_text, corpus[language]))
+    cases += [
+        ("analyze_sentiment", analyze_sentiment, analyses),
+        ("analyze_sentiment[raw str]", analyze_sentiment, texts),
+        ("detect_crisis", detect_crisis, analyses),
+        ("detect_crisis[crisis slice]", detect_crisis, crisis_analyses),
+        ("detect_language", detect_language, analyses),
+        ("format_language_context", lambda item: format_language_context(item[0], item[1]), list(zip(texts, languages))),
+        ("format_sentiment_for_prompt", format_sentiment_for_prompt, sentiments),
+        ("format_crisis_for_prompt", format_crisis_for_prompt, crises),
+        ("EmotionalTrajectory.update", trajectory.update, sentiments),
+        ("EmotionalTrajectory.summary", lambda _: trajectory.summary(), sentiments),
+        ("turn (analysis + prompt context)", format_turn_context, texts),
+    ]
+    return cases
+
+
+def time_ns_per_op(function: Callable, inputs: List, min_seconds: float) -> float:
+    """Best-of-3 mean ns/op, each run repeating the inputs for at least min_seconds / 3."""
+    best = float("inf")
+    for _ in range(3):
+        calls = 0
+        start = time.perf_counter_ns()
+        deadline = start + min_seconds / 3 * 1e9
+        while True:
+            for item in inputs:
+                function(item)
+            calls += len(inputs)
+            now = time.perf_counter_ns()
+            if now >= deadline:
+                break
+        best = min(best, (now - start) / calls)
+    return best
+
+
+def peak_bytes_per_op(function: Callable, inputs: List) -> float:
+    """Mean peak bytes allocated during a single call."""
+    tracemalloc.start()
+    total = 0
+    try:
+        for item in inputs:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            function(item)
+            total += tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+    return total / len(inputs)
+
+
+def run_suite(min_seconds: float, only: str = "") -> Dict:
+    corpus = generate_corpus()
+    results = {}
+    for name, function, inputs in build_cases(corpus):
+        if only and only not in name:
+            continue
+        function(inputs[0])  # Warm caches and lazy loads
+        results[name] = {
+            "ns_per_op": round(time_ns_per_op(function, inputs, min_seconds), 1),
+            "peak_bytes_per_op": round(peak_bytes_per_op(function, inputs), 1),
+            "inputs": len(inputs)
+        }
+    return {
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}",
+        "corpus_sizes": {name: len(messages) for name, messages in corpus.items()},
+        "results": results
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Names of benchmarks whose ns/op grew by more than threshold over the baseline."""
+    if (current["python"], current["machine"]) != (baseline.get("python"), baseline.get("machine")):
+        print(f"Warning: baseline is from {baseline.get('machine')} / Python {baseline.get('python')}, "
+              f"this run is {current['machine']} / Python {current['python']}")
+
+    regressions = []
+    print(f"\n{'benchmark':<36}{'baseline':>12}{'current':>12}{'change':>9}")
+    for name, result in current["results"].items():
+        old = baseline["results"].get(name)
+        if not old:
+            print(f"{name:<36}{'-':>12}{result['ns_per_op']:>12,.0f}{'new':>9}")
+            continue
+        change = result["ns_per_op"] / old["ns_per_op"] - 1
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{name:<36}{old['ns_per_op']:>12,.0f}{result['ns_per_op']:>12,.0f}{change:>+9.1%}{flag}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--save", metavar="PATH", help="Write results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="Compare with a saved baseline; exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Regression threshold as a fraction (default {DEFAULT_THRESHOLD})")
+    parser.add_argument("--min-seconds", type=float, default=0.6, help="Timing budget per benchmark")
+    parser.add_argument("--only", default="", help="Run only benchmarks whose name contains this")
+    args = parser.parse_args()
+
+    current = run_suite(args.min_seconds, args.only)
+    print(f"Corpus: {current['corpus_sizes']}")
+    print(f"{'benchmark':<36}{'ns/op':>12}{'peak B/op':>12}")
+    for name, result in current["results"].items():
+        print(f"{name:<36}{result['ns_per_op']:>12,.0f}{result['peak_bytes_per_op']:>12,.0f}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        print(f"\nSaved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"\nNo regressions above {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
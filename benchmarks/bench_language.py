@@ -0,0 +1,128 @@
+# LANGUAGE IDENTIFICATION BENCHMARK
+"""
+Compares the n-gram language identifier with the word-list heuristics it
+replaced, on a labelled corpus held out from the n-gram training text, then
+measures throughput of both.
+
+Usage:
+    python -m benchmarks.bench_language [--iterations 200]
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Tuple
+
+from utils.text_analysis import analyze_text
+from utils.language_detector import detect_language
+from utils.language_id import word_language_score
+from utils.lexicons import SHORT_ENGLISH_GREETINGS, SHORT_CLEAR_URDU
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "data", "language_corpus.jsonl")
+LANGUAGES = ("english", "roman_urdu", "mixed", "urdu", "hindi")
+
+LEGACY_ROMAN_URDU_PATTERNS = [
+    re.compile(r'\b(kya|kaise|kyun|kahan|kab)\b'),
+    re.compile(r'\b(hai|hain|tha|thi|ho)\b'),
+    re.compile(r'\b(mera|meri|tera|teri|aap)\b'),
+    re.compile(r'\b(nahi|nhi|mat|haan|han)\b'),
+    re.compile(r'\b(bohot|bahut|bohat|zyada)\b'),
+]
+
+
+def legacy_detect_language(text: str) -> Tuple[str, float]:
+    """The word-list and ratio heuristics detect_language used before the n-gram model."""
+    analysis = analyze_text(text)
+    words = analysis.words
+    if not analysis.normalized or not words:
+        return "english", 0.0
+    if len(words) <= 2:
+        if any(w in SHORT_ENGLISH_GREETINGS for w in words):
+            return "english", 0.9
+        if any(w in SHORT_CLEAR_URDU for w in words):
+            return "roman_urdu", 0.8
+        return "english", 0.7
+
+    roman_urdu_positions = analysis.positions.get("roman_urdu", set())
+    roman_urdu_count = len(roman_urdu_positions)
+    english_count = len(analysis.positions.get("english", set()) - roman_urdu_positions)
+    total_words = len(words)
+    if roman_urdu_count + english_count < total_words * 0.3:
+        for pattern in LEGACY_ROMAN_URDU_PATTERNS:
+            if pattern.search(analysis.normalized):
+                roman_urdu_count += 1
+
+    roman_urdu_ratio = roman_urdu_count / total_words
+    english_ratio = english_count / total_words
+    if roman_urdu_count >= 2 and english_count >= 2 and roman_urdu_ratio >= 0.2 and english_ratio >= 0.2:
+        return "mixed", min((roman_urdu_ratio + english_ratio) / 2 + 0.3, 1.0)
+    elif roman_urdu_ratio >= 0.3 or roman_urdu_count >= 2:
+        return "roman_urdu", min(roman_urdu_ratio + 0.3, 1.0)
+    elif english_ratio >= 0.5:
+        return "english", english_ratio
+    elif roman_urdu_count > english_count:
+        return "roman_urdu", roman_urdu_ratio + 0.2
+    return "english", 0.5
+
+
+def load_corpus(path: str = CORPUS_PATH) -> List[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def per_language_accuracy(detector: Callable, corpus: List[Dict]) -> Dict[str, float]:
+    totals, correct = Counter(), Counter()
+    for row in corpus:
+        totals[row["language"]] += 1
+        if detector(row["text"])[0] == row["language"]:
+            correct[row["language"]] += 1
+    accuracy = {language: correct[language] / totals[language] for language in totals}
+    accuracy["all"] = sum(correct.values()) / len(corpus)
+    return accuracy
+
+
+def messages_per_second(detector: Callable, texts: List[str], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for text in texts:
+            detector(text)
+    return iterations * len(texts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    texts = [row["text"] for row in corpus]
+
+    legacy = per_language_accuracy(legacy_detect_language, corpus)
+    ngram = per_language_accuracy(detect_language, corpus)
+    print(f"Corpus: {len(corpus)} messages")
+    print(f"{'Accuracy':<12}{'legacy':>10}{'n-gram':>10}")
+    for language in LANGUAGES + ("all",):
+        if language in ngram:
+            print(f"{language:<12}{legacy[language]:>10.3f}{ngram[language]:>10.3f}")
+
+    errors = [(row, detect_language(row["text"])) for row in corpus if detect_language(row["text"])[0] != row["language"]]
+    for row, (language, confidence) in errors:
+        print(f"  {row['text']!r}: expected {row['language']}, got {language} ({confidence})")
+
+    # Cold: every word scored from the tables. Warm: word scores cached, as in a long-running server.
+    word_language_score.cache_clear()
+    start = time.perf_counter()
+    for text in texts:
+        detect_language(text)
+    cold = len(texts) / (time.perf_counter() - start)
+    legacy_rate = messages_per_second(legacy_detect_language, texts, args.iterations)
+    warm = messages_per_second(detect_language, texts, args.iterations)
+    print(f"Throughput  legacy            {legacy_rate:>10,.0f} msgs/s")
+    print(f"            n-gram, cold      {cold:>10,.0f} msgs/s")
+    print(f"            n-gram, warm      {warm:>10,.0f} msgs/s")
+
+if __name__ == "__main__":
+    main()
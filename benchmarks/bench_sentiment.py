@@ -0,0 +1,102 @@
+# SENTIMENT SCORER BENCHMARK
+"""
+Compares the lexicon polarity scorer with the TextBlob implementation it
+replaced on a labelled English / Roman Urdu / mixed corpus, then times both.
+
+TextBlob is no longer a dependency of the app; install it to run this:
+    pip install textblob
+    python -m benchmarks.bench_sentiment [--iterations 2000]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List
+
+from utils.text_analysis import analyze_text
+from utils.sentiment import analyze_sentiment, score_polarity
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "data", "sentiment_corpus.jsonl")
+NEUTRAL_BAND = 0.1  # |polarity| below this counts as neutral
+
+
+def load_corpus(path: str = CORPUS_PATH) -> List[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def label_for(polarity: float) -> str:
+    if polarity <= -NEUTRAL_BAND:
+        return "negative"
+    if polarity >= NEUTRAL_BAND:
+        return "positive"
+    return "neutral"
+
+
+def accuracy(scorer: Callable[[str], float], rows: List[Dict]) -> float:
+    """Share of messages whose polarity falls on the labelled side."""
+    if not rows:
+        return 0.0
+    return sum(1 for row in rows if label_for(scorer(row["text"])) == row["label"]) / len(rows)
+
+
+def time_per_call(scorer: Callable, items: List, iterations: int) -> float:
+    """Mean nanoseconds per call."""
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        for item in items:
+            scorer(item)
+    return (time.perf_counter_ns() - start) / (iterations * len(items))
+
+
+def import_seconds(module: str) -> float:
+    """Cold import time of a module, measured in a fresh interpreter."""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(output.stdout.strip())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    try:
+        from textblob import TextBlob
+    except ImportError:
+        sys.exit("TextBlob is not installed: pip install textblob")
+
+    corpus = load_corpus()
+    texts = [row["text"] for row in corpus]
+
+    def textblob_polarity(text: str) -> float:
+        return TextBlob(text).sentiment.polarity
+
+    def lexicon_polarity(text: str) -> float:
+        return score_polarity(analyze_text(text))[0]
+
+    print(f"Corpus: {len(corpus)} messages")
+    print(f"{'Accuracy':<12}{'textblob':>10}{'lexicon':>10}")
+    for language in ("english", "roman_urdu", "mixed"):
+        rows = [row for row in corpus if row["language"] == language]
+        print(f"{language:<12}{accuracy(textblob_polarity, rows):>10.3f}{accuracy(lexicon_polarity, rows):>10.3f}")
+    print(f"{'all':<12}{accuracy(textblob_polarity, corpus):>10.3f}{accuracy(lexicon_polarity, corpus):>10.3f}")
+
+    # Per-call cost of the polarity step alone, and of the whole analyze_sentiment
+    # call on a shared TextAnalysis (how the app calls it each turn)
+    analyses = [analyze_text(text) for text in texts]
+    blob_ns = time_per_call(textblob_polarity, texts, args.iterations)
+    lexicon_ns = time_per_call(score_polarity, analyses, args.iterations)
+    sentiment_ns = time_per_call(analyze_sentiment, analyses, args.iterations)
+    print(f"Latency     textblob polarity   {blob_ns / 1000:.2f} µs/op")
+    print(f"            lexicon polarity    {lexicon_ns / 1000:.2f} µs/op ({blob_ns / lexicon_ns:.1f}x)")
+    print(f"            analyze_sentiment   {sentiment_ns / 1000:.2f} µs/op")
+    print(f"Import      textblob            {import_seconds('textblob') * 1000:.0f} ms")
+    print(f"            utils.sentiment     {import_seconds('utils.sentiment') * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
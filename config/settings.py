@@ -29,15 +29,125 @@ GROQ_API_KEY = get_api_key()
 GROQ_MODEL = "llama-3.3-70b-versatile"
 
 # Response generation settings
-MAX_TOKENS = 600
+MAX_TOKENS = 600  # Ceiling; the per-turn budget below is usually much lower
 TEMPERATURE = 0.8  # More natural, human-sounding variation
 
+# RESPONSE LENGTH POLICY
+# max_tokens is chosen per turn: calm check-ins get short budgets, heavy turns more room.
+RESPONSE_MIN_TOKENS = 120
+RESPONSE_TOKEN_BUDGETS = {       # Base budget by emotional intensity
+    "mild": 160,
+    "moderate": 280,
+    "severe": 400
+}
+RESPONSE_TOKENS_PER_WORD = 2     # Extra room per word of the user's message...
+RESPONSE_LENGTH_BONUS_CAP = 150  # ...up to this many tokens
+RESPONSE_MOOD_TOKEN_BONUS = {
+    "sad": 40,
+    "overthinking": 40,
+    "stressed": 20
+}
+RESPONSE_LANGUAGE_TOKEN_FACTOR = {  # Roman Urdu tokenizes into more pieces per word
+    "english": 1.0,
+    "mixed": 1.15,
+    "roman_urdu": 1.3,
+    "hindi": 1.3,      # Answered in Roman Urdu
+    "urdu": 1.6        # Urdu script splits into many more tokens still
+}
+
+# MODEL ROUTING
+# Light, low-risk turns go to a smaller, faster model.
+# Heavy emotional turns and anything with crisis language stay on GROQ_MODEL.
+ROUTING_ENABLED = True
+GROQ_FAST_MODEL = "llama-3.1-8b-instant"
+ROUTING_FAST_INTENSITIES = {"mild"}     # Emotional intensities allowed on the fast model
+ROUTING_LARGE_MODEL_MOODS = {"sad"}     # Moods that always get the large model
+
+# LLM REQUEST SCHEDULING
+# One scheduler is shared by every session in the server process.
+# Groq limits each model separately, so each model gets its own buckets.
+# Match these to your Groq plan's limits for GROQ_MODEL and GROQ_FAST_MODEL.
+GROQ_REQUESTS_PER_MINUTE = int(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30"))
+GROQ_TOKENS_PER_MINUTE = int(os.getenv("GROQ_TOKENS_PER_MINUTE", "12000"))
+GROQ_FAST_REQUESTS_PER_MINUTE = int(os.getenv("GROQ_FAST_REQUESTS_PER_MINUTE", "30"))
+GROQ_FAST_TOKENS_PER_MINUTE = int(os.getenv("GROQ_FAST_TOKENS_PER_MINUTE", "6000"))
+GROQ_RATE_LIMITS = {  # (requests/min, tokens/min) by model
+    GROQ_MODEL: (GROQ_REQUESTS_PER_MINUTE, GROQ_TOKENS_PER_MINUTE),
+    GROQ_FAST_MODEL: (GROQ_FAST_REQUESTS_PER_MINUTE, GROQ_FAST_TOKENS_PER_MINUTE)
+}
+LLM_QUEUE_TIMEOUT = 10  # Seconds a turn may wait for capacity (never past RESPONSE_DEADLINE)
+
+# Upper bound on how long anyone waits for a reply. Past this, the Groq call is
+# cancelled and a local fallback reply is composed from the knowledge base.
+RESPONSE_DEADLINE = 15  # Seconds per turn, including queue wait
+
+# Seconds of head start in the queue for each priority level
+LLM_PRIORITY_HEADSTART = {
+    "urgent": 15.0,    # Severe intensity or low-tier crisis language
+    "elevated": 5.0,   # Moderate intensity
+    "normal": 0.0
+}
+
+# OBSERVABILITY
+# Per-stage latency spans in ChatPipeline.respond(). Off by default: when off,
+# the spans are no-ops. SUKOON_TRACE_LOG appends one JSON line per turn
+# (stage timings and outcome only, never message content).
+TRACING_ENABLED = os.getenv("SUKOON_TRACING", "0") == "1"
+TRACE_LOG_PATH = os.getenv("SUKOON_TRACE_LOG", "")
+# Prometheus text metrics on http://<host>:<port>/metrics; 0 disables the endpoint.
+# Set the host to 0.0.0.0 for a load balancer or scraper on another machine.
+METRICS_PORT = int(os.getenv("SUKOON_METRICS_PORT", "0"))
+METRICS_HOST = os.getenv("SUKOON_METRICS_HOST", "127.0.0.1")
+
+# cProfile + tracemalloc captures of chat turns ("generate_response") and index_knowledge_base().
+# Captures hold code locations and timings only, never message content.
+# Aggregate them with: python -m utils.profiling collapse profiles/
+PROFILING_ENABLED = os.getenv("SUKOON_PROFILE", "0") == "1"                # Profile every call
+PROFILE_SAMPLE_RATE = float(os.getenv("SUKOON_PROFILE_SAMPLE_RATE", "0"))  # ...or this fraction of calls
+PROFILE_DIR = os.getenv("SUKOON_PROFILE_DIR", "./profiles")
+PROFILE_KEEP = 50  # Newest captures kept; older ones are deleted
+
+# SESSION MEMORY
+# Every session lives in the server process, so chat history is bounded per session.
+CONVERSATION_HISTORY_WINDOW = 10  # Past messages sent to the LLM (and kept for it)
+SESSION_LIVE_MESSAGES = 60        # Chat messages kept in memory; older ones are paged out to the conversation store
+SESSION_IDLE_TTL = 30 * 60        # Seconds without activity before a session is compacted...
+SESSION_IDLE_LIVE_MESSAGES = 6    # ...down to this many live messages
+SESSION_SWEEP_INTERVAL = 60       # Seconds between idle-session sweeps
+
+# CONVERSATION STORE
+# Every message is written by a background thread, never during a turn.
+# "sqlite" survives restarts; "memory" only survives reconnects.
+CONVERSATION_STORE = os.getenv("SUKOON_CONVERSATION_STORE", "sqlite")
+CONVERSATION_DB_PATH = os.getenv("SUKOON_CONVERSATION_DB", "./data/conversations.db")
+STORE_WRITE_BATCH = 200  # Most messages written per transaction
+CHAT_LIVE_MESSAGES = 20  # Recent messages drawn as chat bubbles; earlier ones are collapsed...
+CHAT_PAGE_SIZE = 20      # ...into pages of this many messages
+TRANSCRIPT_CACHE_PAGES = 8  # Rendered pages of earlier messages cached per session
+
+# HTTP API (python -m api.server)
+API_HOST = os.getenv("SUKOON_API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("SUKOON_API_PORT", "8000"))
+API_MAX_SESSIONS = 1000         # Conversations whose state each worker keeps in memory
+API_MAX_BODY_BYTES = 16 * 1024  # Largest request body accepted
+
 # RAG CONFIGURATION
 CHROMA_PERSIST_DIR = "./chroma_db"
+KNOWLEDGE_BASE_DIR = "./knowledge_base"
+# Prebuilt index (python -m rag.index_artifact build). Served read-only when
+# present; otherwise the knowledge base is indexed into Chroma at startup.
+INDEX_ARTIFACT_DIR = os.getenv("SUKOON_INDEX_DIR", "./index")
+# Without RAG, turns run on keyword analysis alone and the process still
+# reports ready. With this on, /ready stays 503 when RAG failed to load.
+RAG_REQUIRED = os.getenv("SUKOON_REQUIRE_RAG", "0") == "1"
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
 RAG_TOP_K = 2
 RAG_SIMILARITY_THRESHOLD = 0.5
 
+# Emotion scores from the RAG query embedding (cosine similarity to emotion centroids)
+EMOTION_SIMILARITY_THRESHOLD = 0.45  # A category or mood at least this close counts as present
+EMOTION_MARGIN = 0.05                # ...if it also beats the runner-up by this much
+
 # MOOD OPTIONS
 # Each mood affects how the AI responds to the user
 MOOD_OPTIONS = {
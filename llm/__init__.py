@@ -0,0 +1,31 @@
+from .scheduler import (
+    LLMScheduler,
+    SchedulerTimeout,
+    get_scheduler,
+    request_priority,
+    estimate_tokens
+)
+from .router import select_model, log_routing_decision
+from .client import DeadlineExceeded, complete_chat, complete_chat_for_session, complete_chat_with_deadline
+from .fallback import compose_fallback_response
+from .inflight import GenerationCancelled, inflight_generations
+from .budget import choose_max_tokens, record_completion_stats
+
+__all__ = [
+    "LLMScheduler",
+    "SchedulerTimeout",
+    "get_scheduler",
+    "request_priority",
+    "estimate_tokens",
+    "select_model",
+    "log_routing_decision",
+    "DeadlineExceeded",
+    "complete_chat",
+    "complete_chat_for_session",
+    "complete_chat_with_deadline",
+    "compose_fallback_response",
+    "GenerationCancelled",
+    "inflight_generations",
+    "choose_max_tokens",
+    "record_completion_stats"
+]
@@ -0,0 +1,74 @@
+# RESPONSE LENGTH POLICY
+"""
+Chooses the completion token budget (max_tokens) for each turn.
+
+The system prompt asks Sukoon to never overtalk, and generation time
+grows with output length. A calm one-line check-in gets a short budget;
+a long, heavy message gets more room. Finish reasons and budget usage are
+recorded so the numbers in config/settings.py can be tuned from data.
+"""
+
+from typing import Dict, Optional
+
+from config.settings import (
+    MAX_TOKENS,
+    RESPONSE_MIN_TOKENS,
+    RESPONSE_TOKEN_BUDGETS,
+    RESPONSE_TOKENS_PER_WORD,
+    RESPONSE_LENGTH_BONUS_CAP,
+    RESPONSE_MOOD_TOKEN_BONUS,
+    RESPONSE_LANGUAGE_TOKEN_FACTOR
+)
+from utils import metrics
+
+BUDGET_USAGE = metrics.histogram(
+    "llm_completion_budget_ratio",
+    "Completion tokens used as a fraction of max_tokens",
+    buckets=(0.25, 0.5, 0.75, 0.9, 1.0)
+)
+TRUNCATED = metrics.counter("llm_truncated_total", "Replies cut off by max_tokens")
+FINISHED = metrics.labeled_counter("llm_finish_total", "Completed replies by finish reason", "finish_reason")
+
+
+def choose_max_tokens(message: str, sentiment: Dict, mood_key: Optional[str] = None,
+                      language: str = "english") -> int:
+    """
+    Pick max_tokens for this turn.
+
+    Args:
+        message: The user's message
+        sentiment: Result from analyze_sentiment()
+        mood_key: The session's selected mood key, if any
+        language: Language from detect_language()
+
+    Returns:
+        Token budget between RESPONSE_MIN_TOKENS and MAX_TOKENS
+    """
+    budget = RESPONSE_TOKEN_BUDGETS.get(sentiment["emotional_intensity"], MAX_TOKENS)
+
+    # Longer messages deserve longer replies, up to a point
+    budget += min(len(message.split()) * RESPONSE_TOKENS_PER_WORD, RESPONSE_LENGTH_BONUS_CAP)
+    budget += RESPONSE_MOOD_TOKEN_BONUS.get(mood_key, 0)
+
+    # Roman Urdu spends more tokens per word than English
+    budget = int(budget * RESPONSE_LANGUAGE_TOKEN_FACTOR.get(language, 1.0))
+
+    return max(RESPONSE_MIN_TOKENS, min(budget, MAX_TOKENS))
+
+
+def record_completion_stats(completion, max_tokens: int, intensity: str):
+    """
+    Record finish reason and budget usage for a completed reply, and log them.
+
+    Never logs message content.
+    """
+    finish_reason = completion.choices[0].finish_reason or "unknown"
+    FINISHED.inc(finish_reason)
+    if finish_reason == "length":
+        TRUNCATED.inc()
+
+    used = completion.usage.completion_tokens if completion.usage else None
+    if used is not None:
+        BUDGET_USAGE.observe(used / max_tokens)
+
+    print(f"[length] intensity={intensity} budget={max_tokens} used={used} finish={finish_reason}")
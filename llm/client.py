@@ -0,0 +1,201 @@
+# DEADLINE-BOUNDED GROQ CALLS
+"""
+Async Groq chat completion bounded by a per-turn deadline.
+
+The deadline covers both the wait for scheduler capacity and the
+provider call itself. When it is missed the in-flight HTTP request is
+cancelled rather than left running in the background.
+
+Replies are streamed so time to first token can be measured; the chunks
+are assembled back into one ChatCompletion for the caller.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from groq import AsyncGroq
+from groq.types import CompletionUsage
+from groq.types.chat import ChatCompletion, ChatCompletionMessage
+from groq.types.chat.chat_completion import Choice
+
+from config.settings import GROQ_API_KEY, LLM_QUEUE_TIMEOUT, TEMPERATURE
+from utils import metrics, tracing
+from .scheduler import SchedulerTimeout, get_scheduler, estimate_tokens
+from .inflight import GenerationCancelled, inflight_generations, watch_for_cancellation
+
+TURNS = metrics.counter("llm_turns_total", "Turns that attempted an LLM reply")
+DEADLINE_MISSES = metrics.counter("llm_deadline_misses_total", "Turns that missed the response deadline")
+GENERATION_TIME = metrics.histogram("llm_generation_seconds", "Groq call duration, excluding queue wait")
+FIRST_TOKEN_TIME = metrics.histogram("llm_time_to_first_token_seconds", "Groq time to first streamed token")
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a turn cannot be answered before its deadline."""
+
+
+async def _read_stream(stream, model: str, started: float) -> ChatCompletion:
+    """Collect a streamed reply into a ChatCompletion, recording time to first token."""
+    parts = []
+    finish_reason = None
+    usage: Optional[CompletionUsage] = None
+    completion_id = ""
+    first_token = True
+    async for chunk in stream:
+        completion_id = chunk.id
+        if chunk.choices:
+            choice = chunk.choices[0]
+            if choice.delta.content:
+                if first_token:
+                    first_token = False
+                    ttft = time.monotonic() - started
+                    FIRST_TOKEN_TIME.observe(ttft)
+                    tracing.record("llm_first_token", ttft)
+                parts.append(choice.delta.content)
+            finish_reason = choice.finish_reason or finish_reason
+        # Groq reports usage on the final chunk, under x_groq
+        chunk_usage = chunk.usage or (chunk.x_groq.usage if chunk.x_groq else None)
+        if chunk_usage:
+            usage = chunk_usage
+
+    return ChatCompletion.model_construct(
+        id=completion_id,
+        object="chat.completion",
+        created=int(time.time()),
+        model=model,
+        choices=[Choice.model_construct(
+            index=0,
+            finish_reason=finish_reason,
+            logprobs=None,
+            message=ChatCompletionMessage.model_construct(role="assistant", content="".join(parts))
+        )],
+        usage=usage
+    )
+
+
+async def complete_chat(messages: List[Dict], model: str, max_tokens: int,
+                        priority: str, deadline: float):
+    """
+    Run one chat completion before `deadline` (a time.monotonic() value).
+
+    Args:
+        messages: Chat messages including the system prompt
+        model: Groq model id
+        max_tokens: Completion token budget
+        priority: Scheduler priority from request_priority()
+        deadline: Absolute monotonic time by which the reply must arrive
+
+    Returns:
+        The Groq chat completion
+
+    Raises:
+        DeadlineExceeded: If queueing or generation ran past the deadline
+    """
+    scheduler = get_scheduler()
+    estimated_tokens = estimate_tokens(messages, max_tokens)
+
+    remaining = deadline - time.monotonic()
+    cancel_event = threading.Event()
+    queued = time.perf_counter()
+    try:
+        await asyncio.to_thread(
+            scheduler.acquire,
+            model,
+            priority,
+            estimated_tokens,
+            max(0.0, min(LLM_QUEUE_TIMEOUT, remaining)),
+            cancel_event
+        )
+    except SchedulerTimeout as e:
+        raise DeadlineExceeded(str(e)) from e
+    except asyncio.CancelledError:
+        # The waiting thread can't be cancelled directly; release its queue slot
+        cancel_event.set()
+        scheduler.wake()
+        raise
+    finally:
+        tracing.record("llm_queue", time.perf_counter() - queued)
+
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        # Capacity was granted but nothing was sent, so give the tokens back
+        scheduler.settle(model, estimated_tokens, 0)
+        raise DeadlineExceeded("Deadline reached while queued")
+
+    started = time.monotonic()
+    async with AsyncGroq(api_key=GROQ_API_KEY, max_retries=0) as client:
+        async def generate():
+            stream = await client.chat.completions.create(
+                messages=messages,
+                model=model,
+                max_tokens=max_tokens,
+                temperature=TEMPERATURE,
+                stream=True
+            )
+            return await _read_stream(stream, model, started)
+
+        try:
+            completion = await asyncio.wait_for(generate(), timeout=remaining)
+        except asyncio.TimeoutError as e:
+            raise DeadlineExceeded(f"Generation took longer than {remaining:.1f}s") from e
+        finally:
+            GENERATION_TIME.observe(time.monotonic() - started)
+            tracing.record("llm_generation", time.monotonic() - started)
+
+    if completion.usage:
+        scheduler.settle(model, estimated_tokens, completion.usage.total_tokens)
+    return completion
+
+
+async def complete_chat_for_session(messages: List[Dict], model: str, max_tokens: int,
+                                    priority: str, deadline: float, session_id: Optional[str] = None,
+                                    should_cancel: Optional[Callable[[], Optional[str]]] = None):
+    """
+    complete_chat() as the session's in-flight generation, for callers already on an event loop.
+
+    Args:
+        session_id: Session the turn belongs to. A newer generation for the
+            same session cancels this one.
+        should_cancel: Polled while generating; returns a reason string when
+            the reply is no longer wanted (user sent again, tab closed)
+
+    Raises:
+        DeadlineExceeded: If the deadline was missed
+        GenerationCancelled: If the generation was superseded or abandoned
+    """
+    TURNS.inc()
+    # Its own task, so cancelling it through the registry leaves the caller running
+    generation = asyncio.ensure_future(complete_chat(messages, model, max_tokens, priority, deadline))
+    watcher = None
+    if session_id:
+        inflight_generations.begin(session_id, generation)
+        if should_cancel:
+            watcher = asyncio.create_task(watch_for_cancellation(inflight_generations, session_id, should_cancel))
+    try:
+        return await generation
+    except DeadlineExceeded:
+        DEADLINE_MISSES.inc()
+        raise
+    finally:
+        if watcher:
+            watcher.cancel()
+        if session_id:
+            reason = inflight_generations.end(session_id, generation)
+            if reason:
+                raise GenerationCancelled(reason)
+
+
+def complete_chat_with_deadline(messages: List[Dict], model: str, max_tokens: int,
+                                priority: str, deadline: float, session_id: Optional[str] = None,
+                                should_cancel: Optional[Callable[[], Optional[str]]] = None):
+    """
+    Synchronous complete_chat_for_session(), for use from a Streamlit script.
+
+    Raises:
+        DeadlineExceeded: If the deadline was missed
+        GenerationCancelled: If the generation was superseded or abandoned
+    """
+    return asyncio.run(complete_chat_for_session(
+        messages, model, max_tokens, priority, deadline, session_id, should_cancel
+    ))
@@ -0,0 +1,76 @@
+# LOCAL FALLBACK RESPONDER
+"""
+Composes a warm reply without the LLM.
+
+Used when Groq misses the turn deadline, is rate limited, or fails.
+The reply is built from an opener (the mood's conversation starter at
+the start of a conversation, a continuation line later on), the most
+relevant knowledge base passage, and a coping exercise that suits the
+mood, so the person still gets something genuinely supportive instead
+of an error message.
+"""
+
+from typing import Dict, List, Optional
+
+from prompts.templates import CONVERSATION_STARTERS
+from utils import (
+    get_breathing_exercise,
+    format_breathing_exercise,
+    get_grounding_exercise,
+    format_grounding_exercise,
+    get_cbt_technique,
+    format_cbt_technique,
+    get_journal_prompt,
+    format_journal_prompt,
+    get_meditation,
+    format_meditation,
+    metrics
+)
+
+FALLBACKS = metrics.labeled_counter("llm_fallbacks_total", "Turns answered by the local fallback responder", "reason")
+
+DEFAULT_OPENING = "I'm right here with you. 💙 Things are a little slow on my side at the moment, but I don't want to leave you waiting."
+# Mid-conversation the starters would read as a fresh greeting, so this is used instead
+CONTINUATION_OPENING = "I'm still here, and I heard you. 💙 I'm a little slow to find my words right now, but I don't want to leave you waiting."
+
+# Exercise offered per mood. These follow the tone guidance in MOOD_PROMPTS:
+# anchor the anxious, lighten the load for the stressed, step back from the
+# spiral for overthinkers, and simply make space for sadness.
+MOOD_EXERCISES = {
+    "sad": lambda: format_journal_prompt(get_journal_prompt()),
+    "anxious": lambda: format_breathing_exercise(get_breathing_exercise("box")),
+    "stressed": lambda: format_grounding_exercise(get_grounding_exercise()),
+    "overthinking": lambda: format_cbt_technique(get_cbt_technique()),
+    "calm": lambda: format_meditation(get_meditation())
+}
+
+
+def compose_fallback_response(mood_key: Optional[str], rag_results: Optional[List[Dict]] = None,
+                              reason: str = "deadline", continuing: bool = False) -> str:
+    """
+    Build a supportive reply from local content only.
+
+    Args:
+        mood_key: The session's selected mood key, if any
+        rag_results: Results from WellnessRetriever.retrieve(), best match first
+        reason: Why the fallback was used (counted in metrics, never shown)
+        continuing: The conversation already has earlier turns
+
+    Returns:
+        Markdown reply for the chat
+    """
+    FALLBACKS.inc(reason)
+
+    if continuing:
+        parts = [CONTINUATION_OPENING]
+    else:
+        parts = [CONVERSATION_STARTERS.get(mood_key, DEFAULT_OPENING)]
+
+    if rag_results:
+        parts.append(rag_results[0]["content"])
+
+    exercise = MOOD_EXERCISES.get(mood_key, lambda: format_breathing_exercise(get_breathing_exercise()))
+    parts.append("If it feels right, here's something small we can try together while you're here:")
+    parts.append(exercise())
+
+    return "\n\n".join(parts)
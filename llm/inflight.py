@@ -0,0 +1,110 @@
+# IN-FLIGHT GENERATION TRACKING
+"""
+Tracks the running generation for each session so it can be cancelled.
+
+Streamlit reruns the whole script when the user sends another message or
+leaves, but a Groq request that is already running would otherwise carry
+on to completion, spending rate-limit budget on a reply nobody will read.
+"""
+
+import asyncio
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from utils import metrics
+
+CANCEL_POLL_INTERVAL = 0.25  # Seconds between checks of the session's cancel condition
+
+CANCELLED = metrics.labeled_counter("llm_cancelled_total", "Generations cancelled before completion", "reason")
+
+
+class GenerationCancelled(Exception):
+    """Raised when a generation was cancelled because it is no longer needed."""
+
+    def __init__(self, reason: str):
+        super().__init__(f"Generation cancelled ({reason})")
+        self.reason = reason
+
+
+class InflightRegistry:
+    def __init__(self):
+        """
+        Initialize the registry.
+
+        Maps session id -> (event loop, task) for the generation currently running.
+        """
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Tuple[asyncio.AbstractEventLoop, asyncio.Task]] = {}
+        self._reasons: Dict[int, str] = {}
+
+    def begin(self, session_id: str, task: asyncio.Task):
+        """Register a generation, cancelling any earlier one it supersedes."""
+        loop = task.get_loop()
+        with self._lock:
+            previous = self._inflight.get(session_id)
+            self._inflight[session_id] = (loop, task)
+        if previous and previous[1] is not task:
+            self._cancel_task(previous, "superseded")
+
+    def end(self, session_id: str, task: asyncio.Task) -> Optional[str]:
+        """
+        Unregister a finished generation.
+
+        Returns:
+            The cancellation reason if the task was cancelled through the registry
+        """
+        with self._lock:
+            current = self._inflight.get(session_id)
+            if current and current[1] is task:
+                del self._inflight[session_id]
+            return self._reasons.pop(id(task), None)
+
+    def cancel(self, session_id: str, reason: str) -> bool:
+        """
+        Cancel the session's in-flight generation, if there is one.
+
+        Args:
+            session_id: Session whose generation should stop
+            reason: Why, e.g. "superseded" or "disconnected"
+
+        Returns:
+            True if a generation was cancelled
+        """
+        with self._lock:
+            entry = self._inflight.get(session_id)
+        if not entry:
+            return False
+        return self._cancel_task(entry, reason)
+
+    def _cancel_task(self, entry: Tuple[asyncio.AbstractEventLoop, asyncio.Task], reason: str) -> bool:
+        loop, task = entry
+        with self._lock:
+            if id(task) in self._reasons or task.done():
+                return False
+            self._reasons[id(task)] = reason
+        CANCELLED.inc(reason)
+        # Tasks must be cancelled from their own loop's thread
+        loop.call_soon_threadsafe(task.cancel)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+
+async def watch_for_cancellation(registry: InflightRegistry, session_id: str,
+                                 should_cancel: Callable[[], Optional[str]]):
+    """
+    Poll `should_cancel` and cancel the session's generation when it returns a reason.
+
+    Runs alongside the generation on the same event loop.
+    """
+    while True:
+        await asyncio.sleep(CANCEL_POLL_INTERVAL)
+        reason = should_cancel()
+        if reason:
+            registry.cancel(session_id, reason)
+            return
+
+
+# SHARED INSTANCE
+inflight_generations = InflightRegistry()
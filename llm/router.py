@@ -0,0 +1,65 @@
+# MODEL ROUTING
+"""
+Chooses which Groq model answers a turn.
+
+Greetings and calm small talk don't need a 70B model, and a smaller one
+answers several times faster. Anything emotionally heavy or carrying any
+crisis language stays on the large model.
+"""
+
+from typing import Dict, Optional
+
+from config.settings import (
+    GROQ_MODEL,
+    GROQ_FAST_MODEL,
+    ROUTING_ENABLED,
+    ROUTING_FAST_INTENSITIES,
+    ROUTING_LARGE_MODEL_MOODS
+)
+from utils import metrics
+
+ROUTED = metrics.labeled_counter("llm_routed_total", "Turns routed to each model tier", "tier")
+
+
+def select_model(sentiment: Dict, crisis: Dict, mood_key: Optional[str] = None) -> Dict:
+    """
+    Pick the model for this turn.
+
+    Args:
+        sentiment: Result from analyze_sentiment()
+        crisis: Result from detect_crisis()
+        mood_key: The session's selected mood key, if any
+
+    Returns:
+        Dictionary containing:
+        - model: Groq model id to use
+        - tier: "fast" or "large"
+        - reason: Short explanation for logs
+    """
+    reason = None
+    if not ROUTING_ENABLED:
+        reason = "routing disabled"
+    elif crisis["severity"] != "none":
+        reason = f"crisis severity {crisis['severity']}"
+    elif sentiment["emotional_intensity"] not in ROUTING_FAST_INTENSITIES:
+        reason = f"{sentiment['emotional_intensity']} intensity"
+    elif sentiment["needs_support"]:
+        reason = "needs support"
+    elif mood_key in ROUTING_LARGE_MODEL_MOODS:
+        reason = f"mood {mood_key}"
+
+    if reason:
+        ROUTED.inc("large")
+        return {"model": GROQ_MODEL, "tier": "large", "reason": reason}
+
+    ROUTED.inc("fast")
+    return {
+        "model": GROQ_FAST_MODEL,
+        "tier": "fast",
+        "reason": f"{sentiment['emotional_intensity']} intensity, no crisis, mood {mood_key or 'unset'}"
+    }
+
+
+def log_routing_decision(decision: Dict):
+    """Log the routing decision for this turn (never includes message content)."""
+    print(f"[routing] tier={decision['tier']} model={decision['model']} reason={decision['reason']}")
@@ -0,0 +1,251 @@
+# LLM REQUEST SCHEDULER
+"""
+Process-wide scheduler for Groq requests.
+
+Every Streamlit session runs in the same server process, so without
+coordination a burst of users trips the provider's rate limits and turns
+fail at random. The scheduler queues requests behind two token buckets
+(requests/min and tokens/min) and hands out capacity in priority order.
+Groq limits each model separately, so every model has its own buckets and
+queue: a backlog on the large model never holds up turns routed to the
+fast one.
+
+Priorities are expressed as a head start in seconds: a request's place in
+the queue is its arrival time minus its head start. People who are
+struggling the most jump ahead, but a calm turn that has waited longer
+than the head start is still served — nobody starves under peak load.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import (
+    GROQ_REQUESTS_PER_MINUTE,
+    GROQ_TOKENS_PER_MINUTE,
+    GROQ_RATE_LIMITS,
+    LLM_PRIORITY_HEADSTART
+)
+from utils import metrics
+
+# PRIORITY LEVELS
+PRIORITY_URGENT = "urgent"      # Severe emotional intensity or low-tier crisis language
+PRIORITY_ELEVATED = "elevated"  # Moderate emotional intensity
+PRIORITY_NORMAL = "normal"      # Everything else
+
+QUEUE_WAIT = metrics.histogram(
+    "llm_queue_wait_seconds",
+    "Time a turn waited for Groq rate-limit capacity"
+)
+QUEUE_DEPTH = metrics.gauge("llm_queue_depth", "Turns currently waiting for Groq capacity")
+QUEUE_TIMEOUTS = metrics.counter("llm_queue_timeouts_total", "Turns that gave up waiting for capacity")
+RATE_LIMITED = metrics.counter("llm_rate_limited_total", "Provider 429 responses despite scheduling")
+
+
+class SchedulerTimeout(Exception):
+    """Raised when a request cannot get capacity before its timeout."""
+
+
+class SchedulerCancelled(Exception):
+    """Raised when a queued request is cancelled before it gets capacity."""
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at a fixed rate."""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+            self.updated_at = now
+
+    def time_until(self, amount: float, now: float) -> float:
+        """Seconds until `amount` tokens are available (0 if available now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_per_second
+
+    def consume(self, amount: float, now: float):
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, delta: float):
+        """Refund (positive) or charge (negative) tokens after the fact."""
+        self.tokens = min(self.capacity, self.tokens + delta)
+
+
+def request_priority(sentiment: Dict, crisis: Dict) -> str:
+    """
+    Decide how urgently a turn should be served.
+
+    Args:
+        sentiment: Result from analyze_sentiment()
+        crisis: Result from detect_crisis()
+
+    Returns:
+        One of PRIORITY_URGENT, PRIORITY_ELEVATED, PRIORITY_NORMAL
+    """
+    if sentiment["emotional_intensity"] == "severe" or crisis["severity"] == "low":
+        return PRIORITY_URGENT
+    if sentiment["emotional_intensity"] == "moderate":
+        return PRIORITY_ELEVATED
+    return PRIORITY_NORMAL
+
+
+def estimate_tokens(messages: List[Dict], max_tokens: int) -> int:
+    """Rough token estimate (~4 characters per token) plus the completion budget."""
+    prompt_chars = sum(len(message["content"]) for message in messages)
+    return prompt_chars // 4 + max_tokens
+
+
+class _ModelLane:
+    """Rate-limit state for one model: its buckets, its queue and any 429 pause."""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.request_bucket = TokenBucket(requests_per_minute, requests_per_minute / 60.0)
+        self.token_bucket = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0)
+        self.queue: List = []
+        self.paused_until = 0.0
+
+
+class LLMScheduler:
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int,
+                 headstart: Optional[Dict[str, float]] = None,
+                 model_limits: Optional[Dict[str, Tuple[int, int]]] = None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            requests_per_minute: Provider request limit for models not in model_limits
+            tokens_per_minute: Provider token limit for models not in model_limits
+            headstart: Seconds of queue priority per priority level
+            model_limits: (requests/min, tokens/min) by model id
+        """
+        self.default_limits = (requests_per_minute, tokens_per_minute)
+        self.model_limits = model_limits or {}
+        self.headstart = headstart or {}
+        self._condition = threading.Condition()
+        self._lanes: Dict[str, _ModelLane] = {}
+        self._sequence = itertools.count()
+
+    def _lane(self, model: str) -> _ModelLane:
+        """The model's lane, created on first use. Call with the condition held."""
+        lane = self._lanes.get(model)
+        if lane is None:
+            lane = self._lanes[model] = _ModelLane(*self.model_limits.get(model, self.default_limits))
+        return lane
+
+    def acquire(self, model: str, priority: str = PRIORITY_NORMAL, estimated_tokens: int = 0,
+                timeout: Optional[float] = None,
+                cancel_event: Optional[threading.Event] = None) -> float:
+        """
+        Block until this request may be sent to the provider.
+
+        Args:
+            model: Groq model id the request is for
+            priority: Priority level from request_priority()
+            estimated_tokens: Expected prompt + completion tokens
+            timeout: Maximum seconds to wait (None waits forever)
+            cancel_event: Set (then call wake()) to give up the place in the queue
+
+        Returns:
+            Seconds spent waiting in the queue
+
+        Raises:
+            SchedulerTimeout: If capacity was not granted in time
+            SchedulerCancelled: If cancel_event was set while waiting
+        """
+        enqueued_at = time.monotonic()
+        deadline = None if timeout is None else enqueued_at + timeout
+        ticket = (enqueued_at - self.headstart.get(priority, 0.0), next(self._sequence))
+
+        with self._condition:
+            lane = self._lane(model)
+            heapq.heappush(lane.queue, ticket)
+            QUEUE_DEPTH.inc()
+            try:
+                while True:
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise SchedulerCancelled("Request cancelled while queued")
+                    now = time.monotonic()
+                    wait = None
+                    if lane.queue[0] == ticket:
+                        wait = max(
+                            lane.paused_until - now,
+                            lane.request_bucket.time_until(1, now),
+                            lane.token_bucket.time_until(estimated_tokens, now)
+                        )
+                        if wait <= 0:
+                            lane.request_bucket.consume(1, now)
+                            lane.token_bucket.consume(estimated_tokens, now)
+                            heapq.heappop(lane.queue)
+                            self._condition.notify_all()
+                            waited = now - enqueued_at
+                            QUEUE_WAIT.observe(waited)
+                            return waited
+
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            QUEUE_TIMEOUTS.inc()
+                            raise SchedulerTimeout(f"No LLM capacity for {model} after {now - enqueued_at:.1f}s")
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._condition.wait(wait)
+            finally:
+                QUEUE_DEPTH.dec()
+                if ticket in lane.queue:
+                    lane.queue.remove(ticket)
+                    heapq.heapify(lane.queue)
+                    self._condition.notify_all()
+
+    def settle(self, model: str, estimated_tokens: int, actual_tokens: int):
+        """Correct the model's token bucket once the real usage is known."""
+        with self._condition:
+            self._lane(model).token_bucket.adjust(estimated_tokens - actual_tokens)
+            self._condition.notify_all()
+
+    def wake(self):
+        """Wake all waiters so they re-check their cancel events."""
+        with self._condition:
+            self._condition.notify_all()
+
+    def pause(self, model: str, seconds: float):
+        """Stop dispatching to a model for a while, e.g. after the provider returns 429."""
+        RATE_LIMITED.inc()
+        with self._condition:
+            lane = self._lane(model)
+            lane.paused_until = max(lane.paused_until, time.monotonic() + seconds)
+            self._condition.notify_all()
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(lane.queue) for lane in self._lanes.values())
+
+
+# SHARED INSTANCE
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    """Get the process-wide scheduler, creating it from settings on first use."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler(
+                GROQ_REQUESTS_PER_MINUTE,
+                GROQ_TOKENS_PER_MINUTE,
+                headstart=LLM_PRIORITY_HEADSTART,
+                model_limits=GROQ_RATE_LIMITS
+            )
+        return _scheduler
@@ -0,0 +1,14 @@
+from .session import ChatSession
+from .chat import ChatPipeline, get_chat_pipeline
+from .warmup import start_warmup, run_warmup, is_ready, wait_until_ready, warmup_status
+
+__all__ = [
+    "ChatSession",
+    "ChatPipeline",
+    "get_chat_pipeline",
+    "start_warmup",
+    "run_warmup",
+    "is_ready",
+    "wait_until_ready",
+    "warmup_status"
+]
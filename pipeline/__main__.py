@@ -0,0 +1,44 @@
+"""
+    python -m pipeline warmup                  # warm up in the foreground, print stage timings
+    python -m pipeline serve-app [options]     # warm up in the background and run the Streamlit app
+
+serve-app passes any further options to `streamlit run` (e.g.
+--server.port 8501). Streamlit only runs app.py when a session connects,
+so launching through here is what starts warmup at process start; with
+SUKOON_METRICS_PORT set, the load balancer can poll /ready on it.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from config.settings import METRICS_PORT, METRICS_HOST
+from utils import metrics
+from pipeline import run_warmup, start_warmup
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m pipeline", description="Warm up the chat pipeline.")
+    parser.add_argument("command", choices=["warmup", "serve-app"])
+    args, streamlit_options = parser.parse_known_args()
+
+    if args.command == "warmup":
+        status = run_warmup()
+        print(json.dumps(status, indent=2))
+        sys.exit(1 if status["error"] else 0)
+
+    start_warmup()
+    if METRICS_PORT:
+        metrics.start_metrics_server(METRICS_PORT, METRICS_HOST)
+
+    # Same process, so app.py sees this warmup (and the metrics server) already running
+    from streamlit.web import cli as streamlit_cli
+    sys.argv = ["streamlit", "run", APP_PATH, *streamlit_options]
+    sys.exit(streamlit_cli.main())
+
+
+if __name__ == "__main__":
+    main()
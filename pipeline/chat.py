@@ -0,0 +1,381 @@
+# HEADLESS CHAT PIPELINE
+"""
+One chat turn, independent of any UI.
+
+    pipeline = get_chat_pipeline()
+    session = ChatSession(mood_key="anxious")
+    result = pipeline.respond(session, "I can't stop worrying about exams")
+    result = await pipeline.respond_async(session, "...")   # from an event loop
+
+A turn analyzes the message (keywords, embeddings, crisis screening,
+language), retrieves knowledge-base context, and asks the LLM within the
+response deadline, falling back to a local reply when it can't. The
+Streamlit app and the HTTP API are both clients of this class.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from groq import RateLimitError
+
+from config.settings import (
+    GROQ_API_KEY,
+    RESPONSE_DEADLINE,
+    CONVERSATION_HISTORY_WINDOW,
+    CHROMA_PERSIST_DIR,
+    KNOWLEDGE_BASE_DIR,
+    INDEX_ARTIFACT_DIR
+)
+from prompts.templates import SYSTEM_PROMPT, MOOD_PROMPTS
+from utils import (
+    analyze_text,
+    analyze_sentiment,
+    apply_emotion_scores,
+    format_sentiment_for_prompt,
+    detect_crisis,
+    get_crisis_response,
+    format_crisis_for_prompt,
+    detect_language,
+    format_language_context
+)
+from utils import metrics, tracing, profiling
+from llm import (
+    DeadlineExceeded,
+    GenerationCancelled,
+    get_scheduler,
+    request_priority,
+    select_model,
+    log_routing_decision,
+    complete_chat_for_session,
+    complete_chat_with_deadline,
+    compose_fallback_response,
+    choose_max_tokens,
+    record_completion_stats
+)
+from .session import ChatSession
+
+API_KEY_MESSAGE = "⚠️ **API Key Required**: Please add your Groq API key to the `.env` file. You can get a free key at [Groq Console](https://console.groq.com). 💙"
+
+CRISIS_SHORT_CIRCUITS = metrics.counter("turn_crisis_short_circuits_total", "Turns answered with the crisis response")
+
+
+class ChatPipeline:
+    def __init__(self, retriever=None):
+        """
+        Args:
+            retriever: WellnessRetriever for embeddings and knowledge-base
+                context; without one, turns use keyword analysis only
+        """
+        self.retriever = retriever
+
+    def respond(self, session: ChatSession, user_message: str, session_id: Optional[str] = None,
+                should_cancel: Optional[Callable[[], Optional[str]]] = None) -> Dict:
+        """
+        Answer one message, updating the session.
+
+        Args:
+            session: The conversation's state
+            user_message: The user's input message
+            session_id: Key for in-flight generations; a newer turn with the
+                same key cancels this one
+            should_cancel: Polled during generation; returns a reason string
+                when the reply is no longer wanted
+
+        Returns:
+            Dict with "response" (empty when cancelled), "outcome" ("llm",
+            "crisis", "cancelled", "no_api_key" or "fallback_<reason>") and
+            "crisis_mode"
+        """
+        trace = tracing.begin_turn()
+        try:
+            with session.lock, profiling.profile("generate_response"):
+                response, outcome = self._respond(session, user_message, session_id, should_cancel)
+            tracing.annotate(outcome=outcome)
+            return {"response": response, "outcome": outcome, "crisis_mode": session.crisis_mode}
+        finally:
+            tracing.end_turn(trace)
+
+    async def respond_async(self, session: ChatSession, user_message: str, session_id: Optional[str] = None,
+                            should_cancel: Optional[Callable[[], Optional[str]]] = None) -> Dict:
+        """
+        respond() for event loops.
+
+        Only the CPU-bound analysis runs on a worker thread; the LLM call is
+        awaited on the loop, so a slow generation holds no thread. Cancelling
+        the awaiting task also cancels the generation.
+        """
+        trace = tracing.begin_turn()
+        try:
+            await _acquire(session.lock)
+            try:
+                turn = await asyncio.to_thread(self._prepare_profiled, session, user_message)
+                if "response" in turn:
+                    response, outcome = turn["response"], turn["outcome"]
+                else:
+                    try:
+                        completion = await complete_chat_for_session(
+                            turn["messages"], turn["model"], turn["max_tokens"], turn["priority"],
+                            turn["deadline"], session_id=session_id, should_cancel=should_cancel
+                        )
+                    except Exception as e:
+                        response, outcome = self._handle_failure(session, user_message, turn, e)
+                    else:
+                        response, outcome = self._finish(session, user_message, turn, completion)
+            finally:
+                session.lock.release()
+            tracing.annotate(outcome=outcome)
+            return {"response": response, "outcome": outcome, "crisis_mode": session.crisis_mode}
+        finally:
+            tracing.end_turn(trace)
+
+    def _respond(self, session: ChatSession, user_message: str, session_id: Optional[str],
+                 should_cancel: Optional[Callable[[], Optional[str]]]):
+        """The turn itself; each stage is a tracing span. Returns (response, outcome)."""
+        turn = self._prepare(session, user_message)
+        if "response" in turn:
+            return turn["response"], turn["outcome"]
+        try:
+            # Generate response with Groq (ultra-fast inference)
+            completion = complete_chat_with_deadline(
+                turn["messages"],
+                turn["model"],
+                turn["max_tokens"],
+                turn["priority"],
+                turn["deadline"],
+                session_id=session_id,
+                should_cancel=should_cancel
+            )
+        except Exception as e:
+            return self._handle_failure(session, user_message, turn, e)
+        return self._finish(session, user_message, turn, completion)
+
+    def _prepare_profiled(self, session: ChatSession, user_message: str) -> Dict:
+        with profiling.profile("turn_analysis"):
+            return self._prepare(session, user_message)
+
+    def _prepare(self, session: ChatSession, user_message: str) -> Dict:
+        """
+        Everything before the LLM call: analysis, crisis check, context and routing.
+
+        Returns:
+            {"response", "outcome"} when the turn is already answered (crisis,
+            no API key); otherwise the LLM request: "messages", "model",
+            "max_tokens", "priority", "deadline", plus "mood_key" and
+            "results" for the fallback
+        """
+        # Every turn is answered within RESPONSE_DEADLINE seconds, by the LLM or the local fallback
+        turn_deadline = time.monotonic() + RESPONSE_DEADLINE
+
+        # Normalize, tokenize and scan the message once for every analyzer below
+        with tracing.span("analysis"):
+            analysis = analyze_text(user_message)
+
+        # Crisis patterns first: a message that needs the crisis response gets
+        # it without waiting on (or depending on) the embedding model
+        with tracing.span("crisis"):
+            crisis_result = detect_crisis(analysis)
+
+        # Embed the message once: the same vector drives retrieval and emotion scoring
+        query_embedding = None
+        emotion_scores = None
+        try:
+            if self.retriever is not None and not crisis_result["is_crisis"]:
+                with tracing.span("rag_embed"):
+                    query_embedding = self.retriever.embed_query(user_message)
+                with tracing.span("embedding_scores"):
+                    emotion_scores = self.retriever.classify_emotions(query_embedding)
+                    crisis_scores = self.retriever.screen_crisis(query_embedding)
+                if crisis_scores:
+                    # Second stage: paraphrases the patterns missed
+                    crisis_result = detect_crisis(analysis, crisis_scores)
+        except Exception as e:
+            # Keyword analysis alone still works without embeddings, but say so
+            print(f"[pipeline] embedding failed, using keyword analysis: {type(e).__name__}: {e}")
+
+        # Analyze sentiment (keywords; the embedding only adds emotion hints)
+        with tracing.span("sentiment"):
+            sentiment = apply_emotion_scores(analyze_sentiment(analysis), emotion_scores)
+            sentiment_context = format_sentiment_for_prompt(sentiment)
+
+        # Without a selected mood, the closest mood by embedding shapes routing, length and fallbacks
+        mood_key = session.mood_key or sentiment["inferred_mood"]
+        session.emotional_trajectory.update(sentiment)
+
+        # This message's crisis indicators, weighed with the rest of the conversation
+        crisis = session.crisis_state.update(crisis_result)
+
+        if crisis["is_crisis"]:
+            CRISIS_SHORT_CIRCUITS.inc()
+            tracing.annotate(crisis_severity=crisis["severity"])
+            session.crisis_mode = True
+            session.crisis_state.acknowledge()
+            # Return pre-defined crisis response
+            return {"response": get_crisis_response(crisis["severity"]), "outcome": "crisis"}
+
+        # Build context for the message
+        context_parts = []
+
+        # 0. Language Detection - Respond in user's language
+        with tracing.span("language"):
+            language = detect_language(analysis)
+        tracing.annotate(language=language[0])
+        language_context = format_language_context(user_message, language)
+        if language_context:
+            context_parts.append(language_context)
+
+        # 1. RAG Retrieval - Treat as lived wisdom
+        results = []
+        try:
+            if query_embedding is not None:
+                with tracing.span("rag_search"):
+                    results = self.retriever.retrieve(user_message, query_embedding=query_embedding)
+                rag_context = self.retriever.format_context_for_prompt(results)
+                if rag_context:
+                    context_parts.append(f"[LIVED WISDOM & INSIGHTS]\n{rag_context}")
+        except Exception as e:
+            # The conversation carries on without knowledge-base context
+            print(f"[pipeline] retrieval failed: {type(e).__name__}: {e}")
+
+        # Tone guide for the mood the user picked (not an inferred one)
+        mood_context = MOOD_PROMPTS.get(session.mood_key, "") if session.mood_key else ""
+        if mood_context:
+            context_parts.append(f"[EMOTIONAL TONE GUIDE]\n{mood_context}")
+
+        context_parts.append(sentiment_context)
+
+        # 2. Gentle safety awareness when concerning language is present or building up
+        crisis_context = format_crisis_for_prompt(crisis)
+        if crisis_context:
+            context_parts.append(crisis_context)
+
+        # 3. Hidden Memory
+        emotional_memory = session.emotional_trajectory.summary()
+        if emotional_memory:
+            context_parts.append(f"[HIDDEN MEMORY]\n{emotional_memory}")
+
+        # Combine context with user message
+        enhanced_message = "\n\n".join(context_parts) + f"\n\n[USER MESSAGE]: {user_message}"
+
+        if not GROQ_API_KEY:
+            return {"response": API_KEY_MESSAGE, "outcome": "no_api_key"}
+
+        # Build messages with system prompt and conversation history
+        messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+
+        # Add conversation history for context; only the window is ever sent, so only it is kept
+        history = session.conversation_history
+        del history[:-CONVERSATION_HISTORY_WINDOW]
+        messages.extend(history)
+
+        # Add current user message
+        messages.append({"role": "user", "content": enhanced_message})
+
+        # Light, low-risk turns go to the fast model
+        route = select_model(sentiment, crisis, mood_key)
+        log_routing_decision(route)
+        tracing.annotate(model=route["model"])
+
+        # Queueing for the shared rate limit counts against the same deadline,
+        # and people who are struggling the most are served first.
+        # Calm check-ins get short replies, heavier turns more room
+        return {
+            "messages": messages,
+            "model": route["model"],
+            "max_tokens": choose_max_tokens(user_message, sentiment, mood_key, language[0]),
+            "priority": request_priority(sentiment, crisis),
+            "deadline": turn_deadline,
+            "intensity": sentiment["emotional_intensity"],
+            "mood_key": mood_key,
+            "results": results
+        }
+
+    def _finish(self, session: ChatSession, user_message: str, turn: Dict, chat_completion):
+        """Record a completed LLM reply. Returns (response, outcome)."""
+        response_text = chat_completion.choices[0].message.content
+        record_completion_stats(chat_completion, turn["max_tokens"], turn["intensity"])
+
+        # Update conversation history
+        session.conversation_history.append({"role": "user", "content": user_message})
+        session.conversation_history.append({"role": "assistant", "content": response_text})
+
+        return response_text, "llm"
+
+    def _handle_failure(self, session: ChatSession, user_message: str, turn: Dict, error: Exception):
+        """Answer a turn whose LLM call failed. Returns (response, outcome)."""
+        mood_key, results = turn["mood_key"], turn["results"]
+        if isinstance(error, GenerationCancelled):
+            # The user moved on (sent again or left). Keep their words for context
+            # and let the newer turn carry on.
+            session.conversation_history.append({"role": "user", "content": user_message})
+            return "", "cancelled"
+
+        # Past the first turn, the fallback picks up the conversation instead of greeting
+        continuing = bool(session.conversation_history)
+        if isinstance(error, DeadlineExceeded):
+            reply = compose_fallback_response(mood_key, results, reason="deadline", continuing=continuing)
+            return reply, "fallback_deadline"
+
+        if isinstance(error, RateLimitError):
+            # Hold back every session on this model briefly instead of letting them all retry into the limit
+            retry_after = error.response.headers.get("retry-after") if error.response is not None else None
+            try:
+                get_scheduler().pause(turn["model"], float(retry_after) if retry_after else 10.0)
+            except ValueError:
+                get_scheduler().pause(turn["model"], 10.0)
+            reply = compose_fallback_response(mood_key, results, reason="rate_limit", continuing=continuing)
+            return reply, "fallback_rate_limit"
+
+        error_msg = str(error)
+        if "API_KEY" in error_msg.upper() or "authentication" in error_msg.lower():
+            return API_KEY_MESSAGE, "no_api_key"
+        # Keep raw provider errors out of the chat
+        print(f"[pipeline] Groq call failed: {type(error).__name__}")
+        reply = compose_fallback_response(mood_key, results, reason="error", continuing=continuing)
+        return reply, "fallback_error"
+
+
+async def _acquire(lock: threading.Lock):
+    """Take a threading lock from an event loop without blocking the loop."""
+    acquiring = asyncio.ensure_future(asyncio.to_thread(lock.acquire))
+    try:
+        await asyncio.shield(acquiring)
+    except asyncio.CancelledError:
+        # The thread takes the lock regardless; hand it back once it has
+        acquiring.add_done_callback(lambda _: lock.release())
+        raise
+
+
+RAG_RETRY_INTERVAL = 60  # Seconds before loading RAG is tried again after a failure
+
+_pipeline: Optional[ChatPipeline] = None
+_keyword_pipeline = ChatPipeline()
+_rag_failed_at: Optional[float] = None
+_pipeline_lock = threading.Lock()
+
+
+def get_chat_pipeline() -> ChatPipeline:
+    """
+    The process-wide pipeline, on the shared retriever.
+
+    Loading the embedding model and indexing the knowledge base happens on
+    the first call. If that fails the pipeline works on keywords alone, and
+    loading is tried again after RAG_RETRY_INTERVAL seconds.
+    """
+    global _pipeline, _rag_failed_at
+    with _pipeline_lock:
+        if _pipeline is not None:
+            return _pipeline
+        if _rag_failed_at is not None and time.monotonic() - _rag_failed_at < RAG_RETRY_INTERVAL:
+            return _keyword_pipeline
+        try:
+            # Imported here: the RAG stack (chromadb, sentence-transformers) is heavy
+            from rag import get_shared_retriever
+            retriever = get_shared_retriever(CHROMA_PERSIST_DIR, KNOWLEDGE_BASE_DIR, INDEX_ARTIFACT_DIR)
+        except Exception as e:
+            print(f"[pipeline] RAG unavailable, using keyword analysis only: {type(e).__name__}: {e}")
+            _rag_failed_at = time.monotonic()
+            return _keyword_pipeline
+        _pipeline = ChatPipeline(retriever)
+        return _pipeline
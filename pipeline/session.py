@@ -0,0 +1,52 @@
+# CHAT SESSION STATE
+"""
+Everything a conversation carries from one turn to the next.
+
+The pipeline reads and updates a ChatSession instead of any UI's state,
+so the same turn logic serves the Streamlit app, the HTTP API and
+benchmarks. Chat messages themselves are not part of it: each front end
+keeps (and stores) its own transcript.
+"""
+
+import threading
+from typing import Dict, List, Optional
+
+from utils import EmotionalTrajectory, RollingCrisisState
+
+
+class ChatSession:
+    """Per-conversation state read and updated by ChatPipeline."""
+
+    def __init__(self, mood_key: Optional[str] = None, conversation_history: Optional[List[Dict]] = None):
+        """
+        Args:
+            mood_key: Mood the user selected, if any (a MOOD_OPTIONS key)
+            conversation_history: Recent user/assistant messages sent to the LLM
+        """
+        self.mood_key = mood_key
+        self.conversation_history: List[Dict] = conversation_history or []
+        self.emotional_trajectory = EmotionalTrajectory()  # Hidden emotional memory across turns
+        self.crisis_state = RollingCrisisState()           # Decayed crisis evidence across messages
+        self.crisis_mode = False                           # Whether a crisis response was given
+        self.lock = threading.Lock()                       # One turn at a time per conversation
+
+    @classmethod
+    def from_messages(cls, messages: List[Dict], window: int, mood_key: Optional[str] = None) -> "ChatSession":
+        """Resume from a stored transcript; only the LLM history window is restored."""
+        session = cls(mood_key)
+        session.load_history(messages, window)
+        return session
+
+    def load_history(self, messages: List[Dict], window: int):
+        """Replace the LLM history with the last `window` of a stored transcript. Call with the lock held."""
+        self.conversation_history = [
+            {"role": message["role"], "content": message["content"]} for message in messages[-window:]
+        ]
+
+    def reset(self):
+        """Forget the conversation (the selected mood is kept)."""
+        with self.lock:
+            self.conversation_history = []
+            self.emotional_trajectory = EmotionalTrajectory()
+            self.crisis_state = RollingCrisisState()
+            self.crisis_mode = False
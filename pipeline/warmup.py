@@ -0,0 +1,163 @@
+# PROCESS WARMUP
+"""
+Load models and indexes when the process starts, not in the first user's turn.
+
+start_warmup() runs once per process on a daemon thread:
+
+1. analysis    a few synthetic turns through keyword analysis, sentiment,
+               crisis patterns and language identification (lexicon
+               matchers, n-gram tables, first-call costs)
+2. pipeline    get_chat_pipeline(): embedding model, index artifact or
+               Chroma collection
+3. embeddings  the same turns through embedding, emotion centroids, crisis
+               exemplars and retrieval
+
+No LLM calls are made and nothing is recorded in the turn tracing
+histograms. Sessions that arrive early simply wait on get_chat_pipeline()
+for the part still loading.
+
+Readiness is is_ready() in-process, GET /ready on the HTTP API, and
+/ready next to /metrics on the metrics endpoint (503 until warm).
+
+A stage that fails doesn't block readiness: turns degrade to keyword
+analysis, and the error is reported in the status. Set SUKOON_REQUIRE_RAG=1
+to stay unready instead when RAG didn't load; the worker then needs a
+restart once the cause is fixed.
+"""
+
+import json
+import threading
+import time
+from typing import Dict, Optional
+
+from utils import (
+    analyze_text,
+    analyze_sentiment,
+    apply_emotion_scores,
+    format_sentiment_for_prompt,
+    detect_crisis,
+    format_crisis_for_prompt,
+    RollingCrisisState,
+    EmotionalTrajectory,
+    detect_language,
+    format_language_context
+)
+from config.settings import RAG_REQUIRED
+from utils import metrics
+from .chat import ChatPipeline, get_chat_pipeline
+
+# English, Roman Urdu, mixed and crisis-pattern messages, short and long
+WARMUP_MESSAGES = [
+    "hi",
+    "I feel so anxious about my exams and I can't sleep at night",
+    "yaar aaj bohot pareshan hoon, kuch acha nahi lag raha",
+    "work ka pressure hai and I'm exhausted, sab kuch mushkil lag raha hai",
+    "I feel hopeless and I don't see the point of anything anymore",
+    "Honestly things have been okay lately, I went for a walk and felt calm. "
+    "But sometimes at night my mind keeps replaying every conversation and I overthink everything."
+]
+
+READY = metrics.gauge("warmup_ready", "1 once process warmup has finished")
+WARMUP_TIME = metrics.gauge("warmup_seconds", "Time process warmup took")
+
+_state: Dict = {"status": "not_started", "stage": None, "stages_ms": {}, "seconds": None, "rag": None, "error": None}
+_ready = threading.Event()
+_lock = threading.Lock()
+_thread: Optional[threading.Thread] = None
+
+
+def _warm_analysis():
+    trajectory = EmotionalTrajectory()
+    crisis_state = RollingCrisisState()
+    for text in WARMUP_MESSAGES:
+        analysis = analyze_text(text)
+        sentiment = analyze_sentiment(analysis)
+        crisis = crisis_state.update(detect_crisis(analysis))
+        trajectory.update(sentiment)
+        format_language_context(text, detect_language(analysis))
+        format_sentiment_for_prompt(sentiment)
+        format_crisis_for_prompt(crisis)
+    trajectory.summary()
+
+
+def _warm_embeddings(pipeline: ChatPipeline):
+    retriever = pipeline.retriever
+    if retriever is None:
+        return
+    for text in WARMUP_MESSAGES:
+        embedding = retriever.embed_query(text)
+        emotion_scores = retriever.classify_emotions(embedding)
+        detect_crisis(analyze_text(text), retriever.screen_crisis(embedding))
+        apply_emotion_scores(analyze_sentiment(text), emotion_scores)
+        retriever.format_context_for_prompt(retriever.retrieve(text, query_embedding=embedding))
+
+
+def run_warmup() -> Dict:
+    """Warm up on the calling thread. Returns the final status."""
+    started = time.perf_counter()
+    with _lock:
+        _state.update(status="running", stage=None, error=None)
+
+    pipeline = None
+    try:
+        for stage in ("analysis", "pipeline", "embeddings"):
+            with _lock:
+                _state["stage"] = stage
+            stage_started = time.perf_counter()
+            if stage == "analysis":
+                _warm_analysis()
+            elif stage == "pipeline":
+                pipeline = get_chat_pipeline()
+            else:
+                _warm_embeddings(pipeline)
+            with _lock:
+                _state["stages_ms"][stage] = round((time.perf_counter() - stage_started) * 1000, 1)
+    except Exception as e:
+        # A worker that can't warm a component still serves (turns degrade
+        # to keyword analysis), so it is marked ready with the error reported
+        print(f"[warmup] {_state['stage']} failed: {type(e).__name__}: {e}")
+        with _lock:
+            _state["error"] = f"{_state['stage']}: {type(e).__name__}: {e}"
+
+    seconds = time.perf_counter() - started
+    rag = pipeline is not None and pipeline.retriever is not None
+    with _lock:
+        _state.update(status="ready", stage=None, seconds=round(seconds, 3), rag=rag)
+        if RAG_REQUIRED and not rag:
+            _state["status"] = "unavailable"
+            _state["error"] = _state["error"] or "RAG is required (SUKOON_REQUIRE_RAG) but did not load"
+    WARMUP_TIME.set(seconds)
+    _ready.set()
+    READY.set(1 if is_ready() else 0)
+    print(f"[warmup] {_state['status']} in {seconds:.1f}s {_state['stages_ms']}")
+    return warmup_status()
+
+
+def start_warmup() -> threading.Thread:
+    """Start warming up on a daemon thread. Only the first call in a process starts it."""
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=run_warmup, name="warmup", daemon=True)
+            _thread.start()
+        return _thread
+
+
+def is_ready() -> bool:
+    """Warmup has finished, with RAG loaded if it is required."""
+    return _ready.is_set() and _state["status"] == "ready"
+
+
+def wait_until_ready(timeout: Optional[float] = None) -> bool:
+    """Block until warmup has finished (ready or not). Returns False on timeout."""
+    return _ready.wait(timeout)
+
+
+def warmup_status() -> Dict:
+    with _lock:
+        return {"ready": is_ready(), **_state, "stages_ms": dict(_state["stages_ms"])}
+
+
+metrics.add_endpoint("/ready", lambda: (
+    "application/json", json.dumps(warmup_status()), 200 if is_ready() else 503
+))
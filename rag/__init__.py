@@ -1,11 +1,22 @@
 from .embeddings import EmbeddingService
 from .vector_store import VectorStore
-from .retriever import WellnessRetriever
+from .emotion_classifier import EmotionClassifier, get_emotion_classifier
+from .crisis_screener import CrisisScreener, get_crisis_screener
+from .retriever import WellnessRetriever, get_shared_retriever
 from .knowledge_loader import index_knowledge_base
+from .index_artifact import ArtifactVectorStore, IndexArtifactError, build_index_artifact
 
 __all__ = [
     "EmbeddingService",
     "VectorStore",
+    "EmotionClassifier",
+    "get_emotion_classifier",
+    "CrisisScreener",
+    "get_crisis_screener",
     "WellnessRetriever",
-    "index_knowledge_base"
+    "get_shared_retriever",
+    "index_knowledge_base",
+    "ArtifactVectorStore",
+    "IndexArtifactError",
+    "build_index_artifact"
 ]
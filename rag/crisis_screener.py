@@ -0,0 +1,57 @@
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from utils.crisis_detector import CRISIS_EXEMPLARS
+from .embeddings import EmbeddingService, normalize_vectors
+
+
+class CrisisScreener:
+    def __init__(self, embedding_service: EmbeddingService):
+        """
+        Embed every crisis exemplar once and keep them as one row-normalized matrix.
+        """
+        self.tiers = list(CRISIS_EXEMPLARS)
+        texts = [text for tier in self.tiers for text in CRISIS_EXEMPLARS[tier]]
+        self.exemplars = normalize_vectors(np.asarray(embedding_service.embed_batch(texts), dtype=np.float32))
+
+        # Start row of each tier's block, for one reduceat over the similarities
+        self.offsets = np.cumsum([0] + [len(CRISIS_EXEMPLARS[tier]) for tier in self.tiers[:-1]])
+
+    def screen(self, query_embedding: List[float]) -> Dict[str, float]:
+        """
+        Similarity of a message embedding to each tier's closest exemplar.
+
+        One matrix-vector multiply plus a per-tier max; no model call.
+        """
+        query = normalize_vectors(np.asarray(query_embedding, dtype=np.float32))
+        closest = np.maximum.reduceat(self.exemplars @ query, self.offsets)
+        return {tier: round(float(score), 3) for tier, score in zip(self.tiers, closest)}
+
+
+_screeners: Dict[str, Optional[CrisisScreener]] = {}
+_screeners_lock = threading.Lock()
+
+
+def get_crisis_screener(embedding_service: EmbeddingService) -> Optional[CrisisScreener]:
+    """
+    One screener per active embedding model (EmbeddingService.active_model),
+    shared by every session in the process.
+
+    Returns None if the exemplars can't be embedded (e.g. no embedding model).
+    """
+    with _screeners_lock:
+        # Keyed by the model actually embedding, so the vectors always share the queries' space
+        model = embedding_service.active_model
+        if model not in _screeners:
+            try:
+                screener = CrisisScreener(embedding_service)
+            except Exception as e:
+                # Remember the failure so it isn't retried every turn
+                print(f"Crisis exemplars unavailable: {e}")
+                screener = None
+            # Read after embedding: a failed API call falls back to the local model
+            model = embedding_service.active_model
+            _screeners[model] = screener
+        return _screeners[model]
@@ -1,5 +1,6 @@
 import os
 import requests
+import numpy as np
 from typing import List, Optional
 from huggingface_hub import InferenceClient
 from config.settings import EMBEDDING_MODEL
@@ -12,6 +13,7 @@ class EmbeddingService:
         No API key required.
         """
         self.model_name = model_name or "sentence-transformers/all-MiniLM-L6-v2"
+        self.local_model_name = model_name or EMBEDDING_MODEL
         self.hf_token = os.getenv("HF_TOKEN")
         
         if self.hf_token:
@@ -23,11 +25,26 @@ class EmbeddingService:
             print("HF_TOKEN not found. Falling back to local SentenceTransformers.")
             try:
                 from sentence_transformers import SentenceTransformer
-                self.model = SentenceTransformer(model_name or EMBEDDING_MODEL)
+                self.model = SentenceTransformer(self.local_model_name)
             except Exception as e:
                 print(f"Error loading local embedding model: {e}")
                 self.model = None
 
+    @property
+    def backend(self) -> str:
+        """Where embeddings currently come from: "hf_api" or "local"."""
+        return "hf_api" if self.use_api else "local"
+
+    @property
+    def active_model(self) -> str:
+        """
+        The model actually producing embeddings right now.
+
+        Differs from model_name when running locally, including after the
+        API failed and embedding fell back to the local model.
+        """
+        return self.model_name if self.use_api else self.local_model_name
+
     def embed_text(self, text: str) -> List[float]:
         """Generate embedding for a single text locally."""
         if self.use_api:
@@ -64,3 +81,9 @@ class EmbeddingService:
             
         embeddings = self.model.encode(texts)
         return embeddings.tolist()
+
+
+def normalize_vectors(vectors: np.ndarray) -> np.ndarray:
+    """Scale vectors (or the rows of a matrix) to unit length, so dot products are cosines."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
@@ -0,0 +1,153 @@
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config.settings import MOOD_OPTIONS, EMOTION_SIMILARITY_THRESHOLD, EMOTION_MARGIN
+from utils.lexicons import NEGATIVE_EMOTION_CATEGORIES, POSITIVE_INDICATORS
+from .embeddings import EmbeddingService, normalize_vectors
+
+# Example messages for each mood, English and Roman Urdu. Each mood's centroid
+# is the mean of these plus the mood's description in MOOD_OPTIONS.
+MOOD_EXEMPLARS = {
+    "sad": [
+        "I feel so low and empty, nothing makes me happy anymore",
+        "I've been crying a lot and I don't know why",
+        "Everything feels pointless lately",
+        "dil bohot udaas hai aaj kal",
+        "kuch acha nahi lagta"
+    ],
+    "anxious": [
+        "My heart is racing and I can't calm down",
+        "I'm so nervous about what's going to happen",
+        "I keep worrying that something bad will happen",
+        "mujhe bohot ghabrahat ho rahi hai",
+        "darr lag raha hai pata nahi kyun"
+    ],
+    "stressed": [
+        "There is too much on my plate and not enough time",
+        "Work and deadlines are piling up and I'm exhausted",
+        "Everyone expects so much from me",
+        "kaam ka bohot pressure hai",
+        "itni tension hai ke sar phat raha hai"
+    ],
+    "overthinking": [
+        "I keep replaying the conversation in my head",
+        "My mind won't stop going over every possibility",
+        "I analyse every little thing someone says",
+        "dimagh mein khayal ruk hi nahi rahe",
+        "baar baar wohi baat sochta rehta hoon"
+    ],
+    "calm": [
+        "I'm feeling okay today, just wanted to chat",
+        "Things are peaceful right now",
+        "I had a good day and feel relaxed",
+        "aaj sukoon hai, sab theek hai",
+        "bas baat karne ka dil kiya"
+    ]
+}
+
+
+# Lexicon category -> mood whose example messages also shape its centroid,
+# so categories aren't built from bare keywords alone
+CATEGORY_MOODS = {
+    "sadness": "sad",
+    "anxiety": "anxious",
+    "stress": "stressed",
+    "overthinking": "overthinking",
+    "positive": "calm"
+}
+
+
+class EmotionClassifier:
+    def __init__(self, embedding_service: EmbeddingService):
+        """
+        Precompute emotion centroids in the embedding space of the retriever.
+
+        Moods (sad, anxious, ...) come from MOOD_EXEMPLARS; emotion categories
+        (sadness, anxiety, ..., positive) from the lexicon keywords plus the
+        matching mood's examples. Everything is embedded in one batch, once.
+        """
+        mood_descriptions = {data["key"]: data["description"] for data in MOOD_OPTIONS.values()}
+        groups = {
+            mood: exemplars + [mood_descriptions.get(mood, mood)]
+            for mood, exemplars in MOOD_EXEMPLARS.items()
+        }
+        categories = {category: sorted(keywords) for category, keywords in NEGATIVE_EMOTION_CATEGORIES.items()}
+        categories["positive"] = sorted(POSITIVE_INDICATORS)
+        for category, mood in CATEGORY_MOODS.items():
+            categories[category] = categories[category] + MOOD_EXEMPLARS[mood]
+
+        all_groups = list(groups.values()) + list(categories.values())
+        texts = [text for group in all_groups for text in group]
+        vectors = normalize_vectors(np.asarray(embedding_service.embed_batch(texts), dtype=np.float32))
+
+        centroids = []
+        start = 0
+        for group in all_groups:
+            centroids.append(vectors[start:start + len(group)].mean(axis=0))
+            start += len(group)
+
+        self.mood_labels = list(groups)
+        self.category_labels = list(categories)
+        self.labels = self.mood_labels + self.category_labels
+        self.centroids = normalize_vectors(np.stack(centroids))
+
+    def classify(self, query_embedding: List[float]) -> Dict[str, Dict[str, float]]:
+        """
+        Score a message embedding against every centroid with one matrix multiply.
+
+        Returns:
+            Dictionary containing:
+            - moods: {mood: cosine similarity}
+            - categories: {category: cosine similarity}
+            - top_mood / top_category: the clear winner, or None if nothing is
+              close enough or two labels are too close to call
+        """
+        query = normalize_vectors(np.asarray(query_embedding, dtype=np.float32))
+        similarities = self.centroids @ query
+        scores = {label: round(float(score), 3) for label, score in zip(self.labels, similarities)}
+        moods = {label: scores[label] for label in self.mood_labels}
+        categories = {label: scores[label] for label in self.category_labels}
+        return {
+            "moods": moods,
+            "categories": categories,
+            "top_mood": _clear_winner(moods),
+            "top_category": _clear_winner(categories)
+        }
+
+
+def _clear_winner(scores: Dict[str, float]) -> Optional[str]:
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    label, best = ranked[0]
+    runner_up = ranked[1][1] if len(ranked) > 1 else -1.0
+    if best >= EMOTION_SIMILARITY_THRESHOLD and best - runner_up >= EMOTION_MARGIN:
+        return label
+    return None
+
+
+_classifiers: Dict[str, Optional[EmotionClassifier]] = {}
+_classifiers_lock = threading.Lock()
+
+
+def get_emotion_classifier(embedding_service: EmbeddingService) -> Optional[EmotionClassifier]:
+    """
+    One classifier per active embedding model (EmbeddingService.active_model),
+    shared by every session in the process.
+
+    Returns None if the centroids can't be computed (e.g. no embedding model).
+    """
+    with _classifiers_lock:
+        # Keyed by the model actually embedding, so the vectors always share the queries' space
+        model = embedding_service.active_model
+        if model not in _classifiers:
+            try:
+                classifier = EmotionClassifier(embedding_service)
+            except Exception as e:
+                # Remember the failure so it isn't retried every turn
+                print(f"Emotion centroids unavailable: {e}")
+                classifier = None
+            # Read after embedding: a failed API call falls back to the local model
+            model = embedding_service.active_model
+            _classifiers[model] = classifier
+        return _classifiers[model]
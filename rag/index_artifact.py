@@ -0,0 +1,263 @@
+# PREBUILT KNOWLEDGE BASE INDEX
+"""
+Build the knowledge base index ahead of time and serve it read-only.
+
+Without an artifact, every fresh worker loads the knowledge base, embeds
+every document and fills Chroma before it can answer anyone. The build
+command does that once, at deploy time:
+
+    python -m rag.index_artifact build                 # knowledge_base/ -> index/
+    python -m rag.index_artifact verify index/
+
+An artifact is a directory:
+
+    manifest.json     format, version, embedding model, dimension, and the
+                      sha256 of every file below and of every source file
+    embeddings.npy    float32 matrix, one unit-length row per document
+    documents.json    ids, content and metadata, in row order
+
+The version is a hash of the embedding model and the indexed content, so
+identical inputs always give the same version. At startup the artifact is
+checked against its manifest and memory-mapped read-only; search is an
+exact cosine similarity over the matrix. An artifact built with a
+different embedding model than the one running is refused: its vectors
+would be meaningless to the query embeddings. The model recorded is the
+one that actually produced the vectors (the Hugging Face API model, or
+the local one when running locally or after falling back), and one probe
+embedding is checked against the artifact's dimension at load.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config.settings import KNOWLEDGE_BASE_DIR, INDEX_ARTIFACT_DIR
+from .embeddings import EmbeddingService, normalize_vectors
+from .knowledge_loader import load_knowledge_base
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+DOCUMENTS_FILE = "documents.json"
+
+
+class IndexArtifactError(Exception):
+    """Raised when an index artifact is missing, corrupt or built for another model."""
+
+
+def _sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_hashes(knowledge_dir: str) -> Dict[str, str]:
+    """sha256 of each knowledge base JSON file, by file name."""
+    if not os.path.isdir(knowledge_dir):
+        return {}
+    return {
+        filename: _sha256_file(os.path.join(knowledge_dir, filename))
+        for filename in sorted(os.listdir(knowledge_dir))
+        if filename.endswith(".json")
+    }
+
+
+def content_version(model_name: str, documents: List[Dict[str, Any]]) -> str:
+    """Stable version id for an index of these documents under this embedding model."""
+    digest = hashlib.sha256(model_name.encode("utf-8"))
+    for document in documents:
+        digest.update(json.dumps(document, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def build_index_artifact(knowledge_dir: str, output_dir: str,
+                         embedding_service: Optional[EmbeddingService] = None) -> Dict[str, Any]:
+    """
+    Embed the knowledge base and write an artifact to output_dir, replacing any existing one.
+
+    The artifact is written to a temporary directory next to output_dir and
+    moved into place at the end, so a failed build never leaves a partial index.
+
+    Returns:
+        The manifest
+    """
+    documents = load_knowledge_base(knowledge_dir)
+    if not documents:
+        raise IndexArtifactError(f"No knowledge base documents found in {knowledge_dir}")
+
+    embedding_service = embedding_service or EmbeddingService()
+    started = time.perf_counter()
+    embeddings = normalize_vectors(np.asarray(
+        embedding_service.embed_batch([document["content"] for document in documents]), dtype=np.float32
+    ))
+    # Read after embedding: a failed API call falls back to the local model
+    model_name = embedding_service.active_model
+
+    parent = os.path.dirname(os.path.abspath(output_dir))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".index-", dir=parent)
+    os.chmod(staging, 0o755)  # mkdtemp is owner-only; workers may run as another user
+    try:
+        np.save(os.path.join(staging, EMBEDDINGS_FILE), embeddings)
+        with open(os.path.join(staging, DOCUMENTS_FILE), "w", encoding="utf-8") as f:
+            json.dump(documents, f, ensure_ascii=False)
+
+        manifest = {
+            "format": FORMAT_VERSION,
+            "version": content_version(model_name, documents),
+            "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "embedding_model": model_name,
+            "embedding_backend": embedding_service.backend,
+            "dimension": int(embeddings.shape[1]),
+            "documents": len(documents),
+            "files": {
+                name: _sha256_file(os.path.join(staging, name))
+                for name in (EMBEDDINGS_FILE, DOCUMENTS_FILE)
+            },
+            "sources": source_hashes(knowledge_dir)
+        }
+        with open(os.path.join(staging, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        if os.path.exists(output_dir):
+            shutil.rmtree(output_dir)
+        os.replace(staging, output_dir)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    print(f"Indexed {len(documents)} documents in {time.perf_counter() - started:.1f}s "
+          f"-> {output_dir} (version {manifest['version']})")
+    return manifest
+
+
+def read_manifest(index_dir: str) -> Dict[str, Any]:
+    """Load an artifact's manifest and check every file against its hash."""
+    manifest_path = os.path.join(index_dir, MANIFEST_FILE)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise IndexArtifactError(f"Cannot read {manifest_path}: {e}")
+
+    if manifest.get("format") != FORMAT_VERSION:
+        raise IndexArtifactError(f"{index_dir} has index format {manifest.get('format')}, "
+                                 f"expected {FORMAT_VERSION}; rebuild it")
+    for name, expected in manifest["files"].items():
+        path = os.path.join(index_dir, name)
+        if not os.path.exists(path) or _sha256_file(path) != expected:
+            raise IndexArtifactError(f"{path} is missing or does not match the manifest; rebuild the index")
+    return manifest
+
+
+class ArtifactVectorStore:
+    """Read-only vector store over a built index artifact, searched by exact cosine similarity."""
+
+    def __init__(self, manifest: Dict[str, Any], embeddings: np.ndarray, documents: List[Dict[str, Any]]):
+        self.manifest = manifest
+        self.embeddings = embeddings
+        self.documents = documents
+
+    @classmethod
+    def load(cls, index_dir: str, embedding_service: EmbeddingService,
+             knowledge_dir: Optional[str] = None) -> "ArtifactVectorStore":
+        """
+        Verify and open an artifact.
+
+        Args:
+            embedding_service: The service the queries will be embedded with
+            knowledge_dir: If given, warn when its files differ from the ones indexed
+
+        Raises:
+            IndexArtifactError: If the artifact is corrupt, built with another
+                model, or its dimension differs from the service's embeddings
+        """
+        manifest = read_manifest(index_dir)
+        # One real embedding: it settles which backend is in use and its dimension
+        probe = embedding_service.embed_text("index dimension probe")
+        model_name = embedding_service.active_model
+        if manifest["embedding_model"] != model_name:
+            raise IndexArtifactError(
+                f"Index {index_dir} was built with '{manifest['embedding_model']}' but the "
+                f"embedding model is '{model_name}'; rebuild it with: python -m rag.index_artifact build"
+            )
+        if len(probe) != manifest["dimension"]:
+            raise IndexArtifactError(
+                f"Index {index_dir} has {manifest['dimension']}-dimensional vectors but '{model_name}' "
+                f"produces {len(probe)}; rebuild it with: python -m rag.index_artifact build"
+            )
+
+        # Memory-mapped read-only: workers on one machine share the pages
+        embeddings = np.load(os.path.join(index_dir, EMBEDDINGS_FILE), mmap_mode="r")
+        with open(os.path.join(index_dir, DOCUMENTS_FILE), "r", encoding="utf-8") as f:
+            documents = json.load(f)
+        if embeddings.shape != (manifest["documents"], manifest["dimension"]) or len(documents) != len(embeddings):
+            raise IndexArtifactError(f"{index_dir} does not match its manifest; rebuild the index")
+
+        if knowledge_dir and os.path.isdir(knowledge_dir) and source_hashes(knowledge_dir) != manifest["sources"]:
+            print(f"Warning: {knowledge_dir} has changed since index {manifest['version']} was built; "
+                  f"rebuild it with: python -m rag.index_artifact build")
+        print(f"Loaded knowledge index {manifest['version']} ({len(documents)} documents, {model_name})")
+        return cls(manifest, embeddings, documents)
+
+    def search(self, query_embedding: List[float], n_results: int = 3) -> List[Dict[str, Any]]:
+        """
+        The n_results closest documents, in VectorStore.search() format
+        (distance is cosine distance, as in the Chroma collection).
+        """
+        n_results = min(n_results, len(self.documents))
+        if n_results <= 0:
+            return []
+        query = normalize_vectors(np.asarray(query_embedding, dtype=np.float32))
+        similarities = self.embeddings @ query
+        top = np.argpartition(-similarities, n_results - 1)[:n_results]
+        top = top[np.argsort(-similarities[top])]
+        return [
+            {
+                "content": self.documents[i]["content"],
+                "metadata": self.documents[i]["metadata"],
+                "distance": max(0.0, float(1.0 - similarities[i]))
+            }
+            for i in top
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or check the prebuilt knowledge base index.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    build = subcommands.add_parser("build", help="Embed the knowledge base and write an index artifact")
+    build.add_argument("--knowledge-dir", default=KNOWLEDGE_BASE_DIR)
+    build.add_argument("--output", default=INDEX_ARTIFACT_DIR)
+
+    verify = subcommands.add_parser("verify", help="Check an artifact against its manifest and print it")
+    verify.add_argument("index_dir", nargs="?", default=INDEX_ARTIFACT_DIR)
+    verify.add_argument("--knowledge-dir", help="Also check whether these sources changed since the build")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "build":
+            build_index_artifact(args.knowledge_dir, args.output)
+            return
+
+        manifest = read_manifest(args.index_dir)
+        print(json.dumps({key: value for key, value in manifest.items() if key != "sources"}, indent=2))
+        if args.knowledge_dir and source_hashes(args.knowledge_dir) != manifest["sources"]:
+            sys.exit(f"{args.knowledge_dir} has changed since this index was built")
+        print("OK")
+    except IndexArtifactError as e:
+        sys.exit(str(e))
+
+
+if __name__ == "__main__":
+    main()
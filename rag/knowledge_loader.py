@@ -1,6 +1,7 @@
 import os
 import json
 from typing import List, Dict, Any
+from utils import profiling
 from .embeddings import EmbeddingService
 from .vector_store import VectorStore
 
@@ -12,7 +13,7 @@ def load_knowledge_base(directory: str) -> List[Dict[str, Any]]:
     if not os.path.exists(directory):
         return []
         
-    for filename in os.listdir(directory):
+    for filename in sorted(os.listdir(directory)):  # Stable order: index versions are content hashes
         if filename.endswith(".json"):
             file_path = os.path.join(directory, filename)
             with open(file_path, "r", encoding="utf-8") as f:
@@ -31,6 +32,7 @@ def load_knowledge_base(directory: str) -> List[Dict[str, Any]]:
                         })
     return documents
 
+@profiling.profiled()
 def index_knowledge_base(vector_store: VectorStore, embedding_service: EmbeddingService, knowledge_dir: str):
     """
     Index all documents from the knowledge base directory.
@@ -1,8 +1,13 @@
 from typing import List, Dict, Any, Optional
 import os
 import json
+import threading
 from .embeddings import EmbeddingService
 from .vector_store import VectorStore
+from .emotion_classifier import get_emotion_classifier
+from .crisis_screener import get_crisis_screener
+from .knowledge_loader import index_knowledge_base
+from .index_artifact import ArtifactVectorStore, MANIFEST_FILE
 
 class WellnessRetriever:
     def __init__(self, embedding_service: EmbeddingService, vector_store: VectorStore):
@@ -12,14 +17,46 @@ class WellnessRetriever:
         self.embedding_service = embedding_service
         self.vector_store = vector_store
 
-    def retrieve(self, query: str, n_results: int = 2) -> List[Dict[str, Any]]:
+    def embed_query(self, query: str) -> List[float]:
+        """
+        Embed a user message once, for retrieval and emotion scoring alike.
+        """
+        return self.embedding_service.embed_text(query)
+
+    def retrieve(self, query: str, n_results: int = 2,
+                 query_embedding: Optional[List[float]] = None) -> List[Dict[str, Any]]:
         """
         Retrieve relevant wellness wisdom.
+
+        Pass query_embedding from embed_query() to avoid embedding the message twice.
         """
-        query_embedding = self.embedding_service.embed_text(query)
+        if query_embedding is None:
+            query_embedding = self.embed_query(query)
         results = self.vector_store.search(query_embedding, n_results=n_results)
         return results
 
+    def classify_emotions(self, query_embedding: List[float]) -> Optional[Dict[str, Dict[str, float]]]:
+        """
+        Score the message embedding against the precomputed emotion centroids.
+
+        Returns None if the centroids are unavailable.
+        """
+        classifier = get_emotion_classifier(self.embedding_service)
+        if classifier is None:
+            return None
+        return classifier.classify(query_embedding)
+
+    def screen_crisis(self, query_embedding: List[float]) -> Optional[Dict[str, float]]:
+        """
+        Similarity of the message embedding to the closest crisis exemplar of each tier.
+
+        Returns None if the exemplars are unavailable.
+        """
+        screener = get_crisis_screener(self.embedding_service)
+        if screener is None:
+            return None
+        return screener.screen(query_embedding)
+
     def format_context_for_prompt(self, results: List[Dict[str, Any]]) -> str:
         """
         Format retrieved results into a context string for the LLM.
@@ -34,3 +71,40 @@ class WellnessRetriever:
             context_parts.append(content)
             
         return "\n\n".join(context_parts)
+
+
+_shared_retriever: Optional[WellnessRetriever] = None
+_shared_retriever_lock = threading.Lock()
+
+
+def get_shared_retriever(persist_directory: str = "./chroma_db",
+                         knowledge_dir: str = "./knowledge_base",
+                         index_dir: Optional[str] = None) -> WellnessRetriever:
+    """
+    One retriever (embedding model, vector store, indexed knowledge base)
+    shared by every session in the process.
+
+    Each session used to load its own embedding model and re-index the
+    knowledge base; now only the first session pays for it. With a prebuilt
+    index artifact in index_dir, nothing is indexed at all: the artifact is
+    loaded read-only instead of Chroma.
+
+    Raises:
+        IndexArtifactError: If index_dir holds an artifact that is corrupt or
+            doesn't match the running embedding model (name or dimension)
+        Whatever building the embedding service or vector store raises.
+        Nothing is cached on failure, so the next session tries again.
+    """
+    global _shared_retriever
+    with _shared_retriever_lock:
+        if _shared_retriever is None:
+            embeddings = EmbeddingService()
+            if index_dir and os.path.exists(os.path.join(index_dir, MANIFEST_FILE)):
+                vector_store = ArtifactVectorStore.load(index_dir, embeddings, knowledge_dir)
+            else:
+                vector_store = VectorStore(persist_directory=persist_directory)
+                vector_store.initialize_collection()
+                if os.path.exists(knowledge_dir):
+                    index_knowledge_base(vector_store, embeddings, knowledge_dir)
+            _shared_retriever = WellnessRetriever(embeddings, vector_store)
+        return _shared_retriever
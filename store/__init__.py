@@ -0,0 +1,68 @@
+# CONVERSATION STORE
+"""
+Durable conversation history, written off the turn path.
+
+Sessions keep only a recent window of messages in memory; every message
+also goes to the conversation store through the background writer, and
+older turns are paged back in from the store when someone scrolls up.
+A conversation is resumed by its opaque id.
+"""
+
+import secrets
+import threading
+from typing import Optional
+
+from config.settings import CONVERSATION_STORE, CONVERSATION_DB_PATH, STORE_WRITE_BATCH
+from .base import ConversationStore, encode_message, decode_message
+from .memory import InMemoryConversationStore
+from .sqlite import SQLiteConversationStore
+from .writer import ConversationWriter
+
+MIN_CONVERSATION_ID_LENGTH = 16  # Anything shorter wasn't issued by new_conversation_id()
+
+_store: Optional[ConversationStore] = None
+_writer: Optional[ConversationWriter] = None
+_lock = threading.Lock()
+
+
+def get_conversation_store() -> ConversationStore:
+    """The process-wide store selected by CONVERSATION_STORE ("sqlite" or "memory")."""
+    global _store
+    with _lock:
+        if _store is None:
+            if CONVERSATION_STORE == "sqlite":
+                _store = SQLiteConversationStore(CONVERSATION_DB_PATH)
+            elif CONVERSATION_STORE == "memory":
+                _store = InMemoryConversationStore()
+            else:
+                raise ValueError(f"Unknown CONVERSATION_STORE '{CONVERSATION_STORE}' (use 'sqlite' or 'memory')")
+        return _store
+
+
+def get_conversation_writer() -> ConversationWriter:
+    """The process-wide background writer for get_conversation_store()."""
+    global _writer
+    store = get_conversation_store()
+    with _lock:
+        if _writer is None:
+            _writer = ConversationWriter(store, max_batch=STORE_WRITE_BATCH)
+        return _writer
+
+
+def new_conversation_id() -> str:
+    """Opaque, unguessable id: it is the only key to a conversation."""
+    return secrets.token_urlsafe(18)
+
+
+__all__ = [
+    "ConversationStore",
+    "InMemoryConversationStore",
+    "SQLiteConversationStore",
+    "ConversationWriter",
+    "encode_message",
+    "decode_message",
+    "get_conversation_store",
+    "get_conversation_writer",
+    "new_conversation_id",
+    "MIN_CONVERSATION_ID_LENGTH"
+]
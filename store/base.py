@@ -0,0 +1,57 @@
+import json
+import zlib
+from typing import Dict, List, Tuple
+
+# (conversation id, message); the store numbers a conversation's messages from 0 as it writes them
+MessageRecord = Tuple[str, Dict]
+
+
+def encode_message(message: Dict) -> bytes:
+    """Messages are stored zlib-compressed; chat text compresses 2-4x."""
+    return zlib.compress(json.dumps(message, ensure_ascii=False).encode("utf-8"))
+
+
+def decode_message(body: bytes) -> Dict:
+    return json.loads(zlib.decompress(body))
+
+
+class ConversationStore:
+    """
+    Interface for conversation storage.
+
+    Writes come from the ConversationWriter thread, reads from session
+    threads, so implementations must be thread-safe.
+    """
+
+    def append_many(self, records: List[MessageRecord]):
+        """
+        Store a batch of messages, in order.
+
+        Each message gets the conversation's next seq, assigned inside the
+        write, so several writers (processes) never reuse one. Storing a seq
+        that already exists raises rather than overwriting.
+        """
+        raise NotImplementedError
+
+    def load_page(self, conversation_id: str, before_seq: int, limit: int) -> List[Tuple[int, Dict]]:
+        """
+        Messages with seq < before_seq, the newest `limit` of them, oldest first.
+
+        Returns:
+            List of (seq, message)
+        """
+        raise NotImplementedError
+
+    def count(self, conversation_id: str) -> int:
+        """Number of messages stored for a conversation (its next seq)."""
+        raise NotImplementedError
+
+    def delete(self, conversation_id: str):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def load_recent(self, conversation_id: str, limit: int) -> List[Tuple[int, Dict]]:
+        """The newest `limit` messages, oldest first."""
+        return self.load_page(conversation_id, 1 << 62, limit)
@@ -0,0 +1,40 @@
+import bisect
+import threading
+from typing import Dict, List, Tuple
+
+from .base import ConversationStore, MessageRecord, encode_message, decode_message
+
+
+class InMemoryConversationStore(ConversationStore):
+    def __init__(self):
+        """
+        Process-local store: conversations survive reconnects but not restarts.
+
+        Messages are kept compressed, like on disk.
+        """
+        self._lock = threading.Lock()
+        self._conversations: Dict[str, Dict[int, bytes]] = {}
+
+    def append_many(self, records: List[MessageRecord]):
+        encoded = [(conversation_id, encode_message(message)) for conversation_id, message in records]
+        with self._lock:
+            for conversation_id, body in encoded:
+                messages = self._conversations.setdefault(conversation_id, {})
+                messages[max(messages) + 1 if messages else 0] = body
+
+    def load_page(self, conversation_id: str, before_seq: int, limit: int) -> List[Tuple[int, Dict]]:
+        with self._lock:
+            messages = self._conversations.get(conversation_id, {})
+            seqs = sorted(messages)
+            end = bisect.bisect_left(seqs, before_seq)
+            page = [(seq, messages[seq]) for seq in seqs[max(0, end - limit):end]]
+        return [(seq, decode_message(body)) for seq, body in page]
+
+    def count(self, conversation_id: str) -> int:
+        with self._lock:
+            messages = self._conversations.get(conversation_id)
+            return max(messages) + 1 if messages else 0
+
+    def delete(self, conversation_id: str):
+        with self._lock:
+            self._conversations.pop(conversation_id, None)
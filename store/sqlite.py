@@ -0,0 +1,85 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from .base import ConversationStore, MessageRecord, encode_message, decode_message
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    conversation_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    body BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (conversation_id, seq)
+) WITHOUT ROWID
+"""
+
+
+class SQLiteConversationStore(ConversationStore):
+    def __init__(self, path: str):
+        """
+        SQLite store in WAL mode: the writer thread appends while sessions read.
+
+        Each thread gets its own connection. Message bodies are zlib-compressed JSON.
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._connect().execute(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            # With WAL, NORMAL only risks the last transactions on power loss, never corruption
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def append_many(self, records: List[MessageRecord]):
+        now = time.time()
+        connection = self._connect()
+        with connection:  # One transaction per batch
+            # IMMEDIATE takes the write lock before reading MAX(seq), so another
+            # process can't number its messages from the same seq in between
+            connection.execute("BEGIN IMMEDIATE")
+            next_seqs: Dict[str, int] = {}
+            for conversation_id, message in records:
+                seq = next_seqs.get(conversation_id)
+                if seq is None:
+                    seq = self.count(conversation_id)
+                next_seqs[conversation_id] = seq + 1
+                connection.execute(
+                    "INSERT INTO messages (conversation_id, seq, role, body, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (conversation_id, seq, message.get("role", ""), encode_message(message), now)
+                )
+
+    def load_page(self, conversation_id: str, before_seq: int, limit: int) -> List[Tuple[int, Dict]]:
+        rows = self._connect().execute(
+            "SELECT seq, body FROM messages WHERE conversation_id = ? AND seq < ? ORDER BY seq DESC LIMIT ?",
+            (conversation_id, before_seq, limit)
+        ).fetchall()
+        return [(seq, decode_message(body)) for seq, body in reversed(rows)]
+
+    def count(self, conversation_id: str) -> int:
+        row = self._connect().execute(
+            "SELECT MAX(seq) FROM messages WHERE conversation_id = ?", (conversation_id,)
+        ).fetchone()
+        return row[0] + 1 if row[0] is not None else 0
+
+    def delete(self, conversation_id: str):
+        connection = self._connect()
+        with connection:
+            connection.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
@@ -0,0 +1,149 @@
+# BACKGROUND CONVERSATION WRITER
+"""
+Moves conversation writes off the turn path.
+
+Sessions hand messages to submit()/delete(), which only put them on a
+queue. A single daemon thread drains the queue and writes whatever has
+accumulated as one batch (one SQLite transaction), so a busy server makes
+fewer, larger writes and no turn ever waits on disk.
+"""
+
+import atexit
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+from utils import metrics
+from .base import ConversationStore, MessageRecord
+
+WRITE_RETRIES = 2
+RETRY_DELAY = 0.5  # Seconds
+
+QUEUE_DEPTH = metrics.gauge("store_queue_depth", "Conversation writes waiting for the writer thread")
+BATCH_SIZE = metrics.histogram("store_batch_messages", "Messages per conversation store write",
+                               buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500))
+WRITE_TIME = metrics.histogram("store_write_seconds", "Conversation store batch write duration")
+DROPPED = metrics.counter("store_dropped_messages_total", "Messages lost after repeated write failures")
+
+_STOP = object()
+_DELETE = object()
+
+
+class ConversationWriter:
+    def __init__(self, store: ConversationStore, max_batch: int = 200):
+        """
+        Start the writer thread for `store`.
+
+        Args:
+            max_batch: Most messages written in one transaction
+        """
+        self.store = store
+        self.max_batch = max_batch
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._pending = 0
+        self._pending_by_conversation: Dict[str, int] = {}
+        self._pending_changed = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="conversation-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, conversation_id: str, message: Dict):
+        """Queue one message for writing; the store numbers it. Never blocks."""
+        self._add_pending(conversation_id)
+        self._queue.put((conversation_id, dict(message)))
+
+    def delete(self, conversation_id: str):
+        """Queue deletion of a conversation, after any writes already queued for it."""
+        self._add_pending(conversation_id)
+        self._queue.put((_DELETE, conversation_id))
+
+    def flush(self, timeout: Optional[float] = None, conversation_id: Optional[str] = None) -> bool:
+        """
+        Wait until everything queued so far is written. Returns False on timeout.
+
+        Args:
+            conversation_id: Only wait for this conversation's writes
+        """
+        with self._pending_changed:
+            if conversation_id is None:
+                return self._pending_changed.wait_for(lambda: self._pending == 0, timeout)
+            return self._pending_changed.wait_for(
+                lambda: conversation_id not in self._pending_by_conversation, timeout
+            )
+
+    def close(self, timeout: float = 5.0):
+        """Write what is queued and stop the thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def _add_pending(self, conversation_id: str):
+        with self._pending_changed:
+            self._pending += 1
+            self._pending_by_conversation[conversation_id] = self._pending_by_conversation.get(conversation_id, 0) + 1
+            QUEUE_DEPTH.set(self._pending)
+
+    def _done(self, items: List):
+        """Mark a processed batch as no longer pending and wake flush() callers."""
+        with self._pending_changed:
+            for item in items:
+                if item is _STOP:
+                    continue
+                conversation_id = item[1] if item[0] is _DELETE else item[0]
+                self._pending -= 1
+                self._pending_by_conversation[conversation_id] -= 1
+                if not self._pending_by_conversation[conversation_id]:
+                    del self._pending_by_conversation[conversation_id]
+            QUEUE_DEPTH.set(self._pending)
+            self._pending_changed.notify_all()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            items = [item]
+            # Take whatever else is already waiting, up to one batch
+            while len(items) < self.max_batch:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = False
+            records: List[MessageRecord] = []
+            for item in items:
+                if item is _STOP:
+                    stop = True
+                    continue
+                if item[0] is _DELETE:
+                    # Keep ordering: write what came before the delete first
+                    self._write(records)
+                    records = []
+                    self._apply(lambda: self.store.delete(item[1]))
+                else:
+                    records.append(item)
+            self._write(records)
+
+            self._done(items)
+            if stop:
+                return
+
+    def _write(self, records: List[MessageRecord]):
+        if not records:
+            return
+        started = time.perf_counter()
+        if self._apply(lambda: self.store.append_many(records)):
+            BATCH_SIZE.observe(len(records))
+            WRITE_TIME.observe(time.perf_counter() - started)
+        else:
+            DROPPED.inc(len(records))
+
+    def _apply(self, operation) -> bool:
+        for attempt in range(WRITE_RETRIES + 1):
+            try:
+                operation()
+                return True
+            except Exception as e:
+                print(f"[store] write failed (attempt {attempt + 1}): {type(e).__name__}: {e}")
+                time.sleep(RETRY_DELAY)
+        return False
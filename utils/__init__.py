@@ -3,9 +3,11 @@
 Utility modules for the Mental Wellness Chatbot.
 """
 
-from .sentiment import analyze_sentiment, get_empathy_level, format_sentiment_for_prompt
-from .crisis_detector import detect_crisis, get_crisis_response, format_crisis_for_prompt
-from .language_detector import detect_language, format_language_context
+from .text_analysis import TextAnalysis, analyze_text
+from .sentiment import analyze_sentiment, apply_emotion_scores, get_empathy_level, format_sentiment_for_prompt
+from .crisis_detector import detect_crisis, get_crisis_response, format_crisis_for_prompt, RollingCrisisState
+from .emotional_memory import EmotionalTrajectory
+from .language_detector import detect_language, detect_languages, format_language_context
 from .coping_techniques import (
     get_breathing_exercise,
     format_breathing_exercise,
@@ -21,16 +23,24 @@ from .coping_techniques import (
 )
 
 __all__ = [
+    # Shared analysis
+    "TextAnalysis",
+    "analyze_text",
     # Sentiment
     "analyze_sentiment",
+    "apply_emotion_scores",
     "get_empathy_level", 
     "format_sentiment_for_prompt",
     # Crisis
     "detect_crisis",
     "get_crisis_response",
     "format_crisis_for_prompt",
+    "RollingCrisisState",
+    # Emotional memory
+    "EmotionalTrajectory",
     # Language
     "detect_language",
+    "detect_languages",
     "format_language_context",
     # Coping
     "get_breathing_exercise",
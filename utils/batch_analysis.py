@@ -0,0 +1,230 @@
+# OFFLINE BATCH ANALYSIS
+"""
+Runs the app's per-message analysis (sentiment, crisis, language) over a
+JSONL file of historical messages, in parallel, with constant memory.
+
+Input lines are read lazily and sent to a process pool in chunks. Only a
+fixed number of chunks are in flight at once, and results are written in
+input order as soon as the oldest chunk is done, so memory use does not
+grow with the size of the input.
+
+Usage:
+    python -m utils.batch_analysis transcripts.jsonl -o analysis.jsonl
+    python -m utils.batch_analysis transcripts.jsonl -o analysis.parquet --workers 8
+
+Each input line is a JSON object with the message in "text" (see
+--text-field). Output rows carry the input line number and id, never the
+message text.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .text_analysis import analyze_text
+from .sentiment import analyze_sentiment
+from .crisis_detector import detect_crisis
+from .language_detector import detect_language
+
+DEFAULT_CHUNK_SIZE = 2000
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+PROGRESS_INTERVAL_SECONDS = 5.0
+
+# Column order of every output row
+OUTPUT_FIELDS = (
+    "line", "id", "error",
+    "language", "language_confidence",
+    "polarity", "subjectivity", "emotional_intensity", "needs_support",
+    "negative_indicators", "positive_indicators",
+    "crisis_severity", "is_crisis", "crisis_pattern_ids"
+)
+
+
+def analyze_message(text: str) -> Dict:
+    """
+    Analyze one message exactly as ChatPipeline.respond() does before calling the model.
+
+    Returns:
+        Flat dictionary of the analysis fields in OUTPUT_FIELDS
+    """
+    analysis = analyze_text(text)
+    sentiment = analyze_sentiment(analysis)
+    crisis = detect_crisis(analysis)
+    language, confidence = detect_language(analysis)
+    return {
+        "language": language,
+        "language_confidence": confidence,
+        "polarity": sentiment["polarity"],
+        "subjectivity": sentiment["subjectivity"],
+        "emotional_intensity": sentiment["emotional_intensity"],
+        "needs_support": sentiment["needs_support"],
+        "negative_indicators": sorted(sentiment["negative_indicators"]),
+        "positive_indicators": sorted(sentiment["positive_indicators"]),
+        "crisis_severity": crisis["severity"],
+        "is_crisis": crisis["is_crisis"],
+        "crisis_pattern_ids": crisis["pattern_ids"]
+    }
+
+
+def analyze_chunk(lines: List[Tuple[int, str]], text_field: str, id_field: str) -> List[Dict]:
+    """
+    Worker entry point: parse and analyze a chunk of raw JSONL lines.
+
+    Lines that aren't JSON objects with a string text field get an error row
+    instead of stopping the run.
+    """
+    rows = []
+    for line_number, raw in lines:
+        row = dict.fromkeys(OUTPUT_FIELDS)
+        row["line"] = line_number
+        try:
+            record = json.loads(raw)
+            text = record[text_field]
+            if not isinstance(text, str):
+                raise TypeError(f"'{text_field}' is not a string")
+            row["id"] = None if record.get(id_field) is None else str(record[id_field])
+            row.update(analyze_message(text))
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            row["error"] = f"{type(e).__name__}: {e}"
+        rows.append(row)
+    return rows
+
+
+def read_chunks(path: str, chunk_size: int) -> Iterator[List[Tuple[int, str]]]:
+    """Yield (line number, raw line) chunks, skipping blank lines. Reads lazily."""
+    chunk = []
+    source = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        for line_number, raw in enumerate(source, 1):
+            if not raw.strip():
+                continue
+            chunk.append((line_number, raw))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+
+def analyze_in_order(chunks: Iterable[List[Tuple[int, str]]], workers: int,
+                     text_field: str, id_field: str) -> Iterator[List[Dict]]:
+    """
+    Fan chunks out over a process pool and yield their results in input order.
+
+    At most workers * CHUNKS_IN_FLIGHT_PER_WORKER chunks are submitted but not
+    yet yielded, which is what keeps memory constant.
+    """
+    max_in_flight = workers * CHUNKS_IN_FLIGHT_PER_WORKER
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(pool.submit(analyze_chunk, chunk, text_field, id_field))
+            if len(in_flight) >= max_in_flight:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+class JSONLWriter:
+    def __init__(self, path: str):
+        self.file = sys.stdout if path == "-" else open(path, "w", encoding="utf-8")
+
+    def write(self, rows: List[Dict]):
+        self.file.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+class ParquetWriter:
+    """Writes one row group per chunk. Needs pyarrow (pip install pyarrow)."""
+
+    def __init__(self, path: str):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow: pip install pyarrow")
+        self.pa = pa
+        self.schema = pa.schema([
+            ("line", pa.int64()), ("id", pa.string()), ("error", pa.string()),
+            ("language", pa.string()), ("language_confidence", pa.float64()),
+            ("polarity", pa.float64()), ("subjectivity", pa.float64()),
+            ("emotional_intensity", pa.string()), ("needs_support", pa.bool_()),
+            ("negative_indicators", pa.list_(pa.string())), ("positive_indicators", pa.list_(pa.string())),
+            ("crisis_severity", pa.string()), ("is_crisis", pa.bool_()),
+            ("crisis_pattern_ids", pa.list_(pa.string()))
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows: List[Dict]):
+        self.writer.write_table(self.pa.Table.from_pylist(rows, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def run(input_path: str, output_path: str, workers: int, chunk_size: int,
+        text_field: str = "text", id_field: str = "id", output_format: Optional[str] = None) -> Dict:
+    """
+    Analyze every message in input_path and write the results to output_path.
+
+    Returns:
+        Dictionary with messages, errors, seconds and messages_per_second
+    """
+    if output_format is None:
+        output_format = "parquet" if output_path.endswith(".parquet") else "jsonl"
+    writer = ParquetWriter(output_path) if output_format == "parquet" else JSONLWriter(output_path)
+
+    messages = errors = 0
+    start = last_report = time.perf_counter()
+    try:
+        for rows in analyze_in_order(read_chunks(input_path, chunk_size), workers, text_field, id_field):
+            writer.write(rows)
+            messages += len(rows)
+            errors += sum(1 for row in rows if row["error"])
+
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_INTERVAL_SECONDS:
+                print(f"[batch] {messages:,} messages, {messages / (now - start):,.0f} msgs/s", file=sys.stderr)
+                last_report = now
+    finally:
+        writer.close()
+
+    seconds = time.perf_counter() - start
+    return {
+        "messages": messages,
+        "errors": errors,
+        "seconds": round(seconds, 2),
+        "messages_per_second": round(messages / seconds, 1) if seconds else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL file of messages ('-' for stdin)")
+    parser.add_argument("-o", "--output", required=True, help="Output .jsonl or .parquet file ('-' for stdout)")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], help="Output format (default: from the file extension)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--id-field", default="id")
+    args = parser.parse_args()
+
+    stats = run(args.input, args.output, args.workers, args.chunk_size,
+                args.text_field, args.id_field, args.format)
+    print(f"[batch] {stats['messages']:,} messages ({stats['errors']:,} errors) in {stats['seconds']}s, "
+          f"{stats['messages_per_second']:,.0f} msgs/s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
 # CRISIS DETECTION MODULE
 
 import re
-from typing import Dict, Tuple
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+from .text_analysis import TextAnalysis
 
 # CRISIS INDICATORS
 # Keywords and phrases that may indicate crisis
@@ -49,44 +52,207 @@ CONCERNING_PATTERNS = [
 ]
 
 
-def detect_crisis(text: str) -> Dict:
+# COMPILED PATTERN ENGINE
+# Every pattern is compiled once at import, together with the literal words
+# any match of it must contain ("kill" and "self" for kill\s*(my)?self).
+# A message is only searched with the patterns whose literals all appear
+# in it; those checks are plain substring tests, which cost far less than
+# a regex scan, so most messages (and most of a long one's patterns) never
+# reach the regex engine. Each candidate pattern reports every hit and where,
+# and hits of different patterns may overlap ("self harm myself" is both
+# "self harm" and "harm myself").
+CRISIS_TIERS = [
+    # (tier name, patterns, severity)
+    ("high", HIGH_RISK_PATTERNS, "high"),
+    ("self_harm", SELF_HARM_PATTERNS, "medium"),
+    ("concerning", CONCERNING_PATTERNS, "low"),
+]
+
+# Shorter literals ("t" in can'?t) rule out too little to be worth checking
+MIN_LITERAL_LENGTH = 2
+
+
+def required_literals(pattern: str) -> Tuple[str, ...]:
+    """
+    Runs of letters every match of `pattern` must contain, longest first.
+    
+    Only text outside groups and character classes counts, and a letter
+    followed by ?, * or { is optional, so it ends the run instead.
+    """
+    runs = []
+    current = ""
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            i += 2
+            runs.append(current)
+            current = ""
+            continue
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "[" and depth == 0:
+            i = pattern.index("]", i)
+            runs.append(current)
+            current = ""
+        elif depth == 0 and char.isalpha():
+            following = pattern[i + 1:i + 2]
+            if following in ("?", "*", "{"):
+                runs.append(current)
+                current = ""
+            else:
+                current += char
+            i += 1
+            continue
+        runs.append(current)
+        current = ""
+        i += 1
+    runs.append(current)
+    literals = dict.fromkeys(run for run in runs if len(run) >= MIN_LITERAL_LENGTH)
+    return tuple(sorted(literals, key=len, reverse=True))
+
+
+def _compile_tier(name: str, patterns: List[str]) -> List[Tuple[str, str, re.Pattern, Tuple[str, ...]]]:
+    """
+    Compile a tier's patterns.
+    
+    Returns:
+        (pattern id, pattern, compiled regex, required literals) per pattern
+    """
+    return [
+        (f"{name}_{i}", pattern, re.compile(pattern), required_literals(pattern))
+        for i, pattern in enumerate(patterns)
+    ]
+
+
+COMPILED_TIERS = [
+    (severity, _compile_tier(name, patterns))
+    for name, patterns, severity in CRISIS_TIERS
+]
+
+
+# SEMANTIC SCREENING
+# Regex patterns miss paraphrases ("I don't see a future for me"). As a second
+# stage, the turn's message embedding (already computed for retrieval) is
+# compared with embeddings of these examples. The exemplar matrix is built
+# once per process in rag/crisis_screener.py.
+CRISIS_EXEMPLARS = {
+    "high": [
+        "I have no future and no reason to keep going",
+        "I won't be here for much longer",
+        "I have been saying goodbye to people and giving my things away",
+        "I've written letters for my family for after I'm gone",
+        "There is no way out except ending everything",
+        "I want to go to sleep and never wake up",
+        "Everyone would be better if I just disappeared for good",
+        "I have a plan for how to do it",
+        "main ab aur jeena nahi chahta",
+        "mera mar jana hi behtar hai",
+        "sab khatam kar dena chahta hoon"
+    ],
+    "self_harm": [
+        "I hurt myself again last night",
+        "I deserve the pain so I do it to myself",
+        "I've been scratching my arms until they bleed",
+        "Hurting my body is the only thing that makes the feeling stop",
+        "main khud ko nuqsan pohonchata hoon",
+        "maine phir se apne aap ko zakhmi kiya"
+    ],
+    "concerning": [
+        "Nothing is ever going to get better",
+        "I'm so tired of living like this",
+        "I feel like a burden to everyone around me",
+        "What's the point of anything anymore",
+        "I've given up on myself",
+        "No one would even notice if I was gone",
+        "main zindagi se tang aa gaya hoon",
+        "kisi ko meri zaroorat nahi"
+    ]
+}
+
+# Cosine similarity a message needs to the closest exemplar of each tier.
+# Higher tiers need a closer match: a false alarm there replaces the reply.
+CRISIS_SIMILARITY_THRESHOLDS = {
+    "high": 0.72,
+    "self_harm": 0.70,
+    "concerning": 0.62
+}
+
+# The thresholds above are not yet calibrated against labelled messages, so
+# an embedding match alone only raises severity to "low": it adds safety
+# guidance to the prompt, but never replaces the reply with the crisis
+# response and adds no evidence to RollingCrisisState. Calibration runs
+# (benchmarks/bench_crisis_semantic.py) pass a higher cap to detect_crisis().
+SEMANTIC_MAX_SEVERITY = "low"
+
+TIER_SEVERITY = {name: severity for name, _, severity in CRISIS_TIERS}
+
+
+def detect_crisis(text: Union[str, TextAnalysis], semantic_scores: Optional[Dict[str, float]] = None,
+                  semantic_max_severity: str = SEMANTIC_MAX_SEVERITY) -> Dict:
     """
     Analyze text for crisis indicators.
     
     Args:
-        text: User's message text
+        text: User's message text, or its TextAnalysis from analyze_text()
+        semantic_scores: Tier -> similarity of the message embedding to that
+            tier's closest exemplar, from WellnessRetriever.screen_crisis().
+            Without it only the regex patterns are checked.
+        semantic_max_severity: Highest severity an embedding match alone can set
         
     Returns:
         Dictionary containing:
         - is_crisis: Boolean indicating if crisis was detected
         - severity: "high", "medium", "low", or "none"
         - matched_patterns: List of concerning patterns found
+        - pattern_ids: Id of the pattern behind each hit (e.g. "high_3",
+          or "high_semantic" for an embedding match)
+        - spans: (start, end) of each regex hit in the lowercased, stripped text
+        - semantic_tiers: Tiers whose similarity threshold was met
         - response_needed: Boolean indicating if special response is needed
     """
-    text_lower = text.lower().strip()
+    # Only the normalized text is needed, so a raw string isn't fully analyzed
+    text_lower = text.normalized if isinstance(text, TextAnalysis) else text.lower().strip()
     
     matched = []
+    pattern_ids = []
+    spans = []
     severity = "none"
     
-    # Check high-risk patterns first
-    for pattern in HIGH_RISK_PATTERNS:
-        if re.search(pattern, text_lower):
-            matched.append(pattern)
-            severity = "high"
-    
-    # Check self-harm patterns
-    if severity != "high":
-        for pattern in SELF_HARM_PATTERNS:
-            if re.search(pattern, text_lower):
-                matched.append(pattern)
-                severity = "medium" if severity == "none" else severity
-    
-    # Check concerning patterns (only if nothing higher found)
-    if severity == "none":
-        for pattern in CONCERNING_PATTERNS:
-            if re.search(pattern, text_lower):
-                matched.append(pattern)
-                severity = "low"
+    # Tiers run highest first; the first tier with any hit decides severity
+    for tier_severity, tier_patterns in COMPILED_TIERS:
+        hits = []
+        for pattern_id, pattern, regex, literals in tier_patterns:
+            for literal in literals:
+                if literal not in text_lower:
+                    break
+            else:
+                found = [(match.span(), pattern_id) for match in regex.finditer(text_lower)]
+                if found:
+                    matched.append(pattern)
+                    hits.extend(found)
+        if hits:
+            severity = tier_severity
+            # Report hits in text order
+            hits.sort()
+            pattern_ids = [pattern_id for _, pattern_id in hits]
+            spans = [span for span, _ in hits]
+            break
+    
+    # Second stage: paraphrases the patterns missed
+    semantic_tiers = []
+    if semantic_scores:
+        for tier, threshold in CRISIS_SIMILARITY_THRESHOLDS.items():
+            if semantic_scores.get(tier, 0.0) >= threshold:
+                semantic_tiers.append(tier)
+                pattern_ids.append(f"{tier}_semantic")
+                matched.append(f"semantic:{tier}")
+                tier_severity = min(TIER_SEVERITY[tier], semantic_max_severity, key=SEVERITY_ORDER.get)
+                if SEVERITY_ORDER[tier_severity] > SEVERITY_ORDER[severity]:
+                    severity = tier_severity
     
     is_crisis = severity in ["high", "medium"]
     
@@ -94,10 +260,139 @@ def detect_crisis(text: str) -> Dict:
         "is_crisis": is_crisis,
         "severity": severity,
         "matched_patterns": matched,
+        "pattern_ids": pattern_ids,
+        "spans": spans,
+        "semantic_tiers": semantic_tiers,
         "response_needed": severity in ["high", "medium", "low"]
     }
 
 
+# ROLLING CONVERSATION-LEVEL DETECTION
+# Risk is often spread over several messages, none alarming on its own.
+# Each tier's hits are kept as a single exponentially decayed score, so the
+# state is a few floats per session and updating it never rescans history.
+
+CRISIS_HALF_LIFE_SECONDS = 20 * 60  # Evidence halves every 20 minutes
+
+# Weight of one pattern hit, per tier
+TIER_RISK_WEIGHTS = {"high": 3.0, "self_harm": 2.0, "concerning": 1.0}
+
+# Cumulative risk needed for each severity (checked highest first).
+# e.g. a self-harm message followed by a concerning one reaches "medium".
+CUMULATIVE_SEVERITY_THRESHOLDS = [("high", 5.5), ("medium", 2.5), ("low", 1.5)]
+
+# Most concerning-tier hits are everyday phrases ("give up on this puzzle"),
+# so however many pile up, on their own they stay under the "medium" threshold
+CONCERNING_RISK_CAP = 2.0
+
+# After a crisis response the evidence is scaled to this share of the "low"
+# threshold, so ordinary messages that follow ("thanks") add no safety framing
+ACKNOWLEDGED_RISK_SHARE = 0.9
+# Below this risk the acknowledged episode has decayed away
+EPISODE_END_RISK = 0.5
+
+SEVERITY_ORDER = {"none": 0, "low": 1, "medium": 2, "high": 3}
+
+
+class RollingCrisisState:
+    """
+    Decayed per-tier crisis evidence for one conversation.
+    
+    Update with each message's detect_crisis() result; O(1) time and memory.
+    """
+    
+    __slots__ = ("scores", "updated_at", "acknowledged")
+    
+    def __init__(self):
+        self.scores = {tier: 0.0 for tier in TIER_RISK_WEIGHTS}
+        self.updated_at: Optional[float] = None
+        # A crisis response was given and no new high/self-harm evidence has come since
+        self.acknowledged = False
+    
+    def _decay(self, now: float):
+        if self.updated_at is not None and now > self.updated_at:
+            factor = 0.5 ** ((now - self.updated_at) / CRISIS_HALF_LIFE_SECONDS)
+            for tier in self.scores:
+                self.scores[tier] *= factor
+        self.updated_at = now
+    
+    @property
+    def risk(self) -> float:
+        """Weighted sum of the decayed tier scores, with concerning evidence capped."""
+        scores = self.scores
+        return (
+            TIER_RISK_WEIGHTS["high"] * scores["high"]
+            + TIER_RISK_WEIGHTS["self_harm"] * scores["self_harm"]
+            + min(TIER_RISK_WEIGHTS["concerning"] * scores["concerning"], CONCERNING_RISK_CAP)
+        )
+    
+    def cumulative_severity(self) -> str:
+        risk = self.risk
+        for severity, threshold in CUMULATIVE_SEVERITY_THRESHOLDS:
+            if risk >= threshold:
+                return severity
+        return "none"
+    
+    def update(self, crisis_result: Dict, now: Optional[float] = None) -> Dict:
+        """
+        Add one message's evidence and return its result, escalated if needed.
+        
+        Args:
+            crisis_result: Result from detect_crisis() for the new message
+            now: Timestamp in seconds (defaults to time.time())
+            
+        Returns:
+            Copy of crisis_result with severity raised to the cumulative
+            severity when that is higher, plus:
+            - escalated: True if the conversation raised the severity
+            - cumulative_risk: Current decayed risk score
+        """
+        self._decay(time.time() if now is None else now)
+        if self.acknowledged and self.risk < EPISODE_END_RISK:
+            self.acknowledged = False  # The earlier episode has decayed away
+        
+        for pattern_id in set(crisis_result.get("pattern_ids", [])):
+            tier, kind = pattern_id.rsplit("_", 1)
+            # Uncalibrated embedding matches don't build up toward a crisis response
+            if kind != "semantic":
+                self.scores[tier] += 1.0
+                if tier != "concerning":
+                    self.acknowledged = False
+        
+        result = dict(crisis_result)
+        cumulative = self.cumulative_severity()
+        if self.acknowledged and SEVERITY_ORDER[cumulative] > SEVERITY_ORDER["low"]:
+            # Heavy words after a crisis response keep the prompt's safety
+            # guidance, but only new high or self-harm evidence repeats it
+            cumulative = "low"
+        result["escalated"] = SEVERITY_ORDER[cumulative] > SEVERITY_ORDER[crisis_result["severity"]]
+        if result["escalated"]:
+            result["severity"] = cumulative
+            result["is_crisis"] = cumulative in ["high", "medium"]
+            result["response_needed"] = True
+        result["cumulative_risk"] = round(self.risk, 2)
+        return result
+    
+    def acknowledge(self):
+        """
+        Call after a crisis response has been given.
+        
+        Scales the evidence down to just under the "low" threshold, so the
+        messages that follow are judged on their own again. Until a message
+        brings new high or self-harm evidence (or the risk decays below
+        EPISODE_END_RISK) the accumulated score alone escalates no further
+        than "low": concerning words right after the response get the
+        prompt's safety guidance but don't repeat the response.
+        """
+        target = dict(CUMULATIVE_SEVERITY_THRESHOLDS)["low"] * ACKNOWLEDGED_RISK_SHARE
+        risk = self.risk
+        if risk > target:
+            factor = target / risk
+            for tier in self.scores:
+                self.scores[tier] *= factor
+        self.acknowledged = True
+
+
 def get_crisis_response(severity: str) -> str:
     """
     Get appropriate response based on crisis severity.
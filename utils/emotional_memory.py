@@ -0,0 +1,131 @@
+# EMOTIONAL MEMORY
+"""
+Tracks how the user's emotional state moves across a conversation.
+
+One small object per session replaces a one-line summary that each heavy
+turn overwrote and a theme list that grew for as long as the session ran.
+Updates are O(1), and the [HIDDEN MEMORY] text it renders stays the same
+size however long the conversation gets.
+"""
+
+from typing import Dict, List
+
+from .lexicons import NEGATIVE_EMOTION_CATEGORIES, POSITIVE_INDICATORS
+
+# One counter slot per category, in this order
+EMOTION_CATEGORIES = tuple(NEGATIVE_EMOTION_CATEGORIES) + ("positive",)
+CATEGORY_INDEX = {category: index for index, category in enumerate(EMOTION_CATEGORIES)}
+
+# Keyword -> counter slot, built once at import
+KEYWORD_CATEGORY = {
+    keyword: CATEGORY_INDEX[category]
+    for category, keywords in NEGATIVE_EMOTION_CATEGORIES.items()
+    for keyword in keywords
+}
+KEYWORD_CATEGORY.update({keyword: CATEGORY_INDEX["positive"] for keyword in POSITIVE_INDICATORS})
+
+INTENSITY_LEVELS = {"mild": 0.0, "moderate": 1.0, "severe": 2.0}
+
+# Exponential moving averages per turn: the fast one follows the last few
+# messages, the slow one the conversation as a whole
+FAST_DECAY = 0.5
+SLOW_DECAY = 0.15
+TREND_MARGIN = 0.15      # Polarity gap between the two averages that counts as a trend
+MAX_THEMES_IN_SUMMARY = 3
+
+
+class EmotionalTrajectory:
+    """
+    Per-session emotional state: category counters plus decayed polarity and intensity.
+
+    Call update() with each message's analyze_sentiment() result and put
+    summary() in the prompt's [HIDDEN MEMORY] block.
+    """
+
+    __slots__ = ("turns", "counts", "last_seen", "polarity_fast", "polarity_slow", "intensity")
+
+    def __init__(self):
+        self.turns = 0
+        self.counts: List[int] = [0] * len(EMOTION_CATEGORIES)      # Messages mentioning each category
+        self.last_seen: List[int] = [0] * len(EMOTION_CATEGORIES)   # Turn number of the latest mention
+        self.polarity_fast = 0.0
+        self.polarity_slow = 0.0
+        self.intensity = 0.0
+
+    def update(self, sentiment: Dict):
+        """
+        Fold one message into the trajectory.
+
+        Args:
+            sentiment: Result from analyze_sentiment() for the message
+        """
+        self.turns += 1
+
+        slots = {KEYWORD_CATEGORY[emotion] for emotion in sentiment["detected_emotions"] if emotion in KEYWORD_CATEGORY}
+        slots.update(CATEGORY_INDEX[category] for category in sentiment.get("inferred_emotions", ()))
+        for slot in slots:
+            self.counts[slot] += 1
+            self.last_seen[slot] = self.turns
+
+        polarity = sentiment["polarity"]
+        intensity = INTENSITY_LEVELS.get(sentiment["emotional_intensity"], 0.0)
+        if self.turns == 1:
+            self.polarity_fast = self.polarity_slow = polarity
+            self.intensity = intensity
+        else:
+            self.polarity_fast += FAST_DECAY * (polarity - self.polarity_fast)
+            self.polarity_slow += SLOW_DECAY * (polarity - self.polarity_slow)
+            self.intensity += SLOW_DECAY * (intensity - self.intensity)
+
+    @property
+    def trend(self) -> str:
+        """"lifting", "getting heavier" or "steady", comparing recent messages to the conversation."""
+        gap = self.polarity_fast - self.polarity_slow
+        if gap >= TREND_MARGIN:
+            return "lifting"
+        if gap <= -TREND_MARGIN:
+            return "getting heavier"
+        return "steady"
+
+    def themes(self) -> List[str]:
+        """Negative emotion categories mentioned so far, most frequent (then most recent) first."""
+        negative = [
+            (self.counts[slot], self.last_seen[slot], category)
+            for category, slot in CATEGORY_INDEX.items()
+            if category != "positive" and self.counts[slot]
+        ]
+        return [category for _, _, category in sorted(negative, reverse=True)]
+
+    def summary(self) -> str:
+        """
+        Short trend summary for the [HIDDEN MEMORY] block.
+
+        Returns:
+            A few sentences, or "" before anything worth remembering has happened
+        """
+        themes = self.themes()
+        if self.turns == 0 or (not themes and self.intensity < 0.5):
+            return ""
+
+        if self.intensity >= 1.5:
+            weight = "very heavy"
+        elif self.intensity >= 0.5:
+            weight = "heavy"
+        else:
+            weight = "fairly steady"
+        messages = f"{self.turns} message{'s' if self.turns > 1 else ''}"
+        lines = [f"Across {messages} the user's mood has been {weight} overall, and is {self.trend} lately."]
+
+        if themes:
+            described = []
+            for category in themes[:MAX_THEMES_IN_SUMMARY]:
+                slot = CATEGORY_INDEX[category]
+                ago = self.turns - self.last_seen[slot]
+                when = "in this latest message" if ago == 0 else f"last {ago} message{'s' if ago > 1 else ''} ago"
+                described.append(f"{category} ({self.counts[slot]}x, {when})")
+            lines.append(f"Themes so far: {', '.join(described)}.")
+
+        if self.counts[CATEGORY_INDEX["positive"]]:
+            lines.append("They have also mentioned some good moments; gently build on those when it fits.")
+
+        return " ".join(lines)
@@ -3,123 +3,50 @@
 Detects whether user input is in English, Urdu, or Roman Urdu.
 """
 
-import re
-from typing import Tuple
+from typing import Iterable, List, Optional, Tuple, Union
 
-# Common Roman Urdu words and patterns
-ROMAN_URDU_WORDS = {
-    # Pronouns
-    "mera", "meri", "mere", "tera", "teri", "tere", "uska", "uski", "uske",
-    "hamara", "hamari", "hamare", "tumhara", "tumhari", "tumhare",
-    "mujhe", "tujhe", "aap", "aapka", "aapki", "aapko", "hum", "tum",
-    "woh", "wo", "yeh", "ye", "kya", "kaun", "kahan", "kab", "kyun", "kaise",
-    
-    # Common verbs
-    "hai", "hain", "ho", "tha", "thi", "the", "hoga", "hogi", "hoge",
-    "kar", "karo", "karna", "karta", "karti", "karte", "karein", "karunga", "karungi",
-    "bol", "bolo", "bolna", "bolta", "bolti", "bolte", "batao", "batana", "bata",
-    "sun", "suno", "sunna", "sunta", "sunti", "sunte", "sunao",
-    "dekh", "dekho", "dekhna", "dekhta", "dekhti", "dekhte",
-    "ja", "jao", "jana", "jata", "jati", "jate", "jaana", "jayega", "jayegi",
-    "aa", "aao", "aana", "aata", "aati", "aate", "aaonga", "aaongi",
-    "le", "lo", "lena", "leta", "leti", "lete", "liya", "liye",
-    "de", "do", "dena", "deta", "deti", "dete", "diya", "diye",
-    "raha", "rahi", "rahe", "raho", "rehna", "rehta", "rehti",
-    "sakta", "sakti", "sakte", "sakein",
-    "chahiye", "chahte", "chahti", "chaahta", "chaahti",
-    "laga", "lagi", "lage", "lagta", "lagti", "lagte",
-    "pata", "pati", "maloom", "samajh", "samjha", "samjho",
-    "horha", "horhi", "horhe", "horai", "hora",
-    "karha", "karhi", "karhe",
-    
-    # Common nouns
-    "dil", "dimagh", "sir", "sar", "dard", "drd", "takleef", "taklif",
-    "zindagi", "zindgi", "maut", "pyar", "mohabbat", "ishq",
-    "ghar", "kaam", "kam", "paisa", "paise", "waqt", "time",
-    "raat", "din", "subah", "shaam", "kal", "aaj", "parso",
-    "dost", "bhai", "behen", "behan", "maa", "baap", "abbu", "ammi",
-    "log", "banda", "bande", "insaan", "aadmi", "aurat", "larki", "larka",
-    "khushi", "gham", "udaas", "udasi", "tension", "fikar", "fikr",
-    "neend", "nind", "thakan", "thakawat", "aram", "sukoon",
-    
-    # Feelings and emotions
-    "udas", "udaas", "pareshan", "preshan", "ghabra", "ghabrahat",
-    "akela", "akeli", "akele", "tanha", "tanhai",
-    "dar", "darr", "khauf", "khof", "stress",
-    "thak", "thaka", "thaki", "thake", "thakgaya", "thakgayi",
-    "rona", "roya", "royi", "roye", "ro", "aansu", "aansoo",
-    "hasna", "hasa", "hasi", "hanse", "muskurana", "muskura",
-    "gussa", "ghussa", "naraz", "upset",
-    
-    # Common phrases and expressions
-    "kuch", "koi", "sab", "bohot", "bahut", "bohat", "zyada", "ziada",
-    "thoda", "thodi", "thore", "kam", "bilkul", "bilkool",
-    "acha", "achi", "ache", "bura", "buri", "bure",
-    "theek", "thik", "sahi", "galat", "mushkil", "aasan", "asan",
-    "pehle", "baad", "abhi", "ab", "phir", "fir",
-    "lekin", "magar", "par", "kyunke", "kyonke", "isliye", "islye",
-    "shayad", "zaroor", "zarur", "hamesha", "kabhi", "kabho",
-    "sirf", "bas", "bhi", "aur", "ya", "nahi", "nhi", "na", "mat", "haan", "han", "ji",
-    "please", "plz", "pls", "shukriya", "shukria", "meherbani",
-    
-    # Common shorthand
-    "kr", "kro", "krna", "krta", "krti", "krte",
-    "h", "hn", "ni", "shi", "toh", "to",
-    "bs", "bss", "aur", "or",
-    "pta", "btao", "btana", "smjh", "smjha",
-    "ap", "apko", "apka", "apki",
-    "mjhe", "mjh", "hmara", "hmari", "tmhara", "tmhari",
-    "kbi", "kbhi", "hmesa", "phle", "bd",
-    
-    # Question words shorthand
-    "q", "kyu", "kya", "kn", "kb", "kha", "kese", "kaise",
-    
-    # Greetings
-    "salam", "assalam", "walaikum", "alikum", "slm",
-    "khuda", "allah", "hafiz", "janab",
-}
+from .lexicons import SHORT_ENGLISH_GREETINGS, SHORT_CLEAR_URDU
+from .text_analysis import TextAnalysis, analyze_text
+from .language_id import detect_script, word_language_score
 
-# Common English words to help differentiate
-COMMON_ENGLISH_WORDS = {
-    "the", "is", "are", "was", "were", "been", "being",
-    "have", "has", "had", "having", "do", "does", "did",
-    "will", "would", "could", "should", "may", "might",
-    "must", "shall", "can", "need", "dare", "ought",
-    "i", "me", "my", "myself", "we", "our", "ours",
-    "you", "your", "yours", "he", "him", "his", "she", "her",
-    "it", "its", "they", "them", "their", "what", "which",
-    "who", "whom", "this", "that", "these", "those",
-    "am", "been", "being", "because", "but", "and", "or",
-    "feeling", "feel", "felt", "think", "thought", "know",
-    "help", "want", "need", "like", "love", "hate",
-    "happy", "sad", "angry", "scared", "worried", "anxious",
-    "depressed", "stressed", "tired", "exhausted", "overwhelmed",
-    "today", "yesterday", "tomorrow", "now", "always", "never",
-    "sometimes", "often", "usually", "really", "very", "much",
-    # Greetings (prevent misclassification)
-    "hi", "hello", "hey", "good", "morning", "evening", "night",
-    "thanks", "thank", "please", "sorry", "okay", "ok", "yes", "no",
-    "how", "are", "doing", "going", "fine", "well", "great",
-}
+# Per-word evidence, in log-likelihood units (positive = Roman Urdu)
+LEXICON_EVIDENCE = 8.0   # Added for a word found on exactly one of the word lists
+WORD_SCORE_CAP = 20.0    # So one long word can't outvote the rest of the message
+WORD_MARGIN = 3.0        # Words scoring closer to zero than this count for neither language
 
+# A message is mixed when both languages have at least this many words and this share
+MIXED_MIN_WORDS = 2
+MIXED_MIN_SHARE = 0.2
 
-def detect_language(text: str) -> Tuple[str, float]:
+
+def detect_language(text: Union[str, TextAnalysis]) -> Tuple[str, float]:
     """
-    Detect if text is in Roman Urdu, English, or mixed.
+    Detect if text is in Roman Urdu, English, mixed, or a non-Latin script.
+    
+    Urdu and Hindi script are recognised by Unicode range. Latin-script
+    words are scored by the character n-gram model in language_id.py, plus
+    the word lists in lexicons.py as extra evidence.
+    
+    Args:
+        text: User's message text, or its TextAnalysis from analyze_text()
     
     Returns:
         Tuple of (language, confidence)
-        language: "roman_urdu", "english", or "mixed"
+        language: "roman_urdu", "english", "mixed", "urdu" (Urdu script) or "hindi" (Devanagari)
         confidence: float from 0 to 1
     """
-    if not text or not text.strip():
+    if not text:
+        return "english", 0.0
+    
+    analysis = analyze_text(text)
+    if not analysis.normalized:
         return "english", 0.0
     
-    text_lower = text.lower().strip()
+    script = detect_script(analysis.text)
+    if script:
+        return script
     
-    # Remove punctuation for word matching
-    clean_text = re.sub(r'[^\w\s]', '', text_lower)
-    words = clean_text.split()
+    words = analysis.words
     
     if not words:
         return "english", 0.0
@@ -127,64 +54,56 @@ def detect_language(text: str) -> Tuple[str, float]:
     # Short messages (1-2 words): default to English unless clearly Roman Urdu
     # This prevents greetings like "Hi", "Hello", "Hey" from being misclassified
     if len(words) <= 2:
-        english_greetings = {"hi", "hello", "hey", "yo", "sup", "thanks", "ok", "okay", "yes", "no", "good", "fine", "great", "help", "please"}
-        if any(w in english_greetings for w in words):
+        if any(w in SHORT_ENGLISH_GREETINGS for w in words):
             return "english", 0.9
         # Only classify as Roman Urdu if the word is clearly Urdu (not ambiguous)
-        clear_urdu = {"salam", "assalam", "walaikum", "kaise", "kya", "mujhe", "batao", "haan", "nahi", "bohot", "bhai", "yaar"}
-        if any(w in clear_urdu for w in words):
+        if any(w in SHORT_CLEAR_URDU for w in words):
             return "roman_urdu", 0.8
         # Default short messages to English
         return "english", 0.7
     
-    roman_urdu_count = 0
-    english_count = 0
-    
-    for word in words:
-        if word in ROMAN_URDU_WORDS:
+    # Word-list hits come from the shared single-pass matcher (keyed by end index)
+    roman_urdu_positions = analysis.positions.get("roman_urdu", set())
+    english_positions = analysis.positions.get("english", set())
+    
+    roman_urdu_count = english_count = 0
+    total_score = 0.0
+    for index, word in enumerate(words):
+        if not (word.isascii() and word.isalpha()):
+            continue
+        score = word_language_score(word)
+        in_roman_urdu = index + 1 in roman_urdu_positions
+        if in_roman_urdu != (index + 1 in english_positions):
+            score += LEXICON_EVIDENCE if in_roman_urdu else -LEXICON_EVIDENCE
+        score = max(-WORD_SCORE_CAP, min(score, WORD_SCORE_CAP))
+        
+        total_score += score
+        if score >= WORD_MARGIN:
             roman_urdu_count += 1
-        elif word in COMMON_ENGLISH_WORDS:
+        elif score <= -WORD_MARGIN:
             english_count += 1
     
-    total_matched = roman_urdu_count + english_count
-    total_words = len(words)
-    
-    # If very few words matched, try pattern-based detection
-    if total_matched < total_words * 0.3:
-        # Check for Roman Urdu patterns
-        roman_urdu_patterns = [
-            r'\b(kya|kaise|kyun|kahan|kab)\b',  # Question words
-            r'\b(hai|hain|tha|thi|ho)\b',       # Common verbs
-            r'\b(mera|meri|tera|teri|aap)\b',   # Pronouns
-            r'\b(nahi|nhi|mat|haan|han)\b',     # Yes/No
-            r'\b(bohot|bahut|bohat|zyada)\b',   # Intensifiers
-        ]
-        
-        for pattern in roman_urdu_patterns:
-            if re.search(pattern, text_lower):
-                roman_urdu_count += 1
+    decided = roman_urdu_count + english_count
+    if decided == 0:
+        return "english", 0.5
     
-    # Calculate confidence
-    if total_words == 0:
-        return "english", 0.0
+    # Mixed language: both have significant presence
+    if (roman_urdu_count >= MIXED_MIN_WORDS and english_count >= MIXED_MIN_WORDS
+            and min(roman_urdu_count, english_count) / decided >= MIXED_MIN_SHARE):
+        return "mixed", round(decided / len(words), 2)
     
-    roman_urdu_ratio = roman_urdu_count / total_words
-    english_ratio = english_count / total_words
+    if total_score > 0:
+        return "roman_urdu", round(roman_urdu_count / decided, 2)
+    return "english", round(english_count / decided, 2)
+
+
+def detect_languages(texts: Iterable[Union[str, TextAnalysis]]) -> List[Tuple[str, float]]:
+    """
+    detect_language() over several texts, in order.
     
-    # Decision logic
-    # Mixed language: both have significant presence
-    if roman_urdu_count >= 2 and english_count >= 2 and roman_urdu_ratio >= 0.2 and english_ratio >= 0.2:
-        confidence = min((roman_urdu_ratio + english_ratio) / 2 + 0.3, 1.0)
-        return "mixed", confidence
-    elif roman_urdu_ratio >= 0.3 or roman_urdu_count >= 2:
-        confidence = min(roman_urdu_ratio + 0.3, 1.0)
-        return "roman_urdu", confidence
-    elif english_ratio >= 0.5:
-        return "english", english_ratio
-    elif roman_urdu_count > english_count:
-        return "roman_urdu", roman_urdu_ratio + 0.2
-    else:
-        return "english", 0.5
+    A convenience, not a faster path: the cost is per message either way.
+    """
+    return [detect_language(text) for text in texts]
 
 
 def get_language_instruction(detected_language: str) -> str:
@@ -214,6 +133,21 @@ Tone examples:
 "Main samajh sakta hoon tum kya mehsoos kar rahe ho."
 "Yeh feeling bohat bhari hoti hai."
 "Har takleef ka hal foran nahi milta, kabhi sirf sun lena hi kaafi hota hai."
+"""
+    elif detected_language == "urdu":
+        return """
+────────────────────────────────
+LANGUAGE INSTRUCTION (CRITICAL)
+────────────────────────────────
+
+The user is writing in URDU SCRIPT. You MUST respond ENTIRELY in URDU SCRIPT.
+
+Rules:
+- Write in Urdu (Nastaliq / Arabic letters), not in English letters
+- Use PAKISTANI Urdu vocabulary ONLY
+- Keep it simple, warm and conversational, not formal or literary
+- Do NOT respond in English or Roman Urdu
+- Do NOT use Hindi words or Devanagari
 """
     elif detected_language == "mixed":
         return """
@@ -251,17 +185,26 @@ Rules:
 """
 
 
-def format_language_context(text: str) -> str:
+def format_language_context(text: str, detected: Optional[Tuple[str, float]] = None) -> str:
     """
     Analyze text and return language context for the prompt.
     Always returns a language instruction to enforce strict language mirroring.
+    
+    Args:
+        text: User's message text
+        detected: Result of detect_language(text), if already computed
     """
-    language, confidence = detect_language(text)
+    language, confidence = detected or detect_language(text)
     
     if language == "roman_urdu" and confidence >= 0.3:
         return get_language_instruction("roman_urdu")
     elif language == "mixed" and confidence >= 0.3:
         return get_language_instruction("mixed")
+    elif language == "urdu":
+        return get_language_instruction("urdu")
+    elif language == "hindi":
+        # Spoken Hindi and Urdu are mutually intelligible; Sukoon answers in Roman Urdu
+        return get_language_instruction("roman_urdu")
     
     # Always return English instruction for English input
     return get_language_instruction("english")
@@ -0,0 +1,225 @@
+# CHARACTER N-GRAM LANGUAGE IDENTIFIER
+"""
+Naive Bayes language identification over character n-grams.
+
+Each word is padded ("_word_") and split into 1- to 3-character n-grams.
+The n-grams are hashed into a fixed number of buckets, so the model is a
+flat float32 array of log-probabilities per language with no vocabulary
+to store. The tables live in data/language_ngrams.bin (little-endian, so
+the file reads the same on any host) and are loaded once per process.
+
+Rebuild the tables after editing the training text:
+    python -m utils.language_id build
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import zlib
+from array import array
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from . import metrics
+from .lexicons import ROMAN_URDU_WORDS, COMMON_ENGLISH_WORDS
+from .spelling import canonicalize_words
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+MODEL_PATH = os.path.join(DATA_DIR, "language_ngrams.bin")
+CORPUS_DIR = os.path.join(DATA_DIR, "language_corpus")
+
+MODEL_MAGIC = b"SKLNG1\n"
+NGRAM_ORDERS = (1, 2, 3)
+NUM_BUCKETS = 1 << 14
+SMOOTHING = 0.5
+LANGUAGES = ("english", "roman_urdu")  # Latin-script classes the tables are trained on
+
+# Non-Latin scripts are decided by Unicode range, before any n-gram scoring
+ARABIC_SCRIPT = re.compile(r"[؀-ۿݐ-ݿﭐ-﷿ﹰ-﻿]")
+DEVANAGARI_SCRIPT = re.compile(r"[ऀ-ॿ]")
+LATIN_LETTER = re.compile(r"[a-zA-Z]")
+
+
+def word_ngrams(word: str) -> List[str]:
+    """Character n-grams of one lowercased word, with boundary markers."""
+    padded = f"_{word}_"
+    return [
+        padded[i:i + n]
+        for n in NGRAM_ORDERS
+        for i in range(len(padded) - n + 1)
+    ]
+
+
+def ngram_bucket(ngram: str) -> int:
+    """Stable hash bucket for an n-gram (crc32, unlike hash(), is not salted per process)."""
+    return zlib.crc32(ngram.encode("utf-8")) & (NUM_BUCKETS - 1)
+
+
+class NGramLanguageModel:
+    """Log-probability tables for each language, one array of NUM_BUCKETS floats each."""
+
+    def __init__(self, languages: Tuple[str, ...], tables: Dict[str, array]):
+        self.languages = languages
+        self.tables = tables
+
+        # Two-class models only ever need the log-likelihood ratio, so it is precomputed
+        if len(languages) == 2:
+            first, second = (tables[language] for language in languages)
+            self._ratio = array("f", (b - a for a, b in zip(first, second)))
+        else:
+            self._ratio = None
+
+    @classmethod
+    def load(cls, path: str = MODEL_PATH) -> "NGramLanguageModel":
+        """Load tables written by save()."""
+        with open(path, "rb") as f:
+            if f.readline() != MODEL_MAGIC:
+                raise ValueError(f"{path} is not a language n-gram table file")
+            header = json.loads(f.readline())
+            if header["buckets"] != NUM_BUCKETS or tuple(header["orders"]) != NGRAM_ORDERS:
+                raise ValueError(f"{path} was built with different n-gram settings; rebuild it")
+            tables = {}
+            for language in header["languages"]:
+                table = array("f")
+                table.fromfile(f, NUM_BUCKETS)
+                if sys.byteorder == "big":
+                    table.byteswap()
+                tables[language] = table
+        return cls(tuple(header["languages"]), tables)
+
+    def save(self, path: str = MODEL_PATH):
+        header = {"languages": list(self.languages), "buckets": NUM_BUCKETS, "orders": list(NGRAM_ORDERS)}
+        with open(path, "wb") as f:
+            f.write(MODEL_MAGIC)
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            for language in self.languages:
+                table = self.tables[language]
+                if sys.byteorder == "big":
+                    table = array("f", table)
+                    table.byteswap()
+                table.tofile(f)
+
+    @classmethod
+    def train(cls, samples: Dict[str, Iterable[str]]) -> "NGramLanguageModel":
+        """
+        Count hashed n-grams per language and turn them into smoothed log-probabilities.
+
+        Args:
+            samples: Language -> lines of training text
+        """
+        tables = {}
+        for language, lines in samples.items():
+            counts = [0] * NUM_BUCKETS
+            for line in lines:
+                for word in tokenize(line):
+                    for ngram in word_ngrams(word):
+                        counts[ngram_bucket(ngram)] += 1
+            denominator = sum(counts) + SMOOTHING * NUM_BUCKETS
+            tables[language] = array("f", (math.log((count + SMOOTHING) / denominator) for count in counts))
+        return cls(tuple(samples), tables)
+
+    def word_score(self, word: str) -> float:
+        """
+        Log-likelihood ratio of the second language over the first for one word.
+
+        Positive means the word looks like LANGUAGES[1] (Roman Urdu).
+        """
+        ratio = self._ratio
+        return sum(ratio[ngram_bucket(ngram)] for ngram in word_ngrams(word))
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased words with Roman Urdu spellings canonicalized, as TextAnalysis.words has them."""
+    return canonicalize_words(re.findall(r"[a-z]+", text.lower()))
+
+
+def build_language_model(corpus_dir: str = CORPUS_DIR) -> NGramLanguageModel:
+    """
+    Train on data/language_corpus/<language>.txt plus the word lists in lexicons.py.
+
+    A word on both lists is left out of both.
+    """
+    samples = {}
+    for language in LANGUAGES:
+        with open(os.path.join(corpus_dir, f"{language}.txt"), "r", encoding="utf-8") as f:
+            samples[language] = [line for line in f if line.strip()]
+
+    roman_urdu_words = set(canonicalize_words(list(ROMAN_URDU_WORDS)))
+    shared = roman_urdu_words & COMMON_ENGLISH_WORDS
+    samples["english"] += sorted(COMMON_ENGLISH_WORDS - shared)
+    samples["roman_urdu"] += sorted(roman_urdu_words - shared)
+    return NGramLanguageModel.train(samples)
+
+
+_model: Optional[NGramLanguageModel] = None
+
+
+def get_language_model() -> NGramLanguageModel:
+    """The process-wide model, loaded from MODEL_PATH on first use."""
+    global _model
+    if _model is None:
+        _model = NGramLanguageModel.load()
+    return _model
+
+
+@lru_cache(maxsize=8192)
+def word_language_score(word: str) -> float:
+    """
+    Cached NGramLanguageModel.word_score(); chat vocabulary repeats a lot.
+    
+    Pass canonical spellings (TextAnalysis.words) so variants share one entry.
+    """
+    return get_language_model().word_score(word)
+
+
+def _word_cache_stats() -> List[Tuple[str, str, str, float]]:
+    info = word_language_score.cache_info()
+    return [
+        ("language_word_cache_hits_total", "counter", "Word language scores served from cache", info.hits),
+        ("language_word_cache_misses_total", "counter", "Word language scores computed", info.misses),
+        ("language_word_cache_size", "gauge", "Words in the language score cache", info.currsize)
+    ]
+
+
+metrics.register_collector(_word_cache_stats)
+
+
+def detect_script(text: str) -> Optional[Tuple[str, float]]:
+    """
+    Unicode-range fast path for non-Latin scripts.
+
+    Returns:
+        ("urdu", share) when Arabic-script letters outnumber Latin letters,
+        ("hindi", share) for Devanagari, or None to fall through to n-gram scoring
+    """
+    arabic = len(ARABIC_SCRIPT.findall(text))
+    devanagari = len(DEVANAGARI_SCRIPT.findall(text))
+    if not arabic and not devanagari:
+        return None
+
+    latin = len(LATIN_LETTER.findall(text))
+    total = arabic + devanagari + latin
+    if arabic > latin and arabic >= devanagari:
+        return "urdu", round(arabic / total, 2)
+    if devanagari > latin:
+        return "hindi", round(devanagari / total, 2)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the character n-gram language tables.")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--corpus", default=CORPUS_DIR)
+    parser.add_argument("--output", default=MODEL_PATH)
+    args = parser.parse_args()
+
+    model = build_language_model(args.corpus)
+    model.save(args.output)
+    print(f"Wrote {len(model.languages)} x {NUM_BUCKETS} log-probability tables to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
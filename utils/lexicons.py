@@ -0,0 +1,223 @@
+# LEXICONS
+"""
+Word and phrase lists shared by the sentiment, crisis and language modules.
+
+Every entry here is matched by the single-pass phrase matcher in
+text_analysis.py, so multi-word entries ("can't cope") work the same as
+single words.
+"""
+
+# EMOTIONAL KEYWORDS
+# Custom keywords for mental health context, grouped by the emotion they signal
+NEGATIVE_EMOTION_CATEGORIES = {
+    "sadness": {
+        "sad", "depressed", "hopeless", "empty", "worthless", "crying", "tears",
+        "lonely", "alone", "miserable", "broken", "hurt", "pain", "suffering"
+    },
+    "anxiety": {
+        "anxious", "worried", "scared", "fearful", "panicking", "nervous",
+        "terrified", "dread", "overwhelmed", "restless", "uneasy"
+    },
+    "stress": {
+        "stressed", "exhausted", "burnout", "tired", "drained", "pressure",
+        "overworked", "struggling", "can't cope", "falling apart"
+    },
+    "overthinking": {
+        "overthinking", "ruminating", "can't stop thinking", "racing thoughts",
+        "spiraling", "obsessing", "intrusive", "what if", "worst case"
+    }
+}
+
+NEGATIVE_INDICATORS = set().union(*NEGATIVE_EMOTION_CATEGORIES.values())
+
+POSITIVE_INDICATORS = {
+    "happy", "grateful", "thankful", "blessed", "peaceful", "calm",
+    "hopeful", "better", "improving", "good", "great", "fine", "okay",
+    "relaxed", "content", "proud", "accomplished", "strong"
+}
+
+INTENSITY_MODIFIERS = {
+    "very", "really", "extremely", "so", "incredibly", "absolutely",
+    "completely", "totally", "truly", "deeply", "seriously"
+}
+
+
+# SENTIMENT WEIGHTS
+# Polarity of each scored word or phrase, from -1 (very negative) to 1 (very positive).
+# Indicator entries not listed here fall back to the default weights in sentiment.py.
+ENGLISH_SENTIMENT_WEIGHTS = {
+    # Sadness
+    "sad": -0.6, "depressed": -0.8, "hopeless": -0.9, "empty": -0.6, "worthless": -0.9,
+    "crying": -0.6, "cry": -0.5, "tears": -0.4, "lonely": -0.6, "alone": -0.4,
+    "miserable": -0.9, "broken": -0.7, "hurt": -0.6, "pain": -0.6, "suffering": -0.8,
+    "unhappy": -0.7, "numb": -0.5, "lost": -0.4, "useless": -0.8, "failure": -0.7,
+    "guilty": -0.6, "ashamed": -0.7,
+    
+    # Anxiety
+    "anxious": -0.6, "worried": -0.5, "scared": -0.6, "afraid": -0.6, "fearful": -0.6,
+    "panic": -0.7, "panicking": -0.8, "nervous": -0.4, "terrified": -0.8, "dread": -0.7,
+    "overwhelmed": -0.7, "restless": -0.4, "uneasy": -0.4,
+    
+    # Stress and anger
+    "stressed": -0.6, "exhausted": -0.6, "burnout": -0.7, "tired": -0.4, "drained": -0.6,
+    "pressure": -0.4, "overworked": -0.5, "struggling": -0.6, "angry": -0.6, "upset": -0.6,
+    "frustrated": -0.6, "hate": -0.8,
+    
+    # Overthinking
+    "overthinking": -0.5, "ruminating": -0.5, "spiraling": -0.7, "obsessing": -0.5,
+    "intrusive": -0.5, "what if": -0.3, "worst case": -0.5, "racing thoughts": -0.6,
+    "can't stop thinking": -0.6,
+    
+    # Phrases
+    "can't cope": -0.8, "can't handle": -0.7, "can't take it": -0.8, "falling apart": -0.8,
+    "breaking down": -0.8, "too much": -0.5, "give up": -0.7,
+    
+    # General evaluation
+    "bad": -0.7, "worse": -0.7, "worst": -1.0, "terrible": -1.0, "awful": -1.0,
+    "horrible": -1.0, "sick": -0.5,
+    
+    # Positive
+    "happy": 0.8, "glad": 0.6, "grateful": 0.8, "thankful": 0.7, "blessed": 0.7,
+    "peaceful": 0.7, "calm": 0.5, "relaxed": 0.6, "relieved": 0.6, "content": 0.5,
+    "hopeful": 0.6, "hope": 0.4, "better": 0.5, "improving": 0.5, "proud": 0.7,
+    "accomplished": 0.7, "strong": 0.5, "confident": 0.6, "motivated": 0.6, "safe": 0.5,
+    "excited": 0.6, "joy": 0.8, "enjoy": 0.5, "enjoyed": 0.5, "love": 0.6,
+    "good": 0.7, "great": 0.8, "nice": 0.5, "amazing": 0.9, "wonderful": 0.9,
+    "fine": 0.3, "okay": 0.2, "thanks": 0.4, "thank you": 0.4
+}
+
+ROMAN_URDU_SENTIMENT_WEIGHTS = {
+    # Negative
+    "udaas": -0.6, "udaasi": -0.6, "dukhi": -0.7, "dukh": -0.6, "gham": -0.7,
+    "pareshan": -0.6, "ghabra": -0.6, "ghabrahat": -0.6,
+    "bechain": -0.6, "bechaini": -0.6, "tension": -0.5, "fikr": -0.4,
+    "akela": -0.5, "akeli": -0.5, "tanha": -0.6, "tanhai": -0.6,
+    "darr": -0.5, "khauf": -0.7, "dard": -0.6, "takleef": -0.6,
+    "thaka": -0.4, "thaki": -0.4, "thak": -0.4, "rona": -0.5, "aansu": -0.5,
+    "gussa": -0.6, "naraz": -0.5, "mushkil": -0.4,
+    "bura": -0.7, "buri": -0.7, "bure": -0.7, "bekaar": -0.7, "bekar": -0.7,
+    "barbaad": -0.8, "mayoos": -0.8, "naummeed": -0.9,
+    
+    # Positive
+    "acha": 0.6, "achi": 0.6, "ache": 0.6, "theek": 0.3, "sahi": 0.4,
+    "khush": 0.8, "khushi": 0.7, "sukoon": 0.7, "behtar": 0.6, "aram": 0.4,
+    "umeed": 0.5, "pyar": 0.6, "mohabbat": 0.6, "zabardast": 0.9,
+    "shukriya": 0.4, "alhamdulillah": 0.6
+}
+
+# Negation words that come before what they negate ("not happy")
+NEGATION_WORDS = {
+    "not", "no", "never", "dont", "doesnt", "didnt", "isnt", "wasnt", "arent", "werent",
+    "cant", "cannot", "wont", "couldnt", "havent", "hardly", "barely"
+}
+
+# Roman Urdu negation usually follows what it negates ("khush nahi")
+ROMAN_URDU_NEGATIONS = {"nahi", "mat"}
+
+# Roman Urdu counterparts of INTENSITY_MODIFIERS. Only used for scoring polarity.
+ROMAN_URDU_INTENSIFIERS = {"bohot", "zyada", "bilkul", "itna", "itni", "kaafi"}
+
+
+# Phrases that on their own mark a message as intense
+INTENSE_PHRASES = [
+    "can't cope", "can't handle", "falling apart", "breaking down",
+    "can't take it", "too much", "end it all", "give up"
+]
+
+
+# LANGUAGE WORD LISTS
+# Common Roman Urdu words and patterns
+ROMAN_URDU_WORDS = {
+    # Pronouns
+    "mera", "meri", "mere", "tera", "teri", "tere", "uska", "uski", "uske",
+    "hamara", "hamari", "hamare", "tumhara", "tumhari", "tumhare",
+    "mujhe", "tujhe", "aap", "aapka", "aapki", "aapko", "hum", "tum",
+    "woh", "yeh", "kya", "kaun", "kahan", "kab", "kyun", "kaise",
+    
+    # Common verbs
+    "hai", "hain", "ho", "tha", "thi", "the", "hoga", "hogi", "hoge",
+    "kar", "karo", "karna", "karta", "karti", "karte", "karein", "karunga", "karungi",
+    "bol", "bolo", "bolna", "bolta", "bolti", "bolte", "batao", "batana", "bata",
+    "sun", "suno", "sunna", "sunta", "sunti", "sunte", "sunao",
+    "dekh", "dekho", "dekhna", "dekhta", "dekhti", "dekhte",
+    "ja", "jao", "jana", "jata", "jati", "jate", "jaana", "jayega", "jayegi",
+    "aa", "aao", "aana", "aata", "aati", "aate", "aaonga", "aaongi",
+    "le", "lo", "lena", "leta", "leti", "lete", "liya", "liye",
+    "de", "do", "dena", "deta", "deti", "dete", "diya", "diye",
+    "raha", "rahi", "rahe", "raho", "rehna", "rehta", "rehti",
+    "sakta", "sakti", "sakte", "sakein",
+    "chahiye", "chahte", "chahti", "chaahta", "chaahti",
+    "laga", "lagi", "lage", "lagta", "lagti", "lagte",
+    "pata", "pati", "maloom", "samajh", "samjha", "samjho",
+    "horha", "horhi", "horhe", "horai", "hora",
+    "karha", "karhi", "karhe",
+    
+    # Common nouns
+    "dil", "dimagh", "sir", "sar", "dard", "drd", "takleef",
+    "zindagi", "maut", "pyar", "mohabbat", "ishq",
+    "ghar", "kaam", "kam", "paisa", "paise", "waqt", "time",
+    "raat", "din", "subah", "shaam", "kal", "aaj", "parso",
+    "dost", "bhai", "behen", "maa", "baap", "abbu", "ammi",
+    "log", "banda", "bande", "insaan", "aadmi", "aurat", "larki", "larka",
+    "khushi", "gham", "udaas", "udaasi", "tension", "fikr",
+    "neend", "thakan", "thakawat", "aram", "sukoon",
+    
+    # Feelings and emotions
+    "udaas", "pareshan", "ghabra", "ghabrahat",
+    "akela", "akeli", "akele", "tanha", "tanhai",
+    "darr", "khauf", "stress",
+    "thak", "thaka", "thaki", "thake", "thakgaya", "thakgayi",
+    "rona", "roya", "royi", "roye", "ro", "aansu",
+    "hasna", "hasa", "hasi", "hanse", "muskurana", "muskura",
+    "gussa", "naraz", "upset",
+    
+    # Common phrases and expressions
+    "kuch", "koi", "sab", "bohot", "zyada",
+    "thoda", "thore", "kam", "bilkul",
+    "acha", "achi", "ache", "bura", "buri", "bure",
+    "theek", "sahi", "galat", "mushkil", "aasan",
+    "pehle", "baad", "abhi", "ab", "phir",
+    "lekin", "magar", "par", "kyunke", "isliye",
+    "shayad", "zaroor", "zarur", "hamesha", "kabhi", "kabho",
+    "sirf", "bas", "bhi", "aur", "ya", "nahi", "na", "mat", "haan", "han", "ji",
+    "please", "plz", "pls", "shukriya", "meherbani",
+    
+    # Common shorthand (spelling variants like "kr", "nhi" and "bht" are folded
+    # to their canonical form by spelling.py, so only the canonical form is listed)
+    "toh", "to", "aur", "or", "bd", "mujh",
+    
+    # Question words shorthand
+    "q", "kya", "kn", "kb", "kha", "kaise",
+    
+    # Greetings
+    "salam", "assalam", "walaikum", "alikum",
+    "khuda", "allah", "hafiz", "janab",
+}
+
+# Common English words to help differentiate
+COMMON_ENGLISH_WORDS = {
+    "the", "is", "are", "was", "were", "been", "being",
+    "have", "has", "had", "having", "do", "does", "did",
+    "will", "would", "could", "should", "may", "might",
+    "must", "shall", "can", "need", "dare", "ought",
+    "i", "me", "my", "myself", "we", "our", "ours",
+    "you", "your", "yours", "he", "him", "his", "she", "her",
+    "it", "its", "they", "them", "their", "what", "which",
+    "who", "whom", "this", "that", "these", "those",
+    "am", "been", "being", "because", "but", "and", "or",
+    "feeling", "feel", "felt", "think", "thought", "know",
+    "help", "want", "need", "like", "love", "hate",
+    "happy", "sad", "angry", "scared", "worried", "anxious",
+    "depressed", "stressed", "tired", "exhausted", "overwhelmed",
+    "today", "yesterday", "tomorrow", "now", "always", "never",
+    "sometimes", "often", "usually", "really", "very", "much",
+    # Greetings (prevent misclassification)
+    "hi", "hello", "hey", "good", "morning", "evening", "night",
+    "thanks", "thank", "please", "sorry", "okay", "ok", "yes", "no",
+    "how", "are", "doing", "going", "fine", "well", "great",
+}
+
+
+# Short messages (1-2 words) that are clearly English or clearly Roman Urdu
+SHORT_ENGLISH_GREETINGS = {"hi", "hello", "hey", "yo", "sup", "thanks", "ok", "okay", "yes", "no", "good", "fine", "great", "help", "please"}
+SHORT_CLEAR_URDU = {"salam", "assalam", "walaikum", "kaise", "kya", "mujhe", "batao", "haan", "nahi", "bohot", "bhai", "yaar"}
@@ -0,0 +1,340 @@
+# IN-PROCESS METRICS
+"""
+Lightweight, thread-safe counters, gauges and histograms.
+
+All Streamlit sessions run as threads inside one server process, so a
+module-level registry is enough to see what the whole worker is doing.
+"""
+
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Default latency buckets in seconds (upper bounds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Counter:
+    """Monotonically increasing count."""
+
+    def __init__(self, name: str, help_text: str = ""):
+        self.name = name
+        self.help_text = help_text
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class LabeledCounter:
+    """Counters split by the value of one label, exported as name{label="value"}."""
+
+    def __init__(self, name: str, help_text: str = "", label: str = "label"):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self._values: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_value: str, amount: float = 1.0):
+        with self._lock:
+            self._values[label_value] = self._values.get(label_value, 0.0) + amount
+
+    @property
+    def values(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._values)
+
+
+class Gauge:
+    """Value that can go up and down (e.g. queue depth)."""
+
+    def __init__(self, name: str, help_text: str = ""):
+        self.name = name
+        self.help_text = help_text
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float):
+        with self._lock:
+            self._value = value
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self._value -= amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Histogram:
+    """Bucketed distribution of observed values."""
+
+    def __init__(self, name: str, help_text: str = "", buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> Dict:
+        """Return cumulative bucket counts, sum and count."""
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative: List[Tuple[float, int]] = []
+        running = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            running += bucket_count
+            cumulative.append((bound, running))
+        return {"buckets": cumulative, "sum": total, "count": count}
+
+
+class LabeledHistogram:
+    """Histograms split by the value of one label, exported as name_bucket{label="value",le=...}."""
+
+    def __init__(self, name: str, help_text: str = "", label: str = "label",
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = tuple(sorted(buckets))
+        self._children: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value: str, value: float):
+        # Lock-free lookup on the hot path; the lock only guards creating a series
+        child = self._children.get(label_value)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(label_value, Histogram(self.name, self.help_text, self.buckets))
+        child.observe(value)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Bucket snapshot per label value."""
+        with self._lock:
+            children = dict(self._children)
+        return {label_value: child.snapshot() for label_value, child in children.items()}
+
+
+# REGISTRY
+_registry: Dict[str, object] = {}
+_registry_lock = threading.Lock()
+
+# Callbacks returning (name, type, help, value) for values kept elsewhere, read at export time
+_collectors: List[Callable[[], List[Tuple[str, str, str, float]]]] = []
+
+# Extra pages on the metrics server: path -> callback returning (content type, body)
+_endpoints: Dict[str, Callable[[], Tuple[str, str]]] = {}
+
+
+def _get_or_create(cls, name: str, help_text: str, **kwargs):
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = cls(name, help_text, **kwargs)
+            _registry[name] = metric
+        elif not isinstance(metric, cls):
+            raise TypeError(f"Metric '{name}' is already registered as {type(metric).__name__}")
+        return metric
+
+
+def counter(name: str, help_text: str = "") -> Counter:
+    """Get or create a counter."""
+    return _get_or_create(Counter, name, help_text)
+
+
+def labeled_counter(name: str, help_text: str = "", label: str = "label") -> LabeledCounter:
+    """
+    Get or create a counter split by one label, e.g. reason.
+
+    Use this instead of building metric names from values: the label keeps
+    them one family that can be summed and filtered.
+    """
+    return _get_or_create(LabeledCounter, name, help_text, label=label)
+
+
+def labeled_histogram(name: str, help_text: str = "", label: str = "label",
+                      buckets: Optional[Tuple[float, ...]] = None) -> LabeledHistogram:
+    """Get or create a histogram split by one label, e.g. stage (see labeled_counter())."""
+    return _get_or_create(LabeledHistogram, name, help_text, label=label, buckets=buckets or DEFAULT_BUCKETS)
+
+
+def gauge(name: str, help_text: str = "") -> Gauge:
+    """Get or create a gauge."""
+    return _get_or_create(Gauge, name, help_text)
+
+
+def histogram(name: str, help_text: str = "", buckets: Optional[Tuple[float, ...]] = None) -> Histogram:
+    """Get or create a histogram."""
+    return _get_or_create(Histogram, name, help_text, buckets=buckets or DEFAULT_BUCKETS)
+
+
+def snapshot() -> Dict[str, Dict]:
+    """
+    Return a plain-dict view of every registered metric.
+
+    Counters and gauges map to {"value": ...}, labeled counters to
+    {"label": ..., "values": {label value: count}}, histograms to their
+    bucket snapshot, and labeled histograms to {"label": ...,
+    "series": {label value: bucket snapshot}}.
+    """
+    with _registry_lock:
+        metrics = list(_registry.values())
+
+    result = {}
+    for metric in metrics:
+        if isinstance(metric, Histogram):
+            result[metric.name] = {"type": "histogram", **metric.snapshot()}
+        elif isinstance(metric, LabeledHistogram):
+            result[metric.name] = {"type": "histogram", "label": metric.label, "series": metric.snapshot()}
+        elif isinstance(metric, LabeledCounter):
+            result[metric.name] = {"type": "counter", "label": metric.label, "values": metric.values}
+        else:
+            kind = "counter" if isinstance(metric, Counter) else "gauge"
+            result[metric.name] = {"type": kind, "value": metric.value}
+    return result
+
+
+def register_collector(collect: Callable[[], List[Tuple[str, str, str, float]]]):
+    """
+    Export values that live outside the registry (e.g. lru_cache statistics).
+
+    Args:
+        collect: Called on every export; returns (name, "counter" or "gauge", help, value) tuples
+    """
+    with _registry_lock:
+        _collectors.append(collect)
+
+
+def add_endpoint(path: str, render: Callable[[], Tuple[str, str]]):
+    """
+    Serve another read-only page next to /metrics (e.g. a JSON debugging view).
+
+    Args:
+        path: URL path, e.g. "/sessions"
+        render: Called per request; returns (content type, body), or
+            (content type, body, status) for a status other than 200
+    """
+    with _registry_lock:
+        _endpoints[path] = render
+
+
+# PROMETHEUS EXPORT
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus() -> str:
+    """Every registered metric and collected value in the Prometheus text exposition format."""
+    with _registry_lock:
+        collectors = list(_collectors)
+
+    lines = []
+    for name, data in sorted(snapshot().items()):
+        metric = _registry[name]
+        if metric.help_text:
+            lines.append(f"# HELP {name} {metric.help_text}")
+        lines.append(f"# TYPE {name} {data['type']}")
+        if "series" in data:
+            for label_value, series in sorted(data["series"].items()):
+                label = f'{data["label"]}="{_label_value(label_value)}"'
+                for bound, count in series["buckets"]:
+                    lines.append(f'{name}_bucket{{{label},le="{_format_value(bound)}"}} {count}')
+                lines.append(f"{name}_sum{{{label}}} {_format_value(series['sum'])}")
+                lines.append(f"{name}_count{{{label}}} {series['count']}")
+        elif data["type"] == "histogram":
+            for bound, count in data["buckets"]:
+                lines.append(f'{name}_bucket{{le="{_format_value(bound)}"}} {count}')
+            lines.append(f"{name}_sum {_format_value(data['sum'])}")
+            lines.append(f"{name}_count {data['count']}")
+        elif "values" in data:
+            for label_value, value in sorted(data["values"].items()):
+                lines.append(f'{name}{{{data["label"]}="{_label_value(label_value)}"}} {_format_value(value)}')
+        else:
+            lines.append(f"{name} {_format_value(data['value'])}")
+
+    for collect in collectors:
+        for name, kind, help_text, value in collect():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/metrics":
+            content_type, text, *status = "text/plain; version=0.0.4; charset=utf-8", render_prometheus()
+        elif path in _endpoints:
+            content_type, text, *status = _endpoints[path]()
+        else:
+            self.send_error(404)
+            return
+        body = text.encode("utf-8")
+        self.send_response(status[0] if status else 200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes every few seconds would flood the server log
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_attempted = False
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> Optional[ThreadingHTTPServer]:
+    """
+    Serve GET /metrics (and pages from add_endpoint()) on a daemon thread. Safe to call on every script run;
+    only the first call starts a server.
+
+    Binds to localhost by default: the endpoint is for a local scraper, not the internet.
+
+    Returns:
+        The running server, or None if the port could not be bound
+    """
+    global _server, _server_attempted
+    with _server_lock:
+        if not _server_attempted:
+            _server_attempted = True  # A port that failed to bind isn't retried every run
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError as e:
+                print(f"Metrics endpoint unavailable on {host}:{port}: {e}")
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+            print(f"Serving metrics on http://{host}:{port}/metrics")
+        return _server
@@ -0,0 +1,261 @@
+# ON-DEMAND PROFILING
+"""
+Opt-in cProfile + tracemalloc capture around expensive calls.
+
+    with profiling.profile("generate_response"):
+        ...
+
+When a call is selected (profiling forced on, or picked by the sampling
+rate) it leaves two files in the profile directory:
+
+    <timestamp>-<name>-<id>.pstats       cProfile statistics
+    <timestamp>-<name>-<id>.alloc.json   duration and top allocation sites
+
+Only code locations are recorded (file, line, function name, times and
+byte counts), never arguments or local values, so message content cannot
+end up in a profile. The directory keeps the newest PROFILE_KEEP captures.
+
+tracemalloc is process-wide, so only one call is profiled at a time;
+calls that arrive while a capture is running are simply not profiled.
+
+Aggregate captures into flame-graph input (flamegraph.pl, speedscope):
+    python -m utils.profiling collapse profiles/ -o turns.folded
+    python -m utils.profiling collapse profiles/ --name index_knowledge_base
+    python -m utils.profiling allocations profiles/
+"""
+
+import argparse
+import cProfile
+import functools
+import glob
+import json
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional
+
+TOP_ALLOCATION_SITES = 25
+MAX_STACK_DEPTH = 64
+MIN_STACK_MICROSECONDS = 1  # Collapsed stacks below this are dropped
+
+_forced = False
+_sample_rate = 0.0
+_directory = "./profiles"
+_keep = 50
+_capture_lock = threading.Lock()
+
+
+def configure(enabled: bool = False, sample_rate: float = 0.0,
+              directory: str = "./profiles", keep: int = 50):
+    """
+    Args:
+        enabled: Profile every call
+        sample_rate: Otherwise, profile this fraction of calls (0 disables)
+        directory: Where captures are written
+        keep: Number of captures to keep; older ones are deleted
+    """
+    global _forced, _sample_rate, _directory, _keep
+    _forced = enabled
+    _sample_rate = sample_rate
+    _directory = directory
+    _keep = keep
+
+
+def _selected() -> bool:
+    if _forced:
+        return True
+    return _sample_rate > 0 and random.random() < _sample_rate
+
+
+_NOT_PROFILED = nullcontext()
+
+
+def profile(name: str):
+    """Context manager profiling the enclosed block if this call is selected; otherwise a no-op."""
+    if not _selected() or not _capture_lock.acquire(blocking=False):
+        return _NOT_PROFILED
+    return _capture(name)
+
+
+@contextmanager
+def _capture(name: str):
+    """Run one capture. The caller holds _capture_lock; it is released here."""
+    owns_tracemalloc = not tracemalloc.is_tracing()
+    profiler = cProfile.Profile()
+    try:
+        if owns_tracemalloc:
+            tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            duration = time.perf_counter() - started
+            after = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            if owns_tracemalloc:
+                tracemalloc.stop()
+            # Leave out the profiler's own bookkeeping
+            own_frames = [tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__)]
+            allocations = after.filter_traces(own_frames).compare_to(before.filter_traces(own_frames), "lineno")
+            _write_capture(name, profiler, allocations, duration, peak)
+    finally:
+        _capture_lock.release()
+
+
+def profiled(name: Optional[str] = None):
+    """Decorator form of profile()."""
+    def decorate(function):
+        label = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with profile(label):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _write_capture(name: str, profiler: cProfile.Profile, allocation_diff: List, duration: float, peak: int):
+    try:
+        os.makedirs(_directory, exist_ok=True)
+        stem = os.path.join(_directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{uuid.uuid4().hex[:6]}")
+        profiler.dump_stats(stem + ".pstats")
+
+        sites = [
+            {
+                "file": stat.traceback[0].filename,
+                "line": stat.traceback[0].lineno,
+                "size_diff": stat.size_diff,
+                "count_diff": stat.count_diff
+            }
+            for stat in allocation_diff[:TOP_ALLOCATION_SITES]
+        ]
+        with open(stem + ".alloc.json", "w", encoding="utf-8") as f:
+            json.dump({
+                "name": name,
+                "duration_ms": round(duration * 1000, 3),
+                "peak_traced_bytes": peak,
+                "top_allocation_sites": sites
+            }, f, indent=2)
+        _rotate()
+    except OSError as e:
+        # Profiling must never break the call it wraps
+        print(f"Could not write profile: {e}")
+
+
+def _rotate():
+    captures = sorted(glob.glob(os.path.join(_directory, "*.pstats")), key=os.path.getmtime)
+    for path in captures[:max(0, len(captures) - _keep)]:
+        for stale in (path, path[:-len(".pstats")] + ".alloc.json"):
+            if os.path.exists(stale):
+                os.remove(stale)
+
+
+# COLLAPSED STACKS
+def _frame_label(function: tuple) -> str:
+    filename, line, name = function
+    if filename == "~":
+        return name  # Built-in, e.g. "<method 'encode' of 'str' objects>"
+    return f"{os.path.basename(filename)}:{name}:{line}"
+
+
+def collapse_stats(stats: pstats.Stats) -> Dict[str, int]:
+    """
+    Rebuild call stacks from cProfile's caller/callee edges.
+
+    cProfile only records one level of callers, so a function's time is
+    split across the paths that reach it in proportion to each edge's
+    cumulative time - the same approximation flameprof and gprof2dot use.
+
+    Returns:
+        "root;caller;function" -> self time in microseconds
+    """
+    entries = stats.stats
+    callees: Dict[tuple, Dict[tuple, float]] = {}
+    for function, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, {})[function] = edge[3]
+
+    stacks: Counter = Counter()
+
+    def walk(function: tuple, path: List[str], on_path: set, path_time: float):
+        _, _, self_time, cumulative, _ = entries[function]
+        share = path_time / cumulative if cumulative else 0.0
+        path = path + [_frame_label(function)]
+        stacks[";".join(path)] += self_time * share * 1e6
+        if len(path) >= MAX_STACK_DEPTH:
+            return
+        on_path = on_path | {function}
+        for child, edge_time in callees.get(function, {}).items():
+            child_time = edge_time * share
+            if child not in on_path and child_time * 1e6 >= MIN_STACK_MICROSECONDS:
+                walk(child, path, on_path, child_time)
+
+    for function, (_, _, _, cumulative, callers) in entries.items():
+        if not callers:
+            walk(function, [], set(), cumulative)
+
+    return {stack: int(round(value)) for stack, value in stacks.items() if value >= MIN_STACK_MICROSECONDS}
+
+
+def find_captures(directory: str, name: Optional[str] = None) -> List[str]:
+    pattern = f"*-{name}-*.pstats" if name else "*.pstats"
+    return sorted(glob.glob(os.path.join(directory, pattern)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate profiles written by utils.profiling.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    collapse = subcommands.add_parser("collapse", help="Write collapsed stacks for flame graphs")
+    collapse.add_argument("directory")
+    collapse.add_argument("--name", help="Only captures of this call (e.g. generate_response)")
+    collapse.add_argument("-o", "--output", default="-", help="Output file (default stdout)")
+
+    allocations = subcommands.add_parser("allocations", help="Sum allocation sites across captures")
+    allocations.add_argument("directory")
+    allocations.add_argument("--name")
+    allocations.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    captures = find_captures(args.directory, args.name)
+    if not captures:
+        sys.exit(f"No profiles found in {args.directory}")
+
+    if args.command == "collapse":
+        stacks = collapse_stats(pstats.Stats(*captures))
+        output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+        try:
+            for stack, microseconds in sorted(stacks.items()):
+                output.write(f"{stack} {microseconds}\n")
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        print(f"Collapsed {len(captures)} profile(s) into {len(stacks)} stacks (µs)", file=sys.stderr)
+        return
+
+    totals: Counter = Counter()
+    durations = []
+    for path in captures:
+        with open(path[:-len(".pstats")] + ".alloc.json", "r", encoding="utf-8") as f:
+            capture = json.load(f)
+        durations.append(capture["duration_ms"])
+        for site in capture["top_allocation_sites"]:
+            totals[f"{site['file']}:{site['line']}"] += site["size_diff"]
+    print(f"{len(captures)} capture(s), mean duration {sum(durations) / len(durations):.1f} ms")
+    for site, size in totals.most_common(args.top):
+        print(f"{size / len(captures):>12,.0f} B/call  {site}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,50 +1,99 @@
 # SENTIMENT ANALYSIS UTILITY
 """
 Simple sentiment analysis to understand user's emotional state.
-Uses TextBlob for basic analysis and custom keywords for mental health context.
+Scores polarity with a weighted English and Roman Urdu lexicon, and uses
+custom keywords for mental health context.
 """
 
-from textblob import TextBlob
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple, Union
 
-# EMOTIONAL KEYWORDS
-# Custom keywords for mental health context
-NEGATIVE_INDICATORS = {
-    # Sadness
-    "sad", "depressed", "hopeless", "empty", "worthless", "crying", "tears",
-    "lonely", "alone", "miserable", "broken", "hurt", "pain", "suffering",
-    
-    # Anxiety
-    "anxious", "worried", "scared", "fearful", "panicking", "nervous",
-    "terrified", "dread", "overwhelmed", "restless", "uneasy",
-    
-    # Stress
-    "stressed", "exhausted", "burnout", "tired", "drained", "pressure",
-    "overworked", "struggling", "can't cope", "falling apart",
-    
-    # Overthinking
-    "overthinking", "ruminating", "can't stop thinking", "racing thoughts",
-    "spiraling", "obsessing", "intrusive", "what if", "worst case"
-}
+from .lexicons import (
+    NEGATIVE_INDICATORS,
+    POSITIVE_INDICATORS,
+    NEGATIVE_EMOTION_CATEGORIES,
+    ENGLISH_SENTIMENT_WEIGHTS,
+    ROMAN_URDU_SENTIMENT_WEIGHTS
+)
+from .text_analysis import TextAnalysis, analyze_text
 
-POSITIVE_INDICATORS = {
-    "happy", "grateful", "thankful", "blessed", "peaceful", "calm",
-    "hopeful", "better", "improving", "good", "great", "fine", "okay",
-    "relaxed", "content", "proud", "accomplished", "strong"
-}
+# POLARITY SCORING
+# Indicator keywords without an explicit weight still count
+DEFAULT_NEGATIVE_WEIGHT = -0.5
+DEFAULT_POSITIVE_WEIGHT = 0.5
 
-INTENSITY_MODIFIERS = {
-    "very", "really", "extremely", "so", "incredibly", "absolutely",
-    "completely", "totally", "truly", "deeply", "seriously"
+# Phrase -> polarity, built once at import
+SENTIMENT_WEIGHTS: Dict[str, float] = {
+    **{phrase: DEFAULT_NEGATIVE_WEIGHT for phrase in NEGATIVE_INDICATORS},
+    **{phrase: DEFAULT_POSITIVE_WEIGHT for phrase in POSITIVE_INDICATORS},
+    **ENGLISH_SENTIMENT_WEIGHTS,
+    **ROMAN_URDU_SENTIMENT_WEIGHTS
 }
 
+INTENSIFIER_MULTIPLIER = 1.3  # "very sad", "bohot udaas"
+NEGATION_WINDOW = 2           # Tokens between a negation and the word it negates
+NEGATED_NEGATIVE_FACTOR = -0.5  # "not bad" is mildly positive
+NEGATED_POSITIVE_BASE = -0.3    # "not okay" is a real distress signal, however weak "okay" is
 
-def analyze_sentiment(text: str) -> Dict:
+
+def score_polarity(analysis: TextAnalysis) -> Tuple[float, float]:
+    """
+    Score polarity and subjectivity from the lexicon matches in a message.
+    
+    Each weighted word or phrase is scaled by an intensifier right before it
+    and flipped by a negation just before it (English) or just after it
+    (Roman Urdu). Polarity is the mean of the scored terms, like TextBlob's.
+    
+    Args:
+        analysis: TextAnalysis from analyze_text()
+    
+    Returns:
+        Tuple of (polarity, subjectivity)
+        polarity: float from -1 to 1
+        subjectivity: float from 0 to 1 (0 when nothing was scored)
+    """
+    valence = analysis.spans.get("valence")
+    if not valence:
+        return 0.0, 0.0
+    
+    negations_before = analysis.positions.get("negation", ())
+    negation_after_starts = {start for _, start, _ in analysis.spans.get("negation_after", ())}
+    intensifier_ends = analysis.positions.get("modifier", set()) | analysis.positions.get("intensifier", set())
+    
+    # Longest phrases first, so "falling apart" is scored once rather than also as its words
+    covered = set()
+    scores = []
+    subjectivity = 0.0
+    for phrase, start, end in sorted(valence, key=lambda span: span[1] - span[2]):
+        if any(index in covered for index in range(start, end)):
+            continue
+        covered.update(range(start, end))
+        
+        weight = SENTIMENT_WEIGHTS[phrase]
+        subjectivity += 0.5 + 0.5 * abs(weight)
+        
+        # "very sad", "really not okay", "bohot udaas"
+        if start in intensifier_ends or (start - 1 in intensifier_ends and start in negations_before):
+            weight *= INTENSIFIER_MULTIPLIER
+        
+        negated = (
+            any(start - offset in negations_before for offset in range(NEGATION_WINDOW))
+            or any(end + offset in negation_after_starts for offset in range(NEGATION_WINDOW))
+        )
+        if negated:
+            weight = weight * NEGATED_NEGATIVE_FACTOR if weight < 0 else NEGATED_POSITIVE_BASE - 0.5 * weight
+        
+        scores.append(weight)
+    
+    polarity = max(-1.0, min(1.0, sum(scores) / len(scores)))
+    return polarity, min(1.0, subjectivity / len(scores))
+
+
+def analyze_sentiment(text: Union[str, TextAnalysis]) -> Dict:
     """
     Analyze the sentiment and emotional content of user's message.
     
     Args:
-        text: User's message text
+        text: User's message text, or its TextAnalysis from analyze_text()
         
     Returns:
         Dictionary containing:
@@ -54,19 +103,15 @@ def analyze_sentiment(text: str) -> Dict:
         - detected_emotions: List of detected emotional keywords
         - needs_support: Boolean indicating if user needs extra support
     """
-    text_lower = text.lower()
+    analysis = analyze_text(text)
     
-    # Basic TextBlob sentiment analysis
-    blob = TextBlob(text)
-    polarity = blob.sentiment.polarity  # -1 to 1
-    subjectivity = blob.sentiment.subjectivity  # 0 to 1
+    # Lexicon polarity, English and Roman Urdu
+    polarity, subjectivity = score_polarity(analysis)
     
-    # Detect emotional keywords
-    words = set(text_lower.split())
-    
-    negative_found = words.intersection(NEGATIVE_INDICATORS)
-    positive_found = words.intersection(POSITIVE_INDICATORS)
-    modifiers_found = words.intersection(INTENSITY_MODIFIERS)
+    # Detect emotional keywords (single words and phrases, found in one pass)
+    negative_found = analysis.matches("negative")
+    positive_found = analysis.matches("positive")
+    modifiers_found = analysis.matches("modifier")
     
     # Calculate emotional intensity
     intensity = "mild"
@@ -76,14 +121,8 @@ def analyze_sentiment(text: str) -> Dict:
         intensity = "severe"
     
     # Check for phrases that indicate intensity
-    intense_phrases = [
-        "can't cope", "can't handle", "falling apart", "breaking down",
-        "can't take it", "too much", "end it all", "give up"
-    ]
-    for phrase in intense_phrases:
-        if phrase in text_lower:
-            intensity = "severe"
-            break
+    if analysis.matches("intense_phrase"):
+        intensity = "severe"
     
     # Determine if user needs extra support
     needs_support = (
@@ -103,6 +142,46 @@ def analyze_sentiment(text: str) -> Dict:
     }
 
 
+def apply_emotion_scores(sentiment_result: Dict, emotion_scores: Optional[Dict]) -> Dict:
+    """
+    Fold embedding-based emotion scores into an analyze_sentiment() result.
+    
+    Keyword matching misses paraphrases ("my chest gets tight before every
+    call"). When the message embedding is clearly closest to a negative
+    emotion category the keywords didn't catch, that emotion is recorded as
+    an inferred hint for the prompt. Hints never change emotional_intensity
+    or needs_support: those stay keyword-based, since routing, reply length
+    and priority depend on them.
+    
+    Args:
+        sentiment_result: Result from analyze_sentiment()
+        emotion_scores: Result from WellnessRetriever.classify_emotions(), or None
+        
+    Returns:
+        Copy of sentiment_result, plus:
+        - emotion_scores: Category -> similarity (empty without embeddings)
+        - inferred_emotions: Categories found by embedding but not by keywords
+        - inferred_mood: Closest mood key, or None
+    """
+    result = dict(sentiment_result)
+    result["emotion_scores"] = {}
+    result["inferred_emotions"] = []
+    result["inferred_mood"] = None
+    if not emotion_scores:
+        return result
+    
+    result["emotion_scores"] = emotion_scores["categories"]
+    result["inferred_mood"] = emotion_scores["top_mood"]
+    
+    category = emotion_scores["top_category"]
+    if category in NEGATIVE_EMOTION_CATEGORIES:
+        keywords = NEGATIVE_EMOTION_CATEGORIES[category]
+        if not any(emotion in keywords for emotion in result["negative_indicators"]):
+            result["inferred_emotions"] = [category]
+    
+    return result
+
+
 def get_empathy_level(sentiment_result: Dict) -> str:
     """
     Determine appropriate empathy level based on sentiment analysis.
@@ -128,7 +207,7 @@ def format_sentiment_for_prompt(sentiment_result: Dict) -> str:
     Framed as gentle guidance, not clinical labels.
     """
     intensity = sentiment_result["emotional_intensity"]
-    emotions = sentiment_result.get("negative_indicators", [])
+    emotions = sentiment_result.get("negative_indicators", []) + sentiment_result.get("inferred_emotions", [])
     
     if intensity == "severe":
         return f"""[EMOTIONAL AWARENESS]
@@ -143,6 +222,9 @@ What you're sensing: {', '.join(emotions) if emotions else 'emotional weight'}
 Be warm and present. Validate what they're feeling. Only offer gentle support if it feels natural."""
     
     else:
-        return """[EMOTIONAL AWARENESS]
-The user seems relatively steady right now.
+        hint = ""
+        if sentiment_result.get("inferred_emotions"):
+            hint = f"\nPossibly underneath (from their phrasing, unconfirmed): {', '.join(sentiment_result['inferred_emotions'])}"
+        return f"""[EMOTIONAL AWARENESS]
+The user seems relatively steady right now.{hint}
 Stay warm, be present, maintain a safe and gentle space for whatever they want to share."""
@@ -0,0 +1,244 @@
+# SESSION MEMORY ACCOUNTING
+"""
+Per-session memory accounting, a bounded message window and idle-session compaction.
+
+Every Streamlit session lives in the same server process, so a long chat
+or thousands of idle tabs show up as worker RSS that never goes down.
+Each session owns a SessionMemory, registered in the process-wide
+session_registry:
+
+- After each run, new messages are handed to the conversation store, the
+  session's state is measured (approximate deep size), and stored messages
+  beyond a live limit are dropped from memory; the UI pages them back in
+  from the store on request.
+- A daemon sweeper compacts sessions idle for longer than a TTL down to a
+  few live messages, so abandoned tabs cost kilobytes rather than megabytes.
+- largest_sessions() (served as /sessions on the metrics endpoint) and the
+  session_* metrics show where memory is going.
+
+The registry only holds weak references: once Streamlit drops a closed
+session's state, its SessionMemory and registry entry go with it.
+"""
+
+import json
+import sys
+import threading
+import time
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+from . import metrics
+
+PAGE_OUT_BLOCK_MESSAGES = 20  # Messages dropped from memory at a time
+
+# Objects shared across sessions or the process; never counted in a session's size
+_SHARED_TYPES = (type, type(sys), type(len), type(lambda: None), threading.Thread)
+
+
+def deep_size(obj, exclude_ids: Optional[set] = None) -> int:
+    """
+    Approximate bytes reachable from obj: containers, strings and plain objects.
+
+    Each object is counted once. Modules, classes, functions and anything in
+    exclude_ids (e.g. shared models) are not followed.
+    """
+    seen = set(exclude_ids or ())
+    stack = [obj]
+    total = 0
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, _SHARED_TYPES):
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current, 0)
+
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif not isinstance(current, (str, bytes, int, float, bool)):
+            if hasattr(current, "__dict__"):
+                stack.append(vars(current))
+            for slot in getattr(type(current), "__slots__", ()):
+                if hasattr(current, slot):
+                    stack.append(getattr(current, slot))
+    return total
+
+
+class SessionMemory:
+    """
+    Accounting and the in-memory message window for one session.
+
+    The sweeper thread trims the session's message list and advances
+    paged_out, so the session's own code must hold `lock` whenever it
+    appends to the list or reads it together with paged_out.
+    """
+
+    __slots__ = ("session_id", "conversation_id", "paged_out", "saved", "approx_bytes",
+                 "last_active", "lock", "messages", "__weakref__")
+
+    def __init__(self, session_id: str, conversation_id: str = "", first_seq: int = 0, saved: int = 0):
+        """
+        Args:
+            session_id: Streamlit session id
+            conversation_id: Conversation store key for this chat
+            first_seq: Sequence number of the first message held in memory;
+                earlier ones are only in the conversation store
+            saved: Sequence number of the first message not yet handed to the store
+        """
+        self.session_id = session_id
+        self.conversation_id = conversation_id
+        self.paged_out = first_seq
+        self.saved = max(saved, first_seq)
+        self.approx_bytes = 0
+        self.last_active = time.monotonic()
+        self.lock = threading.Lock()
+        self.messages: List[Dict] = []
+
+    def take_unsaved(self, messages: List[Dict]) -> List[Tuple[int, Dict]]:
+        """
+        Messages appended since the last call, with their sequence numbers, marked as saved.
+
+        The caller hands them to the conversation store.
+        """
+        with self.lock:
+            start = self.saved - self.paged_out
+            unsaved = [(self.paged_out + index, message) for index, message in enumerate(messages[start:], start)]
+            self.saved = self.paged_out + len(messages)
+            return unsaved
+
+    def touch(self, messages: List[Dict], state: Dict, live_limit: int):
+        """
+        Record activity, page out saved messages beyond live_limit and re-measure the session.
+
+        Args:
+            messages: The session's chat message list (trimmed in place)
+            state: The rest of the session's state to count, without shared objects
+            live_limit: Messages to keep in memory
+        """
+        with self.lock:
+            self.last_active = time.monotonic()
+            self.messages = messages
+            self._page_out(live_limit)
+            self.approx_bytes = deep_size(state)
+
+    def compact(self, live_limit: int) -> int:
+        """Page out all but live_limit messages. Returns the bytes freed (approximately)."""
+        with self.lock:
+            before = deep_size(self.messages)
+            self._page_out(live_limit, whole_blocks=False)
+            freed = max(0, before - deep_size(self.messages))
+            self.approx_bytes = max(0, self.approx_bytes - freed)
+            return freed
+
+    def _page_out(self, live_limit: int, whole_blocks: bool = True):
+        # Only messages already handed to the store may leave memory. During
+        # turns they go in whole blocks, so the window shrinks in steps rather
+        # than by one message every turn.
+        excess = min(len(self.messages) - live_limit, self.saved - self.paged_out)
+        if excess <= 0 or (whole_blocks and excess < PAGE_OUT_BLOCK_MESSAGES):
+            return
+        if whole_blocks:
+            excess -= excess % PAGE_OUT_BLOCK_MESSAGES
+        del self.messages[:excess]
+        self.paged_out += excess
+
+    def reset(self, conversation_id: str, messages: List[Dict]):
+        """Start a new, empty conversation held in `messages`."""
+        with self.lock:
+            self.conversation_id = conversation_id
+            self.messages = messages
+            self.paged_out = 0
+            self.saved = 0
+
+
+class SessionRegistry:
+    def __init__(self):
+        """
+        Initialize the registry.
+
+        Maps session id -> weak reference to that session's SessionMemory.
+        """
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, weakref.ref] = {}
+        self._sweeper: Optional[threading.Thread] = None
+
+    def get(self, session_id: str, existing: Optional[SessionMemory] = None) -> SessionMemory:
+        """Register a session's SessionMemory (creating one if needed) and return it."""
+        memory = existing if existing is not None else SessionMemory(session_id)
+        with self._lock:
+            self._sessions[session_id] = weakref.ref(memory)
+        return memory
+
+    def _live(self) -> List[SessionMemory]:
+        with self._lock:
+            dead = [session_id for session_id, ref in self._sessions.items() if ref() is None]
+            for session_id in dead:
+                del self._sessions[session_id]
+            return [memory for memory in (ref() for ref in self._sessions.values()) if memory is not None]
+
+    def sweep(self, idle_ttl: float, idle_live_limit: int) -> int:
+        """
+        Compact every session idle for longer than idle_ttl seconds.
+
+        Returns:
+            Number of sessions compacted
+        """
+        now = time.monotonic()
+        compacted = 0
+        for memory in self._live():
+            if now - memory.last_active > idle_ttl and len(memory.messages) > idle_live_limit:
+                freed = memory.compact(idle_live_limit)
+                compacted += 1
+                print(f"[memory] compacted idle session {memory.session_id[:8]}, ~{freed / 1024:.0f} KiB freed")
+        return compacted
+
+    def start_sweeper(self, interval: float, idle_ttl: float, idle_live_limit: int):
+        """Sweep every `interval` seconds on a daemon thread. Only the first call starts it."""
+        with self._lock:
+            if self._sweeper is not None:
+                return
+
+            def run():
+                while True:
+                    time.sleep(interval)
+                    try:
+                        self.sweep(idle_ttl, idle_live_limit)
+                    except Exception as e:
+                        print(f"[memory] sweep failed: {type(e).__name__}: {e}")
+
+            self._sweeper = threading.Thread(target=run, name="session-sweeper", daemon=True)
+            self._sweeper.start()
+
+    def largest_sessions(self, n: int = 10) -> List[Dict]:
+        """The n sessions using the most memory, largest first."""
+        now = time.monotonic()
+        sessions = sorted(self._live(), key=lambda memory: memory.approx_bytes, reverse=True)[:n]
+        return [
+            {
+                "session": memory.session_id[:8],
+                "approx_bytes": memory.approx_bytes,
+                "live_messages": len(memory.messages),
+                "paged_out_messages": memory.paged_out,
+                "idle_seconds": round(now - memory.last_active, 1)
+            }
+            for memory in sessions
+        ]
+
+    def collect_metrics(self):
+        sessions = self._live()
+        sizes = [memory.approx_bytes for memory in sessions]
+        return [
+            ("session_count", "gauge", "Sessions with state in this process", len(sessions)),
+            ("session_state_bytes_total", "gauge", "Approximate bytes of all session state", sum(sizes)),
+            ("session_state_bytes_max", "gauge", "Approximate bytes of the largest session", max(sizes, default=0)),
+            ("session_paged_out_messages", "gauge", "Messages only in the conversation store, across sessions",
+             sum(memory.paged_out for memory in sessions))
+        ]
+
+
+# Shared by every session in the server process
+session_registry = SessionRegistry()
+metrics.register_collector(session_registry.collect_metrics)
+metrics.add_endpoint("/sessions", lambda: ("application/json", json.dumps(session_registry.largest_sessions(20))))
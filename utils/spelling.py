@@ -0,0 +1,57 @@
+# ROMAN URDU SPELLING CANONICALIZATION
+"""
+Maps Roman Urdu spelling variants (bohat, bahut, bht) to one canonical
+spelling (bohot), so lexicons only need the canonical form and anything
+keyed by words or text sees one string per word.
+
+The table is built once at import from data/roman_urdu_variants.txt. A
+message is canonicalized in one pass, with one dict lookup per word.
+"""
+
+import os
+from typing import Dict, List
+
+from .lexicons import COMMON_ENGLISH_WORDS
+
+VARIANTS_PATH = os.path.join(os.path.dirname(__file__), "data", "roman_urdu_variants.txt")
+
+
+def load_variant_table(path: str = VARIANTS_PATH) -> Dict[str, str]:
+    """
+    Read "canonical variant variant ..." lines into a variant -> canonical dict.
+    
+    Raises:
+        ValueError: If a variant is listed under two canonical spellings, or is
+            a common English word (canonicalizing it would corrupt English text)
+    """
+    table: Dict[str, str] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.split("#", 1)[0].strip().lower()
+            if not line:
+                continue
+            canonical, *variants = line.split()
+            for variant in variants:
+                if variant == canonical:
+                    continue
+                if variant in COMMON_ENGLISH_WORDS:
+                    raise ValueError(f"{path}:{line_number}: '{variant}' is an English word")
+                if table.get(variant, canonical) != canonical:
+                    raise ValueError(f"{path}:{line_number}: '{variant}' is listed under '{table[variant]}' and '{canonical}'")
+                table[variant] = canonical
+    return table
+
+
+VARIANT_TABLE = load_variant_table()
+
+
+def canonical_word(word: str) -> str:
+    """Canonical spelling of one lowercased word (the word itself if it has no variants)."""
+    return VARIANT_TABLE.get(word, word)
+
+
+def canonicalize_words(words: List[str]) -> List[str]:
+    """Canonicalize a list of lowercased, punctuation-free words."""
+    lookup = VARIANT_TABLE.get
+    return [lookup(word, word) for word in words]
+
@@ -0,0 +1,162 @@
+# SHARED TEXT ANALYSIS
+"""
+Normalizes and tokenizes a message once per turn, and finds every lexicon
+entry in it with a single pass of a multi-pattern automaton.
+
+analyze_sentiment, detect_crisis and detect_language all accept the
+resulting TextAnalysis, so a turn never lowercases, tokenizes or scans
+the same message more than once.
+"""
+
+import re
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Set, Tuple, Union
+
+from .lexicons import (
+    NEGATIVE_INDICATORS,
+    POSITIVE_INDICATORS,
+    INTENSITY_MODIFIERS,
+    INTENSE_PHRASES,
+    ENGLISH_SENTIMENT_WEIGHTS,
+    ROMAN_URDU_SENTIMENT_WEIGHTS,
+    NEGATION_WORDS,
+    ROMAN_URDU_NEGATIONS,
+    ROMAN_URDU_INTENSIFIERS,
+    ROMAN_URDU_WORDS,
+    COMMON_ENGLISH_WORDS
+)
+from .spelling import canonicalize_words
+
+NON_WORD_PATTERN = re.compile(r"[^\w\s]")
+
+
+def normalize_phrase(text: str) -> str:
+    """Lowercase and drop punctuation, so "can't cope" and "cant cope" compare equal."""
+    return NON_WORD_PATTERN.sub("", text.lower())
+
+
+class PhraseMatcher:
+    """
+    Aho-Corasick automaton over word tokens.
+
+    Matching whole tokens (rather than characters) gives word boundaries for
+    free, and a message is scanned once no matter how many lexicons or
+    multi-word phrases are loaded.
+    """
+
+    def __init__(self, lexicons: Dict[str, Iterable[str]]):
+        """
+        Build the automaton.
+
+        Args:
+            lexicons: Label -> phrases. Each match reports its label and the
+                phrase exactly as written in the lexicon.
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[str, str, int]]] = [[]]
+
+        for label, phrases in lexicons.items():
+            for phrase in phrases:
+                self._add(label, phrase)
+        self._link()
+
+    def _add(self, label: str, phrase: str):
+        tokens = canonicalize_words(normalize_phrase(phrase).split())
+        if not tokens:
+            return
+        node = 0
+        for token in tokens:
+            child = self._goto[node].get(token)
+            if child is None:
+                child = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[node][token] = child
+            node = child
+        self._output[node].append((label, phrase, len(tokens)))
+
+    def _link(self):
+        """Compute failure links breadth-first and merge outputs along them."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(token, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def scan(self, tokens: List[str]) -> Iterator[Tuple[str, str, int, int]]:
+        """
+        Yield (label, phrase, start, end) for every match; start/end are token indices.
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for index, token in enumerate(tokens):
+            while node and token not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(token, 0)
+            for label, phrase, length in output[node]:
+                yield label, phrase, index - length + 1, index + 1
+
+
+# Built once at import from every lexicon used on the hot path
+MATCHER = PhraseMatcher({
+    "negative": NEGATIVE_INDICATORS,
+    "positive": POSITIVE_INDICATORS,
+    "modifier": INTENSITY_MODIFIERS,
+    "intense_phrase": INTENSE_PHRASES,
+    # Every phrase sentiment.SENTIMENT_WEIGHTS scores: indicator keywords
+    # (default weight there) and the explicitly weighted entries
+    "valence": list(dict.fromkeys([
+        *NEGATIVE_INDICATORS, *POSITIVE_INDICATORS, *ENGLISH_SENTIMENT_WEIGHTS, *ROMAN_URDU_SENTIMENT_WEIGHTS
+    ])),
+    "negation": NEGATION_WORDS,
+    "negation_after": ROMAN_URDU_NEGATIONS,
+    "intensifier": ROMAN_URDU_INTENSIFIERS,
+    "roman_urdu": ROMAN_URDU_WORDS,
+    "english": COMMON_ENGLISH_WORDS
+})
+
+
+class TextAnalysis:
+    """Normalized forms of one message plus everything the matcher found in it."""
+
+    __slots__ = ("text", "lower", "normalized", "words", "found", "positions", "spans")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.lower = text.lower()
+        self.normalized = self.lower.strip()
+        # Roman Urdu spelling variants are folded to one spelling before matching
+        self.words = canonicalize_words(NON_WORD_PATTERN.sub("", self.lower).split())
+
+        # label -> lexicon entries found; label -> token indices where they end;
+        # label -> (phrase, start, end) for every match, in scan order
+        self.found: Dict[str, Set[str]] = {}
+        self.positions: Dict[str, Set[int]] = {}
+        self.spans: Dict[str, List[Tuple[str, int, int]]] = {}
+        for label, phrase, start, end in MATCHER.scan(self.words):
+            self.found.setdefault(label, set()).add(phrase)
+            self.positions.setdefault(label, set()).add(end)
+            self.spans.setdefault(label, []).append((phrase, start, end))
+
+    def matches(self, label: str) -> Set[str]:
+        """Lexicon entries found for `label` (empty set if none)."""
+        return self.found.get(label, set())
+
+    def count(self, label: str) -> int:
+        """Number of distinct token positions where `label` matched."""
+        return len(self.positions.get(label, ()))
+
+
+def analyze_text(text: Union[str, TextAnalysis]) -> TextAnalysis:
+    """Analyze a message, or return it unchanged if it is already analyzed."""
+    if isinstance(text, TextAnalysis):
+        return text
+    return TextAnalysis(text)
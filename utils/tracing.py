@@ -0,0 +1,158 @@
+# PER-TURN STAGE TRACING
+"""
+Latency spans around the stages of a chat turn.
+
+    trace = tracing.begin_turn()
+    with tracing.span("sentiment"):
+        ...
+    tracing.end_turn(trace)
+
+Every span feeds the turn_stage_seconds{stage=...} histogram in utils.metrics.
+With a trace log configured, each turn is also appended to it as one JSON
+line of stage durations and outcome annotations - never message content.
+
+Tracing is off until configure(enabled=True). While it is off, span()
+returns a shared no-op context manager and begin_turn() returns None, so
+instrumented code pays one function call and a flag check per stage.
+"""
+
+import contextvars
+import json
+import threading
+import time
+import uuid
+from typing import Dict, Optional
+
+from . import metrics
+
+# Seconds; stages range from microseconds (keyword analysis) to seconds (LLM)
+STAGE_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_enabled = False
+_trace_path: Optional[str] = None
+_trace_file = None
+_config_lock = threading.Lock()
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("current_trace", default=None)
+
+STAGE_TIME = metrics.labeled_histogram("turn_stage_seconds", "Time spent in each stage of a turn", "stage",
+                                       buckets=STAGE_BUCKETS)
+
+
+class TurnTrace:
+    """Stage durations and annotations for one turn."""
+
+    __slots__ = ("turn_id", "started", "wall_time", "stages", "annotations")
+
+    def __init__(self):
+        self.turn_id = uuid.uuid4().hex[:12]
+        self.started = time.perf_counter()
+        self.wall_time = time.time()
+        self.stages: Dict[str, float] = {}
+        self.annotations: Dict[str, object] = {}
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.stage, time.perf_counter() - self.started)
+        return False
+
+
+def configure(enabled: bool, trace_path: Optional[str] = None):
+    """
+    Turn tracing on or off, and optionally append each turn to a JSON-lines file.
+
+    Safe to call on every script run; the trace file is only reopened when the path changes.
+    """
+    global _enabled, _trace_path, _trace_file
+    with _config_lock:
+        _enabled = enabled
+        if trace_path == _trace_path:
+            return
+        if _trace_file is not None:
+            _trace_file.close()
+        _trace_file = open(trace_path, "a", encoding="utf-8", buffering=1) if trace_path else None
+        _trace_path = trace_path
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def span(stage: str):
+    """Context manager timing one stage of the current turn."""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(stage)
+
+
+def record(stage: str, seconds: float):
+    """Record a duration measured elsewhere (e.g. time to first token)."""
+    if not _enabled:
+        return
+    STAGE_TIME.observe(stage, seconds)
+    trace = _current_trace.get()
+    if trace is not None:
+        # A stage that runs twice in a turn accumulates
+        trace.stages[stage] = trace.stages.get(stage, 0.0) + seconds
+
+
+def annotate(**values):
+    """Attach small non-content values (outcome, model, language) to the current turn."""
+    if not _enabled:
+        return
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.annotations.update(values)
+
+
+def begin_turn() -> Optional[TurnTrace]:
+    """Start tracing a turn on this thread. Returns None while tracing is off."""
+    if not _enabled:
+        return None
+    trace = TurnTrace()
+    _current_trace.set(trace)
+    return trace
+
+
+def end_turn(trace: Optional[TurnTrace]):
+    """Record the turn's total time and write it to the trace log."""
+    if trace is None:
+        return
+    _current_trace.set(None)
+    total = time.perf_counter() - trace.started
+    STAGE_TIME.observe("total", total)
+
+    if _trace_file is None:
+        return
+    line = json.dumps({
+        "turn_id": trace.turn_id,
+        "time": round(trace.wall_time, 3),
+        "total_ms": round(total * 1000, 3),
+        "stages_ms": {stage: round(seconds * 1000, 3) for stage, seconds in trace.stages.items()},
+        **trace.annotations
+    })
+    with _config_lock:
+        if _trace_file is not None:
+            _trace_file.write(line + "\n")